@@ -58,15 +58,31 @@ class RuleAdapter:
 class ActionManager:
     """Manager for workflow transition content rules and actions."""
 
+    def _lookup(self, transition):
+        """Find the rule of a transition by its storage key."""
+        if self.storage is None:
+            return None
+        rule = self.storage.get(generateRuleName(transition))
+        if rule is None:
+            # Rules created before rule names included the workflow id.
+            rule = self.storage.get(generateRuleNameOld(transition))
+        return rule
+
     def get_rule(self, transition):
-        rulename = generateRuleName(transition)
-        rulename_old = generateRuleNameOld(transition)
-        if self.storage is not None:
-            for rule in self.storage.values():
-                if rule.__name__ in (rulename, rulename_old):
-                    return RuleAdapter(rule, transition)
+        rule = self._lookup(transition)
+        if rule is not None:
+            return RuleAdapter(rule, transition)
         return None
 
+    def get_rules_for_workflow(self, workflow):
+        """Return the rules of all transitions of a workflow keyed by transition id."""
+        rules = {}
+        for transition in workflow.transitions.objectValues():
+            rule = self._lookup(transition)
+            if rule is not None:
+                rules[transition.id] = RuleAdapter(rule, transition)
+        return rules
+
     def create(self, transition):
         rule = self.get_rule(transition)
         if rule is None:
@@ -94,4 +110,99 @@ class ActionManager:
     def delete_rule_for(self, transition):
         rule = self.get_rule(transition)
         if rule is not None:
-            del self.storage[rule.rule.__name__]
\ No newline at end of file
+            del self.storage[rule.rule.__name__]
+
+    def delete_rules_for_workflow(self, workflow):
+        for rule in self.get_rules_for_workflow(workflow).values():
+            if rule.rule.__name__ in self.storage:
+                del self.storage[rule.rule.__name__]
+
+    def find_orphaned_rules(self, portal):
+        """Return the manager's rules whose workflow or transition no longer exists."""
+        if self.storage is None:
+            return []
+        wtool = getToolByName(portal, 'portal_workflow')
+        transition_ids = {}
+        for workflow in wtool.objectValues():
+            transitions = getattr(workflow, 'transitions', None)
+            if transitions is not None:
+                transition_ids[workflow.getId()] = set(transitions.objectIds())
+        all_transition_ids = set().union(*transition_ids.values())
+
+        orphaned = []
+        prefix = "--workflowmanager--"
+        for name in self.storage:
+            if not name.startswith(prefix):
+                continue
+            rest = name[len(prefix):]
+            workflow_id, _sep, transition_id = rest.partition("--")
+            if transition_id and workflow_id in transition_ids:
+                exists = transition_id in transition_ids[workflow_id]
+            else:
+                # Either an old style name without the workflow id, or the
+                # rule of a workflow that was deleted without its rules.
+                exists = rest in all_transition_ids
+                if not transition_id:
+                    workflow_id, transition_id = None, rest
+            if not exists:
+                orphaned.append({
+                    "name": name,
+                    "workflow": workflow_id,
+                    "transition": transition_id,
+                })
+        return orphaned
+
+    def migrate_rule_names(self, portal):
+        """Rename rules stored under the old, workflow-less name.
+
+        A rule is only renamed when exactly one workflow has a transition of
+        that id; otherwise it stays under the old name, which ``get_rule``
+        still falls back to. Returns the number of renamed rules.
+        """
+        if self.storage is None:
+            return 0
+        wtool = getToolByName(portal, 'portal_workflow')
+        transitions_by_id = {}
+        for workflow in wtool.objectValues():
+            transitions = getattr(workflow, 'transitions', None)
+            if transitions is None:
+                continue
+            for transition in transitions.objectValues():
+                transitions_by_id.setdefault(transition.id, []).append(transition)
+
+        renamed = 0
+        for transition_id, transitions in transitions_by_id.items():
+            old_name = f"--workflowmanager--{transition_id}"
+            if old_name not in self.storage or len(transitions) != 1:
+                continue
+            new_name = generateRuleName(transitions[0])
+            if new_name in self.storage:
+                continue
+            self._rename_rule(portal, old_name, new_name)
+            renamed += 1
+        return renamed
+
+    def _rename_rule(self, portal, old_name, new_name):
+        rule = self.storage[old_name]
+        assignments = []
+        for path in get_assignments(rule):
+            container = portal.unrestrictedTraverse(path, None)
+            if container is None:
+                continue
+            assignment = IRuleAssignmentManager(container).get(old_name)
+            if assignment is not None:
+                assignments.append((path, container, assignment))
+
+        # Removing the rule also removes its assignments, re-create them
+        # under the new name afterwards.
+        del self.storage[old_name]
+        self.storage[new_name] = rule
+        paths = get_assignments(rule)
+        for path, container, assignment in assignments:
+            IRuleAssignmentManager(container)[new_name] = RuleAssignment(
+                new_name,
+                enabled=assignment.enabled,
+                bubbles=assignment.bubbles,
+            )
+            if path not in paths:
+                paths.insert(path)
@@ -1,14 +1,25 @@
 from Products.CMFCore.utils import getToolByName
+from plone import api
+from plone.memoize import instance
 from plone.memoize.view import memoize
+from workflow.manager import history
+from workflow.manager import instrumentation
+from workflow.manager import revisions
 from workflow.manager.actionmanager import ActionManager
+from workflow.manager.jobs import DEFAULT_BATCH_SIZE
 from workflow.manager.permissions import (
     allowed_guard_permissions,
     managed_permissions,
 )
+from zope.annotation.interfaces import IAnnotations
 from zope.component import getUtility
 from zope.schema.interfaces import IVocabularyFactory
 
 
+# Request annotation holding the changes collected by ``collect_revisions``.
+CHANGE_SET_KEY = "workflow.manager.change_set"
+
+
 class Base:
     def __init__(self, context, request, workflow_id=None, state_id=None, transition_id=None):
         self.context = context
@@ -34,13 +45,18 @@ class Base:
 
     @property
     @memoize
+    def portal_catalog(self):
+        return getToolByName(self.context, "portal_catalog")
+
+    @property
+    @instance.memoize
     def selected_workflow(self):
         if self._workflow_id and self._workflow_id in self.portal_workflow.objectIds():
             return self.portal_workflow.get(self._workflow_id)
         return None
 
     @property
-    @memoize
+    @instance.memoize
     def selected_state(self):
         workflow = self.selected_workflow
         if workflow and self._state_id and self._state_id in workflow.states.objectIds():
@@ -48,7 +64,7 @@ class Base:
         return None
 
     @property
-    @memoize
+    @instance.memoize
     def selected_transition(self):
         workflow = self.selected_workflow
         if workflow and self._transition_id and self._transition_id in workflow.transitions.objectIds():
@@ -56,7 +72,7 @@ class Base:
         return None
 
     @property
-    @memoize
+    @instance.memoize
     def available_states(self):
         if not self.selected_workflow:
             return []
@@ -66,7 +82,7 @@ class Base:
         )
 
     @property
-    @memoize
+    @instance.memoize
     def available_transitions(self):
         if not self.selected_workflow:
             return []
@@ -81,49 +97,108 @@ class Base:
         return ActionManager()
 
     @property
-    @memoize
+    @instance.memoize
     def managed_permissions(self):
         if not self.selected_workflow:
             return []
         return managed_permissions(self.selected_workflow.getId())
 
     @property
-    @memoize
+    @instance.memoize
     def allowed_guard_permissions(self):
         if not self.selected_workflow:
             return []
         return allowed_guard_permissions(self.selected_workflow.getId())
 
-    def get_assignable_types_for(self, workflow_id):
-        assigned_types = self._get_assigned_types_for(workflow_id)
+    def bump_revision(self, *changes, workflow_id=None, comment=""):
+        """Record that a workflow definition (by default the selected one) changed.
+
+        ``changes`` are ``(kind, item_id, action)`` tuples, see
+        ``workflow.manager.revisions.bump``. A version with the changed items
+        is added to the workflow's history. While changes are collected (see
+        ``collect_revisions``) nothing is recorded yet and None is returned.
+        """
+        workflow_id = workflow_id or self._workflow_id
+        change_set = IAnnotations(self.request).get(CHANGE_SET_KEY)
+        if change_set is not None:
+            collected, collected_comment = change_set.get(workflow_id, ((), ""))
+            default = ((revisions.WORKFLOW, workflow_id, revisions.MODIFIED),)
+            change_set[workflow_id] = (
+                collected + (changes or default),
+                comment or collected_comment,
+            )
+            return None
+        return self._record_revision(workflow_id, changes, comment)
+
+    def _record_revision(self, workflow_id, changes, comment):
+        revision = revisions.bump(self.portal, workflow_id, *changes)
+        workflow = self.portal_workflow.get(workflow_id)
+        if workflow is None or getattr(workflow, 'states', None) is None:
+            history.forget(self.portal, workflow_id)
+        else:
+            history.record(self.portal, workflow, changes, comment=comment)
+        return revision
+
+    def collect_revisions(self):
+        """Collect the changes of the following saves instead of recording each.
+
+        ``record_collected`` then records one revision and one history
+        version per changed workflow; ``discard_collected`` drops them.
+        """
+        IAnnotations(self.request)[CHANGE_SET_KEY] = {}
+
+    def record_collected(self):
+        change_set = IAnnotations(self.request).pop(CHANGE_SET_KEY, None) or {}
+        for workflow_id, (changes, comment) in change_set.items():
+            self._record_revision(workflow_id, tuple(dict.fromkeys(changes)), comment)
+
+    def discard_collected(self):
+        IAnnotations(self.request).pop(CHANGE_SET_KEY, None)
 
+    @property
+    def job_batch_size(self):
+        return api.portal.get_registry_record(
+            "workflow.manager.control_panel.job_batch_size",
+            default=DEFAULT_BATCH_SIZE,
+        )
+
+    # The following are shared by every Base instance of a request (the view
+    # memoize cache is keyed on the context, not on the instance), so a
+    # listing of many workflows computes them only once.
+
+    @property
+    @memoize
+    def assigned_types_index(self):
+        """Map each workflow id to the types whose chain override uses it."""
+        index = {}
+        with instrumentation.phase("chains"):
+            for p_type, chain in self.portal_workflow.listChainOverrides():
+                for workflow_id in chain:
+                    index.setdefault(workflow_id, []).append(p_type)
+        return index
+
+    @property
+    @memoize
+    def friendly_types(self):
         vocab_factory = getUtility(IVocabularyFactory,
             name="plone.app.vocabularies.ReallyUserFriendlyTypes")
-        all_types = vocab_factory(self.context)
+        with instrumentation.phase("types"):
+            return sorted(
+                [
+                    {"id": term.value, "title": term.title}
+                    for term in vocab_factory(self.context)
+                ],
+                key=lambda v: v['title']
+            )
 
-        assignable_types = []
-        for term in all_types:
-            if term.value not in assigned_types:
-                assignable_types.append({
-                    "id": term.value,
-                    "title": term.title
-                })
+    @property
+    @memoize
+    def available_roles(self):
+        return list(self.portal.valid_roles())
 
-        return sorted(assignable_types, key=lambda v: v['title'])
+    def get_assignable_types_for(self, workflow_id):
+        assigned_types = set(self._get_assigned_types_for(workflow_id))
+        return [t for t in self.friendly_types if t["id"] not in assigned_types]
 
     def _get_assigned_types_for(self, workflow_id):
-        assigned = []
-        for p_type, chain in self.portal_workflow.listChainOverrides():
-            if workflow_id in chain:
-                assigned.append(p_type)
-        return assigned
-
-    def getGroups(self):
-        acl_users = getToolByName(self.context, 'acl_users')
-        return sorted(
-            [
-                {'id': g.getId(), 'title': g.getProperty('title') or g.getId()}
-                for g in acl_users.source_groups.getGroups()
-            ],
-            key=lambda g: g['title'].lower()
-        )
+        return list(self.assigned_types_index.get(workflow_id, ()))
@@ -0,0 +1,174 @@
+from plone.memoize.view import ViewMemo
+from plone.protect.interfaces import IDisableCSRFProtection
+from plone.restapi.deserializer import json_body
+from workflow.manager import _
+from workflow.manager import logger
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.api.services.workflow.state import AddState
+from workflow.manager.api.services.workflow.state import DeleteState
+from workflow.manager.api.services.workflow.state import EditState
+from workflow.manager.api.services.workflow.transition import AddTransition
+from workflow.manager.api.services.workflow.transition import DeleteTransition
+from workflow.manager.api.services.workflow.transition import UpdateTransition
+from workflow.manager.api.services.workflow.workflow import AssignWorkflow
+from workflow.manager.api.services.workflow.workflow import UpdateWorkflow
+from ZODB.POSException import ConflictError
+from zope.annotation.interfaces import IAnnotations
+from zope.interface import alsoProvides
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+import json
+import transaction
+
+
+# (type, op) -> (service, whether the URL of the service takes the item id)
+OPERATIONS = {
+    ("workflow", "update"): (UpdateWorkflow, False),
+    ("workflow", "assign"): (AssignWorkflow, False),
+    ("state", "add"): (AddState, False),
+    ("state", "update"): (EditState, True),
+    ("state", "delete"): (DeleteState, True),
+    ("transition", "add"): (AddTransition, True),
+    ("transition", "update"): (UpdateTransition, True),
+    ("transition", "delete"): (DeleteTransition, True),
+}
+
+
+@implementer(IPublishTraverse)
+class WorkflowBatch(Service):
+    """Apply an ordered list of edits to a workflow in one transaction.
+
+    POST ``/@workflow-batch/{workflow_id}`` with::
+
+        {"operations": [
+            {"type": "state", "op": "add", "body": {"title": "Review"}},
+            {"type": "transition", "op": "update", "id": "publish", "body": {...}},
+            ...
+        ]}
+
+    Each operation runs the same service as the corresponding single
+    request. If one fails, everything done by the batch is rolled back and
+    the error of the failing operation is returned. A successful batch is
+    recorded as one change set: one revision and one history version for
+    every workflow it changed.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        alsoProvides(self.request, IDisableCSRFProtection)
+
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        if not base.selected_workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        try:
+            body = json_body(self.request)
+        except Exception as e:
+            self.request.response.setStatus(400)
+            return {"error": f"Invalid JSON payload: {e!s}"}
+
+        operations = body.get("operations")
+        error = self.validate_operations(operations)
+        if error:
+            self.request.response.setStatus(400)
+            return {"error": error}
+
+        savepoint = transaction.savepoint()
+        original_body = self.request.get("BODY")
+        results = []
+        base.collect_revisions()
+        try:
+            for index, operation in enumerate(operations):
+                status, result = self.run(workflow_id, operation)
+                results.append({"index": index, "status": status, "result": result})
+                if status >= 400:
+                    savepoint.rollback()
+                    self.request.response.setStatus(status)
+                    return {
+                        "status": "error",
+                        "failed": index,
+                        "error": (result or {}).get("error"),
+                        "results": results,
+                    }
+            base.record_collected()
+        except ConflictError:
+            # Let the publisher retry the whole request.
+            raise
+        except Exception as e:
+            logger.exception(f"Batch edit of workflow '{workflow_id}' failed")
+            savepoint.rollback()
+            self.request.response.setStatus(500)
+            return {
+                "status": "error",
+                "failed": len(results),
+                "error": f"Operation {len(results)} failed: {e!s}",
+                "results": results,
+            }
+        finally:
+            base.discard_collected()
+            self.request.set("BODY", original_body)
+            self._clear_request_memos()
+
+        self.request.response.setStatus(200)
+        return {
+            "status": "success",
+            "results": results,
+            "message": _("Workflow updated successfully"),
+        }
+
+    def validate_operations(self, operations):
+        if not isinstance(operations, list) or not operations:
+            return "'operations' must be a non-empty list."
+        for index, operation in enumerate(operations):
+            error = self.validate(operation)
+            if error:
+                return f"Operation {index}: {error}"
+        return None
+
+    def validate(self, operation):
+        if not isinstance(operation, dict):
+            return "must be an object."
+        key = (operation.get("type"), operation.get("op"))
+        if key not in OPERATIONS:
+            return f"unsupported operation {key[1]!r} on {key[0]!r}."
+        _service, takes_id = OPERATIONS[key]
+        if takes_id and not operation.get("id"):
+            return "an 'id' is required."
+        if not isinstance(operation.get("body", {}), dict):
+            return "'body' must be an object."
+        return None
+
+    def run(self, workflow_id, operation):
+        """Run one operation through its service; return ``(status, result)``."""
+        factory, takes_id = OPERATIONS[(operation["type"], operation["op"])]
+        service = factory(self.context, self.request)
+        service.params = [workflow_id, operation["id"]] if takes_id else [workflow_id]
+
+        # Every operation must see what the previous ones changed.
+        self._clear_request_memos()
+        self.request.set("BODY", json.dumps(operation.get("body", {})))
+        self.request.response.setStatus(200)
+
+        result = service.reply()
+        status = self.request.response.getStatus()
+        if status == 204:
+            result = None
+        return status, result
+
+    def _clear_request_memos(self):
+        IAnnotations(self.request).pop(ViewMemo.key, None)
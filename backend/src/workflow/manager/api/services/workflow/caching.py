@@ -0,0 +1,140 @@
+"""Conditional GET support for the read services.
+
+ETags are derived from the definition revisions kept in
+``workflow.manager.revisions``. The ZODB serials of the objects a definition
+is stored in are mixed in as well: the workflow, its ``states``,
+``transitions``, ... containers and every item in them, each of which is
+a persistent object of its own. An import or ZMI edit that bypasses the
+manager therefore invalidates the ETags too. Listings also include the
+serials of ``portal_workflow``, which holds the type chains, and of
+``portal_types``.
+"""
+
+from Acquisition import aq_base
+from email.utils import formatdate
+from email.utils import parsedate_to_datetime
+from persistent import Persistent
+from Products.CMFCore.utils import getToolByName
+from workflow.manager import revisions
+
+import hashlib
+
+
+# The containers of a workflow definition.
+DEFINITION_CONTAINERS = ("states", "transitions", "variables", "worklists", "scripts")
+
+
+def _serial(obj):
+    obj._p_activate()
+    return obj._p_serial.hex() if obj._p_serial else ""
+
+
+def _own_serials(obj):
+    """The serials of ``obj`` and of the persistent objects it directly holds.
+
+    Guards, variable mappings and the containers of a workflow are stored
+    in records of their own.
+    """
+    obj = aq_base(obj)
+    serials = [_serial(obj)]
+    serials.extend(
+        _serial(value)
+        for value in vars(obj).values()
+        if isinstance(value, Persistent) and value._p_jar is not None
+    )
+    return serials
+
+
+def definition_serial(workflow):
+    """A digest of the serials of every object storing the workflow definition."""
+    serials = _own_serials(workflow)
+    for name in DEFINITION_CONTAINERS:
+        container = getattr(aq_base(workflow), name, None)
+        if container is None:
+            continue
+        for item in container.objectValues():
+            serials.extend(_own_serials(item))
+    return hashlib.sha1(
+        "|".join(serials).encode("utf-8"), usedforsecurity=False
+    ).hexdigest()
+
+
+def _etag(*parts):
+    data = "|".join(str(p) for p in parts).encode("utf-8")
+    digest = hashlib.sha1(data, usedforsecurity=False).hexdigest()
+    return f'"wm-{digest[:20]}"'
+
+
+def workflow_version(portal, workflow):
+    """``(revision, serial)`` identifying the current definition of a workflow."""
+    revision, _modified = revisions.workflow_revision(portal, workflow.getId())
+    return revision, definition_serial(workflow)
+
+
+def workflow_validators(portal, workflow, *variant):
+    """ETag and Last-Modified for a representation of a single workflow."""
+    revision, modified = revisions.workflow_revision(portal, workflow.getId())
+    return (
+        _etag(workflow.getId(), revision, definition_serial(workflow), *variant),
+        modified,
+    )
+
+
+def layout_validators(portal, workflow, layout_modified):
+    """ETag and Last-Modified for the layout of a workflow.
+
+    Positions not stored in the layout are generated from the definition,
+    so the validators change with either of them.
+    """
+    etag, modified = workflow_validators(portal, workflow, "layout", layout_modified)
+    return etag, max((m for m in (modified, layout_modified) if m), default=None)
+
+
+def listing_validators(portal, portal_workflow, *variant):
+    """ETag and Last-Modified for representations spanning all workflows.
+
+    Listings embed the types each workflow is assigned to, which follow the
+    chains and the types in ``portal_types`` as well as the definitions.
+    Those have no modification time of their own, so no Last-Modified is
+    given and clients revalidate with the ETag.
+    """
+    revision, _modified = revisions.global_revision(portal)
+    serials = _own_serials(portal_workflow)
+    serials.append(_serial(aq_base(getToolByName(portal, "portal_types"))))
+    serials.extend(
+        definition_serial(workflow)
+        for workflow in portal_workflow.objectValues()
+        if getattr(aq_base(workflow), "states", None) is not None
+    )
+    return _etag("*", revision, *serials, *variant), None
+
+
+def _matches(header, etag):
+    candidates = [c.strip() for c in header.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def not_modified(request, etag, last_modified=None):
+    """Set the validators on the response.
+
+    Returns True if the client's copy is current.
+    """
+    response = request.response
+    response.setHeader("ETag", etag)
+    response.setHeader("Cache-Control", "private, no-cache")
+    if last_modified:
+        response.setHeader("Last-Modified", formatdate(last_modified, usegmt=True))
+
+    if_none_match = request.getHeader("If-None-Match")
+    if if_none_match:
+        return _matches(if_none_match, etag)
+
+    if_modified_since = request.getHeader("If-Modified-Since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
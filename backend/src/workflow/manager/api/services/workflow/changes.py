@@ -0,0 +1,110 @@
+from workflow.manager import revisions
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.api.services.workflow.state import serialize_state
+from workflow.manager.api.services.workflow.transition import serialize_transition
+from workflow.manager.api.services.workflow.workflow import _serialize_workflow
+
+
+# What a changed workflow itself is serialized with; states and transitions
+# are reported individually.
+WORKFLOW_CHANGE_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "initial_state",
+    "assigned_types",
+)
+
+
+def _serialize_items(container, items, kind, serializer):
+    changed = {revisions.ADDED: [], revisions.MODIFIED: [], revisions.DELETED: []}
+    for (item_kind, item_id), action in sorted(items.items()):
+        if item_kind != kind:
+            continue
+        item = container.get(item_id) if container is not None else None
+        if action == revisions.DELETED or item is None:
+            changed[revisions.DELETED].append(item_id)
+        else:
+            changed[action].append(serializer(item))
+    return changed
+
+
+class WorkflowChanges(Service):
+    """Incremental sync of workflow definitions.
+
+    ``/@workflows-changes?since=<revision>`` returns the workflows whose
+    definitions changed after ``revision``, with only the states and
+    transitions that were added, modified or deleted (added workflows come
+    with their full definition). ``reset`` is true when the feed does not
+    reach back that far and clients must reload the full ``@workflows``
+    listing.
+    """
+
+    def reply(self):
+        try:
+            since = int(self.request.form.get("since", 0))
+        except (TypeError, ValueError):
+            since = -1
+        if since < 0:
+            self.request.response.setStatus(400)
+            return {"error": "'since' must be a non-negative revision number."}
+
+        base = Base(self.context, self.request)
+        revision, _modified = revisions.global_revision(base.portal)
+        changes = revisions.changes_since(base.portal, since)
+
+        if changes is None:
+            return {
+                "revision": revision,
+                "since": since,
+                "reset": True,
+                "workflows": [],
+            }
+
+        workflows = []
+        for workflow_id, entry in sorted(changes.items()):
+            items = entry["items"]
+            workflow = base.portal_workflow.get(workflow_id)
+            if (
+                workflow is None
+                or items.get((revisions.WORKFLOW, workflow_id)) == revisions.DELETED
+            ):
+                workflows.append({
+                    "id": workflow_id,
+                    "revision": entry["revision"],
+                    "action": revisions.DELETED,
+                })
+                continue
+
+            data = {
+                "id": workflow_id,
+                "revision": entry["revision"],
+                "action": items.get(
+                    (revisions.WORKFLOW, workflow_id), revisions.MODIFIED
+                ),
+                "states": _serialize_items(
+                    workflow.states, items, revisions.STATE, serialize_state
+                ),
+                "transitions": _serialize_items(
+                    workflow.transitions,
+                    items,
+                    revisions.TRANSITION,
+                    serialize_transition,
+                ),
+            }
+            if data["action"] == revisions.ADDED:
+                fields = (*WORKFLOW_CHANGE_FIELDS, "states", "transitions")
+                data["workflow"] = _serialize_workflow(workflow, base, fields)
+            elif (revisions.WORKFLOW, workflow_id) in items:
+                data["workflow"] = _serialize_workflow(
+                    workflow, base, WORKFLOW_CHANGE_FIELDS
+                )
+            workflows.append(data)
+
+        return {
+            "revision": revision,
+            "since": since,
+            "reset": False,
+            "workflows": workflows,
+        }
@@ -0,0 +1,69 @@
+from plone.restapi.deserializer import json_body
+from workflow.manager import definition
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+
+@implementer(IPublishTraverse)
+class WorkflowDiff(Service):
+    """Compare workflow definitions.
+
+    ``GET /@workflow-diff/{workflow_id}/{other_id}`` compares two workflows
+    of the site. ``POST /@workflow-diff/{workflow_id}`` compares a workflow
+    with the ``@workflow-export`` document in the body, e.g. one from
+    another site or the definition the editor is about to save. Changes are
+    reported from the first workflow to the second one (or the body).
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        if not base.selected_workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+        old = definition.serialize_definition(base.selected_workflow)
+
+        if self.request.method == "POST":
+            try:
+                new = json_body(self.request)
+            except Exception as e:
+                self.request.response.setStatus(400)
+                return {"error": f"Invalid JSON payload: {e!s}"}
+            error = definition.validate(new)
+            if error:
+                self.request.response.setStatus(400)
+                return {"error": error}
+            other_id = new["id"]
+        else:
+            if len(self.params) < 2:
+                self.request.response.setStatus(400)
+                return {
+                    "error": "Invalid URL format. Expected: "
+                    "/@workflow-diff/{workflow_id}/{other_id}"
+                }
+            other_id = self.params[1]
+            other = base.portal_workflow.get(other_id)
+            if other is None or getattr(other, "states", None) is None:
+                self.request.response.setStatus(404)
+                return {"error": f"Workflow '{other_id}' not found."}
+            new = definition.serialize_definition(other)
+
+        return {
+            "old": workflow_id,
+            "new": other_id,
+            **definition.diff_definitions(old, new),
+        }
@@ -0,0 +1,151 @@
+from plone.protect.interfaces import IDisableCSRFProtection
+from plone.restapi.deserializer import json_body
+from workflow.manager import _
+from workflow.manager import definition
+from workflow.manager import logger
+from workflow.manager import revisions
+from workflow.manager import rolemaps
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.api.services.workflow.workflow import _serialize_workflow
+from ZODB.POSException import ConflictError
+from ZPublisher.Iterators import filestream_iterator
+from zope.interface import alsoProvides
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+import os
+import tempfile
+import transaction
+
+
+# The export is sent in chunks of this many bytes.
+STREAM_BUFFER_SIZE = 64 * 1024
+
+IMPORT_SUMMARY_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "initial_state",
+    "state_count",
+    "transition_count",
+)
+
+
+@implementer(IPublishTraverse)
+class WorkflowExport(Service):
+    """Stream a workflow as JSON: ``/@workflow-export/{workflow_id}``.
+
+    The export is written to a temporary file while the request has the
+    database open, and the file is streamed as the response body. The
+    WSGI response would collect anything written to it in memory.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+        self.stream = None
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        if not base.selected_workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        response = self.request.response
+        response.setHeader("Content-Type", "application/json")
+        response.setHeader(
+            "Content-Disposition", f'attachment; filename="{workflow_id}.json"'
+        )
+
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as export:
+            try:
+                for chunk in definition.export_workflow(base.selected_workflow):
+                    export.write(chunk.encode("utf-8"))
+                export.close()
+                self.stream = filestream_iterator(
+                    export.name, "rb", streamsize=STREAM_BUFFER_SIZE
+                )
+            finally:
+                # The open iterator keeps the file readable.
+                os.unlink(export.name)
+        response.setHeader("Content-Length", str(len(self.stream)))
+        return self.reply_no_content(status=200)
+
+    def render(self):
+        result = super().render()
+        return self.stream if self.stream is not None else result
+
+
+class WorkflowImport(Service):
+    """Create a workflow from a ``@workflow-export`` document.
+
+    POST the export to ``/@workflow-import``. ``?id=<workflow_id>`` imports
+    it under another id; ``?overwrite=1`` replaces an existing workflow of
+    that id, keeping the types assigned to it. Everything is applied in one
+    transaction.
+    """
+
+    def reply(self):
+        alsoProvides(self.request, IDisableCSRFProtection)
+
+        try:
+            data = json_body(self.request)
+        except Exception as e:
+            self.request.response.setStatus(400)
+            return {"error": f"Invalid JSON payload: {e!s}"}
+
+        error = definition.validate(data)
+        if error:
+            self.request.response.setStatus(400)
+            return {"error": error}
+
+        form = self.request.form
+        workflow_id = form.get("id") or data["id"]
+        overwrite = form.get("overwrite") in ("1", "true", "True")
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        existing = base.selected_workflow
+
+        if existing is not None and not overwrite:
+            self.request.response.setStatus(409)
+            return {"error": f"Workflow '{workflow_id}' already exists."}
+
+        savepoint = transaction.savepoint()
+        try:
+            if existing is not None:
+                base.actions.delete_rules_for_workflow(existing)
+                base.portal_workflow.manage_delObjects([workflow_id])
+                rolemaps.clear(base.portal, workflow_id)
+            workflow, warnings = definition.import_workflow(
+                base.portal, data, workflow_id
+            )
+        except ConflictError:
+            raise
+        except Exception as e:
+            logger.exception(f"Import of workflow '{workflow_id}' failed")
+            savepoint.rollback()
+            self.request.response.setStatus(400)
+            return {"error": f"Import failed: {e!s}"}
+
+        if existing is not None:
+            # Content keeps its role mappings until they are updated.
+            rolemaps.mark_stale(base.portal, workflow_id, *workflow.states.objectIds())
+        # Also for a replaced workflow: clients reload it as a whole.
+        base.bump_revision((revisions.WORKFLOW, workflow_id, revisions.ADDED))
+
+        self.request.response.setStatus(200 if existing is not None else 201)
+        return {
+            "status": "success",
+            "workflow": _serialize_workflow(workflow, base, IMPORT_SUMMARY_FIELDS),
+            "warnings": warnings,
+            "message": _("Workflow imported successfully"),
+        }
@@ -0,0 +1,93 @@
+from plone.memoize import ram
+from Products.CMFCore.utils import getToolByName
+from workflow.manager import instrumentation
+from workflow.manager.api.services.workflow.service import Service
+from zope.component.hooks import getSite
+
+import time
+
+
+# Group enumeration can hit LDAP/AD; results are shared between requests
+# for this many seconds.
+GROUPS_CACHE_TTL = 60
+DEFAULT_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 500
+
+
+def _search_groups_cache_key(method, site_path, query):
+    return (site_path, query, time.time() // GROUPS_CACHE_TTL)
+
+
+@ram.cache(_search_groups_cache_key)
+def _search_groups(site_path, query):
+    acl_users = getToolByName(getSite(), "acl_users")
+    # PAS plugins match either the id or the title, never both in one call.
+    searches = ({"id": query}, {"title": query}) if query else ({},)
+    found = {}
+    with instrumentation.phase("groups"):
+        for criteria in searches:
+            for info in acl_users.searchGroups(**criteria):
+                group_id = info.get("groupid") or info.get("id")
+                if group_id and group_id not in found:
+                    found[group_id] = {
+                        "id": group_id,
+                        "title": info.get("title") or group_id,
+                    }
+    return sorted(found.values(), key=lambda g: (g["title"].lower(), g["id"]))
+
+
+def search_groups(query=""):
+    """Return ``{"id", "title"}`` of the groups matching ``query``, sorted by title."""
+    site_path = "/".join(getSite().getPhysicalPath())
+    return _search_groups(site_path, query.strip())
+
+
+def get_groups_by_id(group_ids):
+    """Return ``{"id", "title"}`` of the given groups, skipping unknown ids."""
+    acl_users = getToolByName(getSite(), "acl_users")
+    groups = []
+    for group_id in group_ids:
+        group = acl_users.getGroupById(group_id)
+        if group is not None:
+            groups.append({
+                "id": group_id,
+                "title": group.getProperty("title") or group_id,
+            })
+    return sorted(groups, key=lambda g: (g["title"].lower(), g["id"]))
+
+
+class WorkflowGroups(Service):
+    """Searchable, batched group source for the guard and group role editors.
+
+    ``/@workflow-groups?q=<text>&b_start=0&b_size=50`` matches ``q`` against
+    group ids and titles; ``ids=<id>&ids=<id>`` resolves the titles of
+    specific groups, e.g. the ones already selected in an editor.
+    """
+
+    def reply(self):
+        form = self.request.form
+        try:
+            b_start = max(int(form.get("b_start", 0)), 0)
+            b_size = min(
+                max(int(form.get("b_size", DEFAULT_BATCH_SIZE)), 1), MAX_BATCH_SIZE
+            )
+        except (TypeError, ValueError):
+            self.request.response.setStatus(400)
+            return {"error": "'b_start' and 'b_size' must be integers."}
+
+        ids = form.get("ids")
+        if ids:
+            if isinstance(ids, str):
+                ids = ids.split(",")
+            groups = get_groups_by_id(
+                dict.fromkeys(i.strip() for i in ids if i.strip())
+            )
+        else:
+            groups = search_groups(form.get("q", ""))
+
+        return {
+            "items": groups[b_start : b_start + b_size],
+            "items_total": len(groups),
+            "b_start": b_start,
+            "b_size": b_size,
+        }
@@ -0,0 +1,370 @@
+from DateTime import DateTime
+from plone.restapi.deserializer import json_body
+from workflow.manager import jobs
+from workflow.manager import rolemaps
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.utils import get_types_for_workflow
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+import json
+
+
+OPERATIONS = ("delete-state", "edit-state", "assign")
+# The permission whose roles end up in the allowedRolesAndUsers index.
+VIEW_PERMISSION = "View"
+DEFAULT_SAMPLE_SIZE = 20
+
+
+def count_objects(catalog, **query):
+    """Number of catalog entries matching ``query``.
+
+    The length of a lazy result is computed from the index result set, so no
+    brain (let alone object) is loaded.
+    """
+    return len(catalog.unrestrictedSearchResults(**query))
+
+
+def count_by_state(catalog, types, state_ids, **query):
+    """Return ``{state_id: count}`` for content of ``types`` (matching ``query``)."""
+    if not types:
+        return dict.fromkeys(state_ids, 0)
+    return {
+        state_id: count_objects(
+            catalog, portal_type=types, review_state=state_id, **query
+        )
+        for state_id in state_ids
+    }
+
+
+def _grants(mapping):
+    """``{(key, role)}`` of a permission or group role map."""
+    return {
+        (key, role) for key, roles in (mapping or {}).items() for role in roles or ()
+    }
+
+
+def _view_tokens(permission_roles, group_roles):
+    """allowedRolesAndUsers tokens granted by a state's role maps."""
+    view_roles = set((permission_roles or {}).get(VIEW_PERMISSION) or ())
+    tokens = set(view_roles)
+    tokens.update(
+        f"user:{group_id}"
+        for group_id, roles in (group_roles or {}).items()
+        if view_roles.intersection(roles or ())
+    )
+    return tokens
+
+
+def permission_diff(base, state, change, sample_size=DEFAULT_SAMPLE_SIZE):
+    """What changing the role maps of ``state`` to ``change`` would do.
+
+    Nothing is changed.
+
+    ``change`` may hold ``permission_roles`` and ``group_roles``, as sent to
+    ``EditState``; missing keys are left as they are. Every object in the
+    state gets its role mappings rewritten; those whose allowedRolesAndUsers
+    would change also get their security reindexed. The latter are found by
+    comparing the View grants with the indexed values of the catalog
+    entries, so no object is loaded. Roles acquired from the parent are not
+    resolved.
+    """
+    old_permissions = dict(state.permission_roles or {})
+    old_groups = dict(state.group_roles or {})
+    new_permissions = change.get("permission_roles", old_permissions)
+    new_groups = change.get("group_roles", old_groups)
+
+    old_tokens = _view_tokens(old_permissions, old_groups)
+    new_tokens = _view_tokens(new_permissions, new_groups)
+    added_tokens = new_tokens - old_tokens
+    removed_tokens = old_tokens - new_tokens
+
+    result = {
+        "state_id": state.id,
+        "permissions": {
+            "added": sorted(_grants(new_permissions) - _grants(old_permissions)),
+            "removed": sorted(_grants(old_permissions) - _grants(new_permissions)),
+        },
+        "groups": {
+            "added": sorted(_grants(new_groups) - _grants(old_groups)),
+            "removed": sorted(_grants(old_groups) - _grants(new_groups)),
+        },
+        "objects": 0,
+        "security_reindex": 0,
+        "sample": [],
+    }
+    workflow = base.selected_workflow
+    types = get_types_for_workflow(base.portal_workflow, base.portal_types, workflow.id)
+    if not types:
+        return result
+
+    catalog = base.portal_catalog
+    brains = catalog.unrestrictedSearchResults(portal_type=types, review_state=state.id)
+    result["objects"] = len(brains)
+    if not (added_tokens or removed_tokens):
+        return result
+
+    index = catalog._catalog.getIndex("allowedRolesAndUsers")
+    for brain in brains:
+        entry = set(index.getEntryForObject(brain.getRID(), default=()) or ())
+        added = added_tokens - entry
+        removed = removed_tokens & entry
+        if not (added or removed):
+            continue
+        result["security_reindex"] += 1
+        if len(result["sample"]) < sample_size:
+            result["sample"].append({
+                "path": brain.getPath(),
+                "UID": brain.UID,
+                "added": sorted(added),
+                "removed": sorted(removed),
+            })
+    return result
+
+
+def sample_size(request):
+    """The ``sample`` request parameter, a non-negative int; None if invalid."""
+    try:
+        size = int(request.form.get("sample", DEFAULT_SAMPLE_SIZE))
+    except (TypeError, ValueError):
+        return None
+    return size if size >= 0 else None
+
+
+@implementer(IPublishTraverse)
+class WorkflowImpact(Service):
+    """How much content a change to a workflow would touch, from the catalog.
+
+    ``/@workflow-impact/{workflow_id}`` counts the objects in each state of
+    the workflow. An ``operation`` adds what a pending change would affect:
+
+    - ``?operation=delete-state&state_id=<id>``
+    - ``?operation=edit-state&state_id=<id>``
+    - ``?operation=assign&type_id=<portal type>``, optionally with the
+      ``state_map`` of the assignment as JSON: ``&state_map={"old": "new"}``
+
+    ``?older_than=<days>`` also counts, per state, the content that has been
+    in it for longer than that.
+
+    A POST of ``{"states": {state_id: {"permission_roles", "group_roles"}}}``
+    is a dry run of role map changes: for each state the grants added and
+    removed, the objects whose role mappings would be rewritten and a sample
+    (``?sample=<n>``) of those whose allowedRolesAndUsers would change.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+        if self.request.method == "POST":
+            return self.dry_run()
+
+        workflow_id = self.params[0]
+        form = self.request.form
+        base = Base(
+            self.context,
+            self.request,
+            workflow_id=workflow_id,
+            state_id=form.get("state_id"),
+        )
+        workflow = base.selected_workflow
+        if not workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        operation = form.get("operation")
+        if operation and operation not in OPERATIONS:
+            self.request.response.setStatus(400)
+            return {
+                "error": f"Unknown operation '{operation}'. "
+                f"Expected one of: {', '.join(OPERATIONS)}."
+            }
+
+        catalog = base.portal_catalog
+        types = get_types_for_workflow(
+            base.portal_workflow, base.portal_types, workflow_id
+        )
+        total = count_objects(catalog, portal_type=types) if types else 0
+        states = count_by_state(catalog, types, workflow.states.objectIds())
+        result = {
+            "workflow": workflow_id,
+            "types": types,
+            "total": total,
+            "states": states,
+            # Content whose review_state is not a state of this workflow,
+            # e.g. left over from a previous assignment.
+            "unknown_state": max(total - sum(states.values()), 0),
+        }
+        # States whose role maps changed since content was last updated, and
+        # how much content an incremental @update-security would touch.
+        stale = sorted(
+            s for s in rolemaps.stale_states(base.portal, workflow_id) if s in states
+        )
+        result["stale_states"] = stale
+        result["incremental_update"] = sum(states[s] for s in stale)
+
+        if form.get("older_than"):
+            older_than = self.older_than(base, types, form["older_than"])
+            if older_than is None:
+                self.request.response.setStatus(400)
+                return {"error": "'older_than' must be a number of days."}
+            result["older_than"] = older_than
+
+        if operation:
+            impact, error = self.operation_impact(base, operation, states)
+            if error:
+                self.request.response.setStatus(400)
+                return {"error": error}
+            result["impact"] = impact
+
+        return result
+
+    def operation_impact(self, base, operation, states):
+        """``(impact, error)`` of ``operation`` for the parameters of the request."""
+        form = self.request.form
+        if operation == "assign":
+            type_id = form.get("type_id")
+            if not type_id or type_id not in base.portal_types.objectIds():
+                return None, "A valid 'type_id' is required for 'assign'."
+            try:
+                state_map = json.loads(form.get("state_map") or "{}")
+            except ValueError:
+                state_map = None
+            if not isinstance(state_map, dict):
+                return None, "'state_map' must be a JSON object of state ids."
+            return self.assign_impact(base, type_id, state_map), None
+
+        state_id = form.get("state_id")
+        if not base.selected_state:
+            return None, (
+                f"A valid 'state_id' of workflow '{base.selected_workflow.id}' "
+                f"is required for '{operation}'."
+            )
+        return self.state_impact(base, operation, state_id, states[state_id]), None
+
+    def older_than(self, base, types, days):
+        """Content per state that entered it more than ``days`` ago.
+
+        None if ``days`` is not a number.
+        """
+        try:
+            days = float(days)
+        except ValueError:
+            return None
+        return count_by_state(
+            base.portal_catalog,
+            types,
+            base.selected_workflow.states.objectIds(),
+            review_state_since={"query": DateTime() - days, "range": "max"},
+        )
+
+    def state_impact(self, base, operation, state_id, in_state):
+        """Content in ``state_id`` gets new role mappings, or is remapped too."""
+        impact = {"state_id": state_id, "role_mappings": in_state}
+        if operation == "delete-state":
+            impact["remap"] = in_state
+            impact["replacement_required"] = any(
+                getattr(t, "new_state_id", None) == state_id
+                for t in base.available_transitions
+            )
+        return impact
+
+    def assign_impact(self, base, type_id, state_map=None):
+        """Content of ``type_id`` changes workflow, as the assign-workflow job does it.
+
+        Content keeps its state if the workflow has one of the same id, or
+        moves to the state ``state_map`` maps it to. Only the rest (``remap``)
+        falls back to the initial state.
+        """
+        state_map = state_map or {}
+        workflow = base.selected_workflow
+        catalog = base.portal_catalog
+        current_chain = base.portal_workflow.getChainForPortalType(type_id)
+        impact = {
+            "type_id": type_id,
+            "current_chain": list(current_chain),
+            "initial_state": workflow.initial_state,
+            "objects": 0,
+            "role_mappings": 0,
+            "kept": 0,
+            "mapped": 0,
+            "remap": 0,
+            "current_states": {},
+            "new_states": {},
+        }
+        if tuple(current_chain) == (workflow.id,):
+            return impact
+
+        objects = count_objects(catalog, portal_type=type_id)
+        current_states = {
+            state_id: count
+            for state_id, count in count_by_state(
+                catalog, [type_id], catalog.uniqueValuesFor("review_state")
+            ).items()
+            if count
+        }
+        impact.update({
+            "objects": objects,
+            "role_mappings": objects,
+            "current_states": current_states,
+        })
+        for old_state, count in current_states.items():
+            new_state = jobs.mapped_state(workflow, state_map, old_state)
+            if old_state in state_map:
+                impact["mapped"] += count
+            elif new_state == old_state:
+                impact["kept"] += count
+            else:
+                impact["remap"] += count
+            impact["new_states"][new_state] = (
+                impact["new_states"].get(new_state, 0) + count
+            )
+        return impact
+
+    def dry_run(self):
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        workflow = base.selected_workflow
+        if not workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        try:
+            body = json_body(self.request)
+        except Exception as e:
+            self.request.response.setStatus(400)
+            return {"error": f"Invalid JSON payload: {e!s}"}
+        changes = body.get("states") if isinstance(body, dict) else None
+        if not isinstance(changes, dict) or not all(
+            isinstance(c, dict) for c in changes.values()
+        ):
+            self.request.response.setStatus(400)
+            return {"error": "'states' must map state ids to role map changes."}
+        unknown = sorted(s for s in changes if s not in workflow.states.objectIds())
+        if unknown:
+            self.request.response.setStatus(400)
+            return {"error": f"Unknown states: {', '.join(unknown)}."}
+        size = sample_size(self.request)
+        if size is None:
+            self.request.response.setStatus(400)
+            return {"error": "'sample' must be a non-negative integer."}
+
+        states = [
+            permission_diff(base, workflow.states[state_id], change, size)
+            for state_id, change in sorted(changes.items())
+        ]
+        return {
+            "workflow": workflow_id,
+            "states": states,
+            "objects": sum(s["objects"] for s in states),
+            "security_reindex": sum(s["security_reindex"] for s in states),
+        }
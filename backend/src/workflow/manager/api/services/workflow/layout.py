@@ -1,20 +1,64 @@
-import json
 from plone import api
+from plone.memoize import ram
 from plone.restapi.deserializer import json_body
-from plone.restapi.services import Service
 from zope.interface import Interface
 from zope.interface import implementer
 from zope.component import adapter
 from zope.publisher.interfaces import IPublishTraverse
 from Products.CMFPlone.interfaces import IPloneSiteRoot
+from workflow.manager.api.services.workflow.caching import layout_validators
+from workflow.manager.api.services.workflow.caching import not_modified
+from workflow.manager.api.services.workflow.caching import workflow_version
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.graph import layered_layout
+from workflow.manager.graph import WorkflowGraph
+from workflow.manager.layouts import get_layout
+from workflow.manager.layouts import layout_modified
+from workflow.manager.layouts import patch_layout
+from workflow.manager.layouts import set_layout
+from zope.component.hooks import getSite
+
+
+def _generated_layout_key(method, site_path, workflow_id, version):
+    return (site_path, workflow_id, version)
+
+
+@ram.cache(_generated_layout_key)
+def _generated_layout(site_path, workflow_id, version):
+    workflow = api.portal.get_tool("portal_workflow")[workflow_id]
+    return layered_layout(WorkflowGraph(workflow))
+
+
+def generated_layout(workflow):
+    """Layered node positions of ``workflow``, computed once per definition revision."""
+    portal = getSite()
+    site_path = "/".join(portal.getPhysicalPath())
+    nodes = _generated_layout(
+        site_path, workflow.getId(), workflow_version(portal, workflow)
+    )
+    # The cached positions are shared between requests.
+    return {state_id: dict(position) for state_id, position in nodes.items()}
+
+
+def _layout_error(layout, patch=False):
+    """An error message if ``layout`` is not a layout (or a patch of one)."""
+    if not isinstance(layout, dict):
+        return f"The layout{' patch' if patch else ''} must be a JSON object."
+    nodes = layout.get("nodes")
+    if nodes is None:
+        return None
+    if not isinstance(nodes, dict) or not all(
+        isinstance(position, dict) or (patch and position is None)
+        for position in nodes.values()
+    ):
+        return "'nodes' must map state ids to positions."
+    return None
 
 
 @implementer(IPublishTraverse)
 @adapter(IPloneSiteRoot, Interface)
 class WorkflowLayout(Service):
 
-    REGISTRY_KEY = "workflow.manager.layouts"
-
     def __init__(self, context, request):
         super().__init__(context, request)
         self.params = []
@@ -23,23 +67,43 @@ class WorkflowLayout(Service):
         self.params.append(name)
         return self
 
+    def reply(self):
+        if self.request.method == "POST":
+            return self.post()
+        if self.request.method == "PATCH":
+            return self.patch()
+        return self.get()
+
     def get(self):
         if not self.params:
             self.request.response.setStatus(400)
             return {"error": "Workflow ID must be provided in the URL."}
 
         workflow_id = self.params[0]
-        all_layouts = self._get_all_layouts_from_registry()
-        layout_json_string = all_layouts.get(workflow_id, '{}')
+        workflow = api.portal.get_tool("portal_workflow").get(workflow_id)
+        if workflow is not None:
+            validators = layout_validators(
+                api.portal.get(), workflow, layout_modified(workflow_id)
+            )
+            if not_modified(self.request, *validators):
+                return self.reply_no_content(status=304)
 
-        try:
-            layout_data = json.loads(layout_json_string)
-        except json.JSONDecodeError:
-            layout_data = {}
+        layout = get_layout(workflow_id)
+        generated = False
+        if workflow is not None:
+            # States without a stored position (all of them if nothing was
+            # saved yet) are placed by the layered layout.
+            nodes = layout.get("nodes") or {}
+            missing = [s for s in workflow.states.objectIds() if s not in nodes]
+            if missing:
+                positions = generated_layout(workflow)
+                layout["nodes"] = dict(nodes, **{s: positions[s] for s in missing})
+                generated = True
 
         return {
             "workflow_id": workflow_id,
-            "layout": layout_data
+            "layout": layout,
+            "generated": generated,
         }
 
     def post(self):
@@ -48,12 +112,13 @@ class WorkflowLayout(Service):
             return {"error": "Workflow ID must be provided in the URL."}
 
         workflow_id = self.params[0]
-        all_layouts = self._get_all_layouts_from_registry()
-        new_layout_data = json_body(self.request)
-
-        all_layouts[workflow_id] = json.dumps(new_layout_data)
+        layout = json_body(self.request)
+        error = _layout_error(layout)
+        if error:
+            self.request.response.setStatus(400)
+            return {"error": error}
 
-        api.portal.set_registry_record(self.REGISTRY_KEY, all_layouts)
+        set_layout(workflow_id, layout)
 
         self.request.response.setStatus(200)
         return {
@@ -61,9 +126,18 @@ class WorkflowLayout(Service):
             "message": f"Layout for workflow '{workflow_id}' saved."
         }
 
-    def _get_all_layouts_from_registry(self):
-        try:
-            layouts = api.portal.get_registry_record(self.REGISTRY_KEY)
-            return layouts if isinstance(layouts, dict) else {}
-        except Exception:
-            return {}
\ No newline at end of file
+    def patch(self):
+        """Merge a partial layout (JSON merge patch), e.g. the nodes that were moved."""
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "Workflow ID must be provided in the URL."}
+
+        workflow_id = self.params[0]
+        changes = json_body(self.request)
+        error = _layout_error(changes, patch=True)
+        if error:
+            self.request.response.setStatus(400)
+            return {"error": error}
+
+        patch_layout(workflow_id, changes)
+        return self.reply_no_content()
@@ -0,0 +1,15 @@
+from plone.restapi.services import Service
+from workflow.manager import instrumentation
+
+
+class WorkflowManagerMetrics(Service):
+    """Totals of the measured workflow manager requests, in the Prometheus text format.
+
+    Empty unless instrumentation is enabled, see ``workflow.manager.instrumentation``.
+    """
+
+    def reply(self):
+        response = self.request.response
+        response.setHeader("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        response.write(instrumentation.registry.render().encode("utf-8"))
+        return self.reply_no_content(status=200)
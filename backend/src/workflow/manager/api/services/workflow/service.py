@@ -0,0 +1,33 @@
+from plone.restapi.services import Service as BaseService
+from workflow.manager import instrumentation
+
+
+class Service(BaseService):
+    """Base of the workflow manager services.
+
+    Requests are measured when instrumentation is enabled.
+    """
+
+    def render(self):
+        metrics = instrumentation.start(
+            self.request, type(self).__name__, getattr(self.context, "_p_jar", None)
+        )
+        if metrics is None:
+            return super().render()
+
+        reply = self.reply
+
+        def measured_reply():
+            with metrics.phase("reply"):
+                return reply()
+
+        self.reply = measured_reply
+        try:
+            with metrics.phase("render"):
+                return super().render()
+        finally:
+            del self.reply
+            # What rendering spends outside of reply is the JSON serialization.
+            render = metrics.phases.pop("render")
+            metrics.phases["serialize"] = render - metrics.phases.get("reply", 0.0)
+            metrics.finish(self.request.response)
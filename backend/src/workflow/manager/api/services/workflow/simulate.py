@@ -0,0 +1,266 @@
+from plone import api
+from plone.memoize import ram
+from Products.CMFCore.Expression import getEngine
+from Products.DCWorkflow.Expression import createExprContext
+from Products.DCWorkflow.Expression import StateChangeInfo
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.caching import workflow_version
+from workflow.manager.api.services.workflow.service import Service
+from zope.component.hooks import getSite
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+
+# Why a transition is not available; a cell lists the checks that failed.
+NOT_OFFERED = "not-offered"
+PERMISSION = "permission"
+ROLE = "role"
+GROUP = "group"
+EXPRESSION = "expression"
+
+
+def _split(value):
+    """A list request parameter, given repeated or comma separated."""
+    if not value:
+        return []
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [v.strip() for item in values for v in item.split(",") if v.strip()]
+
+
+def _compile_guards(workflow):
+    """``{transition_id: (permissions, roles, groups, expression)}`` of the guards.
+
+    Expressions are compiled TALES (None without an expression). Transitions
+    without a guard are left out.
+    """
+    engine = getEngine()
+    guards = {}
+    for transition in workflow.transitions.objectValues():
+        guard = transition.guard
+        if guard is None:
+            continue
+        expr = getattr(guard, "expr", None)
+        text = expr.text if expr is not None else ""
+        guards[transition.id] = (
+            frozenset(guard.permissions or ()),
+            frozenset(guard.roles or ()),
+            frozenset(guard.groups or ()),
+            engine.compile(text) if text else None,
+        )
+    return guards
+
+
+def _compiled_guards_key(method, site_path, workflow_id, version):
+    return (site_path, workflow_id, version)
+
+
+@ram.cache(_compiled_guards_key)
+def _compiled_guards(site_path, workflow_id, version):
+    return _compile_guards(api.portal.get_tool("portal_workflow")[workflow_id])
+
+
+def compiled_guards(workflow):
+    """The compiled guards of ``workflow``, compiled once per definition revision."""
+    portal = getSite()
+    site_path = "/".join(portal.getPhysicalPath())
+    return _compiled_guards(
+        site_path, workflow.getId(), workflow_version(portal, workflow)
+    )
+
+
+class Simulator:
+    """Evaluate the guards of a workflow for a principal with given roles and groups.
+
+    A state's permission and group role maps decide which permissions and
+    local roles the principal has in that state; permissions the workflow
+    does not manage, or also acquires, are taken from the site. As in Zope,
+    a permission granted to Anonymous is held by everyone and one granted to
+    Authenticated by every authenticated principal. Guard expressions need
+    content to be evaluated against: without ``obj`` they are not evaluated
+    and the transitions depending on them are reported as unknown (None).
+    """
+
+    def __init__(self, portal, workflow, roles, groups, obj=None):
+        self.portal = portal
+        self.workflow = workflow
+        self.roles = set(roles)
+        self.groups = set(groups)
+        self.obj = obj
+        self.guards = compiled_guards(workflow)
+        self._site_roles = {}
+        self._expressions = {}
+
+    def site_roles(self, permission):
+        if permission not in self._site_roles:
+            self._site_roles[permission] = {
+                r["name"]
+                for r in self.portal.rolesOfPermission(permission)
+                if r["selected"]
+            }
+        return self._site_roles[permission]
+
+    def roles_in(self, state):
+        """The principal's roles in ``state``, including local roles of its groups."""
+        roles = set(self.roles)
+        for group_id, group_roles in (state.group_roles or {}).items():
+            if group_id in self.groups:
+                roles.update(group_roles)
+        return roles
+
+    def permission_roles(self, state, permission):
+        state_roles = (state.permission_roles or {}).get(permission)
+        if state_roles is None:
+            return self.site_roles(permission)
+        roles = set(state_roles)
+        # A list means the permission is also acquired.
+        if isinstance(state_roles, list):
+            roles |= self.site_roles(permission)
+        return roles
+
+    def has_permission(self, roles, state, permission):
+        allowed = self.permission_roles(state, permission)
+        if "Anonymous" in allowed:
+            return True
+        if "Authenticated" in allowed and "Authenticated" in self.roles:
+            return True
+        return bool(roles & allowed)
+
+    def expression(self, state, transition_id, compiled):
+        """The result of a guard expression; None if it cannot be evaluated.
+
+        The expression sees ``obj`` as if it were in ``state``:
+        ``state_change.old_state`` and the status are those of the
+        simulated state, not of the state the object is actually in.
+        """
+        if self.obj is None:
+            return None
+        key = (state.id, transition_id)
+        if key not in self._expressions:
+            status = dict(
+                api.portal.get_tool("portal_workflow").getStatusOf(
+                    self.workflow.id, self.obj
+                )
+                or {}
+            )
+            status[self.workflow.state_var] = state.id
+            econtext = createExprContext(
+                StateChangeInfo(self.obj, self.workflow, status, old_state=state)
+            )
+            try:
+                self._expressions[key] = bool(compiled(econtext))
+            except Exception:
+                self._expressions[key] = None
+        return self._expressions[key]
+
+    def check(self, state, transition_id):
+        """``{"available": True/False/None, "failed": [checks]}`` of one cell."""
+        if transition_id not in (state.transitions or ()):
+            return {"available": False, "failed": [NOT_OFFERED]}
+        guard = self.guards.get(transition_id)
+        if guard is None:
+            return {"available": True, "failed": []}
+        roles = self.roles_in(state)
+        if self.workflow.manager_bypass and "Manager" in roles:
+            return {"available": True, "failed": []}
+
+        failed = self.failed_checks(state, roles, guard)
+        if failed:
+            return {"available": False, "failed": failed}
+        compiled = guard[3]
+        if compiled is not None:
+            result = self.expression(state, transition_id, compiled)
+            if result is None:
+                return {"available": None, "failed": []}
+            if not result:
+                return {"available": False, "failed": [EXPRESSION]}
+        return {"available": True, "failed": []}
+
+    def failed_checks(self, state, roles, guard):
+        """The permission, role and group checks of ``guard`` that fail."""
+        permissions, guard_roles, guard_groups, _compiled = guard
+        failed = []
+        if permissions and not any(
+            self.has_permission(roles, state, p) for p in permissions
+        ):
+            failed.append(PERMISSION)
+        if guard_roles and not roles & guard_roles:
+            failed.append(ROLE)
+        if guard_groups and not self.groups & guard_groups:
+            failed.append(GROUP)
+        return failed
+
+    def matrix(self):
+        transition_ids = sorted(self.workflow.transitions.objectIds())
+        return {
+            state.id: {t: self.check(state, t) for t in transition_ids}
+            for state in self.workflow.states.objectValues()
+        }
+
+
+@implementer(IPublishTraverse)
+class WorkflowSimulate(Service):
+    """Which transitions a principal could fire, from every state of a workflow.
+
+    ``/@workflow-simulate/{workflow_id}?roles=Editor,Reviewer&groups=staff``
+    evaluates every guard for a principal with those roles and groups;
+    ``?user=<id>`` takes them from an existing user instead. ``?path=`` names
+    content to evaluate guard expressions against. Returns a states x
+    transitions matrix of ``{"available", "failed"}`` cells.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        workflow = base.selected_workflow
+        if not workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        form = self.request.form
+        roles = _split(form.get("roles"))
+        groups = _split(form.get("groups"))
+        user_id = form.get("user")
+        if user_id:
+            user = api.user.get(userid=user_id)
+            if user is None:
+                self.request.response.setStatus(400)
+                return {"error": f"User '{user_id}' not found."}
+            roles = sorted(set(roles) | set(api.user.get_roles(user=user)))
+            groups = sorted(
+                set(groups) | {g.getId() for g in api.group.get_groups(user=user)}
+            )
+        if "Authenticated" not in roles and (user_id or roles or groups):
+            roles.append("Authenticated")
+        if not roles:
+            roles = ["Anonymous"]
+
+        obj = None
+        path = form.get("path")
+        if path:
+            obj = base.portal.unrestrictedTraverse(path.lstrip("/"), None)
+            if obj is None:
+                self.request.response.setStatus(400)
+                return {"error": f"No content found at '{path}'."}
+
+        simulator = Simulator(base.portal, workflow, roles, groups, obj)
+        return {
+            "workflow": workflow_id,
+            "roles": sorted(roles),
+            "groups": sorted(groups),
+            "path": path or None,
+            "states": list(workflow.states.objectIds()),
+            "transitions": sorted(workflow.transitions.objectIds()),
+            "matrix": simulator.matrix(),
+        }
@@ -3,10 +3,20 @@ from Products.CMFCore.interfaces._content import IWorkflowAware
 from plone.app.workflow.remap import remap_workflow
 from plone.protect.interfaces import IDisableCSRFProtection
 from plone.restapi.deserializer import json_body
-from plone.restapi.services import Service
 from workflow.manager import _
+from workflow.manager import instrumentation
+from workflow.manager import jobs
+from workflow.manager import revisions
+from workflow.manager import rolemaps
 from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.caching import not_modified
+from workflow.manager.api.services.workflow.caching import workflow_validators
+from workflow.manager.api.services.workflow.impact import permission_diff
+from workflow.manager.api.services.workflow.impact import sample_size
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.indexers.workflow_state import WORKFLOW_INDEXES
 from workflow.manager.utils import clone_state
+from workflow.manager.utils import objects_in_state
 from zope.interface import alsoProvides
 from zope.interface import implementer
 from zope.publisher.interfaces import IPublishTraverse
@@ -50,6 +60,51 @@ def serialize_state(state):
         'group_roles': group_roles
     }
 
+
+def _role_map(mapping, acquisition=True):
+    """``{key: (acquired, roles)}`` of a role map, to compare stored and sent maps.
+
+    Stored permission roles are tuples, or lists when the permission is also
+    acquired; roles sent as JSON are always lists. Group roles are not
+    acquired.
+    """
+    return {
+        key: (acquisition and isinstance(roles, list), sorted(roles or ()))
+        for key, roles in (mapping or {}).items()
+    }
+
+
+def _apply_role_maps(state, body):
+    """Set the role maps in ``body`` on ``state``; return True if they changed."""
+    changed = False
+    if 'permission_roles' in body:
+        changed |= _role_map(state.permission_roles) != _role_map(
+            body['permission_roles']
+        )
+        state.permission_roles = PersistentMapping(body['permission_roles'])
+    if 'group_roles' in body:
+        changed |= _role_map(state.group_roles, False) != _role_map(
+            body['group_roles'], False
+        )
+        state.group_roles = PersistentMapping(body['group_roles'])
+    return changed
+
+
+def _redirect_transitions(base, state_id, replacement_id):
+    """Point the transitions leading to ``state_id`` to ``replacement_id``.
+
+    Returns the changes to record.
+    """
+    changes = []
+    for transition in base.available_transitions:
+        if getattr(transition, 'new_state_id', None) == state_id:
+            transition.new_state_id = replacement_id
+            changes.append(
+                (revisions.TRANSITION, transition.id, revisions.MODIFIED)
+            )
+    return changes
+
+
 @implementer(IPublishTraverse)
 class EditState(Service):
     def __init__(self, context, request):
@@ -89,18 +144,23 @@ class EditState(Service):
         state = base.selected_state
         workflow = base.selected_workflow
 
+        if body.get('dry_run'):
+            return self.dry_run(base, state, body)
+
         if 'title' in body:
             state.title = body['title']
         if 'description' in body:
             state.description = body['description']
+        changes = [(revisions.STATE, state.id, revisions.MODIFIED)]
         if body.get('is_initial_state') is True:
             workflow.initial_state = state.id
+            changes.append((revisions.WORKFLOW, workflow.id, revisions.MODIFIED))
         if 'transitions' in body and isinstance(body['transitions'], list):
             state.transitions = tuple(body['transitions'])
-        if 'permission_roles' in body:
-            state.permission_roles = PersistentMapping(body['permission_roles'])
-        if 'group_roles' in body:
-            state.group_roles = PersistentMapping(body['group_roles'])
+        if _apply_role_maps(state, body):
+            rolemaps.mark_stale(base.portal, workflow.id, state.id)
+
+        base.bump_revision(*changes)
 
         return {
             "status": "success",
@@ -108,6 +168,17 @@ class EditState(Service):
             "message": _("State updated successfully")
         }
 
+    def dry_run(self, base, state, body):
+        """Report what the role map changes would do, change nothing."""
+        size = sample_size(self.request)
+        if size is None:
+            self.request.response.setStatus(400)
+            return {"error": "'sample' must be a non-negative integer."}
+        return {
+            "status": "dry-run",
+            "impact": permission_diff(base, state, body, size),
+        }
+
 
 @implementer(IPublishTraverse)
 class AddState(Service):
@@ -181,6 +252,7 @@ class AddState(Service):
                 clone_state(new_state, workflow.states[clone_from_id])
 
             workflow._p_changed = True
+            base.bump_revision((revisions.STATE, state_id, revisions.ADDED))
 
             self.request.response.setStatus(201)
             return {
@@ -225,39 +297,114 @@ class DeleteState(Service):
 
         workflow = base.selected_workflow
 
+        try:
+            body = json_body(self.request)
+        except Exception as e:
+            self.request.response.setStatus(400)
+            return {"error": f"Invalid JSON payload: {str(e)}"}
+
+        # The transitions of a state whose content is being remapped already
+        # lead elsewhere; deleting it now would strand that content.
+        job = self.pending_job(base, state_id)
+        if job is not None:
+            return self.still_remapping(base, job, body)
+
+        changes = [(revisions.STATE, state_id, revisions.DELETED)]
         is_using_state = any(
             getattr(t, 'new_state_id', None) == state_id
             for t in base.available_transitions
         )
 
         if is_using_state:
-            try:
-                body = json_body(self.request)
-            except Exception as e:
-                self.request.response.setStatus(400)
-                return {"error": f"Invalid JSON payload: {str(e)}"}
-
             replacement_id = body.get('replacement_state_id')
             if not replacement_id or replacement_id not in workflow.states.objectIds():
                 self.request.response.setStatus(400)
                 return {"error": "This state is a destination for one or more transitions. A valid 'replacement_state_id' is required in the request body."}
 
-            for transition in base.available_transitions:
-                if getattr(transition, 'new_state_id', None) == state_id:
-                    transition.new_state_id = replacement_id
+            if body.get('background'):
+                return self.start_job(base, state_id, replacement_id, body)
+
+            changes.extend(_redirect_transitions(base, state_id, replacement_id))
 
-            chains = base.portal_workflow.listChainOverrides()
+            with instrumentation.phase("chains"):
+                chains = base.portal_workflow.listChainOverrides()
             types_ids = [c[0] for c in chains if workflow_id in c[1]]
             if types_ids:
+                # remap_workflow only reindexes review_state and the security
+                # indexes; the time the content entered its state changes too.
+                remapped = list(
+                    objects_in_state(
+                        base.portal_workflow, base.portal_catalog, workflow, types_ids, state_id
+                    )
+                )
                 remap_workflow(self.context, types_ids, (workflow_id,), {state_id: replacement_id})
+                for obj in remapped:
+                    obj.reindexObject(idxs=WORKFLOW_INDEXES)
 
         workflow.states.deleteStates([state_id])
+        rolemaps.discard(base.portal, workflow_id, state_id)
+        base.bump_revision(*changes)
 
         return {
             "status": "success",
             "message": _("State deleted successfully")
         }
 
+    def pending_job(self, base, state_id):
+        """The unfinished job remapping the content of ``state_id``, if any."""
+        for job in jobs.find_jobs(
+            base.portal, kind="remap-state", workflow_id=base.selected_workflow.id
+        ):
+            if not job.is_finished and job.params["state_id"] == state_id:
+                return job
+        return None
+
+    def still_remapping(self, base, job, body):
+        """Answer a delete of a state whose content ``job`` is still remapping."""
+        jobs.resume_if_stale(base.portal, job)
+        if body.get('background'):
+            return self.accepted(job)
+        self.request.response.setStatus(409)
+        return {
+            "error": (
+                f"The content of state '{job.params['state_id']}' "
+                "is still being remapped."
+            ),
+            "job": jobs.serialize_job(job),
+        }
+
+    def start_job(self, base, state_id, replacement_id, body):
+        """Retarget transitions now and remap content in the background.
+
+        The state is only deleted by the job once no content is left in it.
+        """
+        workflow = base.selected_workflow
+        batch_size = body.get('batch_size', base.job_batch_size)
+        if not isinstance(batch_size, int) or batch_size < 1:
+            self.request.response.setStatus(400)
+            return {"error": "'batch_size' must be a positive integer."}
+
+        base.bump_revision(*_redirect_transitions(base, state_id, replacement_id))
+
+        job = jobs.create_job(
+            base.portal,
+            "remap-state",
+            workflow.id,
+            params={"state_id": state_id, "replacement_id": replacement_id},
+            batch_size=batch_size,
+        )
+        return self.accepted(job)
+
+    def accepted(self, job):
+        self.request.response.setStatus(202)
+        return {
+            "status": "accepted",
+            "job": jobs.serialize_job(job),
+            "message": _(
+                "Content remapping started, the state will be deleted when it is done"
+            ),
+        }
+
 
 @implementer(IPublishTraverse)
 class ListStates(Service):
@@ -282,6 +429,10 @@ class ListStates(Service):
             self.request.response.setStatus(404)
             return {"error": f"Workflow '{workflow_id}' not found."}
 
+        validators = workflow_validators(base.portal, base.selected_workflow, "states")
+        if not_modified(self.request, *validators):
+            return self.reply_no_content(status=304)
+
         states = [serialize_state(state) for state in base.available_states]
 
         return {
@@ -3,9 +3,12 @@ from Products.DCWorkflow.Transitions import TRIGGER_AUTOMATIC, TRIGGER_USER_ACTI
 from Products.DCWorkflow.Expression import Expression
 from plone.protect.interfaces import IDisableCSRFProtection
 from plone.restapi.deserializer import json_body
-from plone.restapi.services import Service
 from workflow.manager import _
+from workflow.manager import revisions
 from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.caching import not_modified
+from workflow.manager.api.services.workflow.caching import workflow_validators
+from workflow.manager.api.services.workflow.service import Service
 from workflow.manager.utils import clone_transition
 from zope.interface import alsoProvides
 from zope.interface import implementer
@@ -54,6 +57,12 @@ class ListTransitions(Service):
             self.request.response.setStatus(404)
             return {"error": f"Workflow '{workflow_id}' not found."}
 
+        validators = workflow_validators(
+            base.portal, base.selected_workflow, "transitions"
+        )
+        if not_modified(self.request, *validators):
+            return self.reply_no_content(status=304)
+
         transitions = [serialize_transition(t) for t in base.available_transitions]
         return {
             "workflow_id": workflow_id,
@@ -93,6 +102,12 @@ class GetTransition(Service):
         transition = base.selected_transition
         workflow = base.selected_workflow
 
+        validators = workflow_validators(
+            base.portal, workflow, "transition", transition.id
+        )
+        if not_modified(self.request, *validators):
+            return self.reply_no_content(status=304)
+
         return {
             "workflow_id": workflow_id,
             "transition": serialize_transition(transition),
@@ -104,7 +119,6 @@ class GetTransition(Service):
             "guard_options": {
                 "permissions": base.allowed_guard_permissions,
                 "roles": list(workflow.getAvailableRoles()),
-                "groups": base.getGroups()
             }
         }
 
@@ -178,6 +192,7 @@ class AddTransition(Service):
             else:
                 new_transition.trigger_type = TRIGGER_USER_ACTION
 
+            changes = [(revisions.TRANSITION, transition_id, revisions.ADDED)]
             initial_states = body.get('initial_states', [])
             if initial_states:
                 for state in base.available_states:
@@ -186,8 +201,12 @@ class AddTransition(Service):
                         if transition_id not in current_transitions:
                             current_transitions.append(transition_id)
                             state.transitions = tuple(current_transitions)
+                            changes.append(
+                                (revisions.STATE, state.id, revisions.MODIFIED)
+                            )
 
             workflow._p_changed = True
+            base.bump_revision(*changes)
 
             self.request.response.setStatus(201)
             return {
@@ -280,6 +299,7 @@ class UpdateTransition(Service):
                     guard.expr = Expression('')
                 transition.guard = guard
 
+            changes = [(revisions.TRANSITION, transition_id, revisions.MODIFIED)]
             if 'states_with_this_transition' in body:
                 new_state_ids = set(body['states_with_this_transition'])
                 for state in base.available_states:
@@ -290,11 +310,14 @@ class UpdateTransition(Service):
                     if should_have_transition and not has_transition:
                         current_transitions.append(transition_id)
                         state.transitions = tuple(current_transitions)
+                        changes.append((revisions.STATE, state.id, revisions.MODIFIED))
                     elif not should_have_transition and has_transition:
                         current_transitions.remove(transition_id)
                         state.transitions = tuple(current_transitions)
+                        changes.append((revisions.STATE, state.id, revisions.MODIFIED))
 
             workflow._p_changed = True
+            base.bump_revision(*changes)
 
             return {
                 "status": "success",
@@ -341,15 +364,18 @@ class DeleteTransition(Service):
 
             base.actions.delete_rule_for(base.selected_transition)
 
+            changes = [(revisions.TRANSITION, transition_id, revisions.DELETED)]
             for state in base.available_states:
                 current_transitions = list(getattr(state, 'transitions', ()))
                 if transition_id in current_transitions:
                     current_transitions.remove(transition_id)
                     state.transitions = tuple(current_transitions)
+                    changes.append((revisions.STATE, state.id, revisions.MODIFIED))
 
             workflow.transitions.deleteTransitions([transition_id])
 
             workflow._p_changed = True
+            base.bump_revision(*changes)
 
             return {
                 "status": "success",
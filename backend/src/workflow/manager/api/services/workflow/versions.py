@@ -0,0 +1,179 @@
+from plone.protect.interfaces import IDisableCSRFProtection
+from plone.restapi.deserializer import json_body
+from workflow.manager import _
+from workflow.manager import history
+from workflow.manager import revisions
+from workflow.manager import rolemaps
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.service import Service
+from zope.interface import alsoProvides
+from zope.interface import implementer
+from zope.publisher.interfaces import IPublishTraverse
+
+
+def serialize_version(version, info):
+    return {
+        "version": version,
+        "time": info["time"],
+        "user": info["user"],
+        "comment": info["comment"],
+        "revision": info["revision"],
+        "changes": [
+            {"kind": kind, "id": item_id, "deleted": digest is None}
+            for (kind, item_id), digest in sorted(info["delta"].items())
+        ],
+    }
+
+
+@implementer(IPublishTraverse)
+class WorkflowHistory(Service):
+    """Saved versions of a workflow definition.
+
+    ``GET /@workflow-history/{workflow_id}`` lists the versions, newest
+    first; ``GET /@workflow-history/{workflow_id}/{version}`` returns the
+    definition at that version.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        if not base.selected_workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        workflow_history = history.get_history(base.portal, workflow_id)
+        versions = workflow_history.versions if workflow_history is not None else {}
+
+        if len(self.params) > 1:
+            try:
+                version = int(self.params[1])
+            except ValueError:
+                version = None
+            if version not in versions:
+                self.request.response.setStatus(404)
+                return {
+                    "error": f"Version '{self.params[1]}' of workflow "
+                    f"'{workflow_id}' not found."
+                }
+            return {
+                **serialize_version(version, versions[version]),
+                "definition": history.definition_at(workflow_history, version),
+            }
+
+        return {
+            "workflow": workflow_id,
+            "current": max(versions.keys()) if versions else None,
+            "items": [
+                serialize_version(version, versions[version])
+                for version in reversed(list(versions.keys()))
+            ],
+        }
+
+
+@implementer(IPublishTraverse)
+class SaveWorkflowHistory(Service):
+    """Snapshot or roll back a workflow.
+
+    POST ``/@workflow-history/{workflow_id}`` with ``{"comment": "..."}``
+    records the current definition as a version, e.g. before a risky
+    change; with ``{"rollback_to": <version>}`` the workflow is restored to
+    that version, which is saved as a new version itself. Content in states
+    the rollback removes must be moved to a state of that version with
+    ``"state_map": {removed_state: state}``; otherwise the rollback is
+    refused with 409.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        alsoProvides(self.request, IDisableCSRFProtection)
+
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+        workflow = base.selected_workflow
+        if not workflow:
+            self.request.response.setStatus(404)
+            return {"error": f"Workflow '{workflow_id}' not found."}
+
+        try:
+            body = json_body(self.request)
+        except Exception as e:
+            self.request.response.setStatus(400)
+            return {"error": f"Invalid JSON payload: {e!s}"}
+        comment = body.get("comment") or ""
+
+        if "rollback_to" not in body:
+            history.record(base.portal, workflow, comment=comment, full=True)
+            workflow_history = history.get_history(base.portal, workflow_id)
+            version = workflow_history.versions.maxKey()
+            self.request.response.setStatus(201)
+            return {
+                "status": "success",
+                **serialize_version(version, workflow_history.versions[version]),
+                "message": _("Workflow version saved"),
+            }
+
+        workflow_history = history.get_history(base.portal, workflow_id)
+        version = body["rollback_to"]
+        versions = workflow_history.versions if workflow_history is not None else {}
+        if not isinstance(version, int) or version not in versions:
+            self.request.response.setStatus(400)
+            return {"error": "'rollback_to' must be a version of this workflow."}
+        state_map = body.get("state_map") or {}
+        if not isinstance(state_map, dict):
+            self.request.response.setStatus(400)
+            return {"error": "'state_map' must map removed states to restored ones."}
+
+        try:
+            changes = history.rollback(base.portal, workflow, version, state_map)
+        except ValueError as e:
+            self.request.response.setStatus(409)
+            return {"error": str(e)}
+        if changes:
+            base.bump_revision(
+                *changes, comment=comment or f"Rollback to version {version}"
+            )
+            states = [
+                item_id for kind, item_id, _a in changes if kind == revisions.STATE
+            ]
+            deleted = [
+                item_id
+                for kind, item_id, action in changes
+                if kind == revisions.STATE and action == revisions.DELETED
+            ]
+            rolemaps.discard(base.portal, workflow_id, *deleted)
+            rolemaps.mark_stale(
+                base.portal, workflow_id, *[s for s in states if s not in deleted]
+            )
+
+        return {
+            "status": "success",
+            "version": version,
+            "changes": [
+                {"kind": kind, "id": item_id, "action": action}
+                for kind, item_id, action in changes
+            ],
+            "message": _("Workflow rolled back"),
+        }
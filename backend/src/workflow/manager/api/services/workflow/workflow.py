@@ -1,52 +1,130 @@
 from Products.CMFCore.interfaces._content import IWorkflowAware
+from Products.CMFCore.utils import getToolByName
+from plone.memoize import ram
 from plone.protect.interfaces import IDisableCSRFProtection
 from plone.restapi.deserializer import json_body
 from plone.restapi.interfaces import IExpandableElement
-from plone.restapi.services import Service
 from workflow.manager import _
+from workflow.manager import instrumentation
+from workflow.manager import jobs
+from workflow.manager import layouts
+from workflow.manager import revisions
+from workflow.manager import rolemaps
 from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.caching import listing_validators
+from workflow.manager.api.services.workflow.caching import not_modified
+from workflow.manager.api.services.workflow.caching import workflow_validators
+from workflow.manager.api.services.workflow.caching import workflow_version
+from workflow.manager.api.services.workflow.service import Service
+from workflow.manager.graph import WorkflowGraph
+from workflow.manager.permissions import managed_permissions
+from workflow.manager.utils import get_types_for_workflow
+from workflow.manager.utils import reindex_workflow_state
 from zope.component import adapter
+from zope.component.hooks import getSite
 from zope.interface import alsoProvides
 from zope.interface import implementer
 from zope.interface import Interface
 from zope.publisher.interfaces import IPublishTraverse
 
-def _serialize_workflow(workflow, base):
 
-    workflow_base = Base(base.context, base.request, workflow_id=workflow.id)
+def _serialize_states(workflow):
+    return [
+        {
+            "id": s.id,
+            "title": s.title,
+            "description": getattr(s, "description", ""),
+            "transitions": s.transitions
+        }
+        for s in workflow.states.objectValues()
+    ]
 
-    return {
-        "id": workflow.id,
-        "title": workflow.title or workflow.id,
-        "description": getattr(workflow, "description", ""),
-        "initial_state": workflow.initial_state,
-        "states": [
-            {
-                "id": s.id,
-                "title": s.title,
-                "description": getattr(s, "description", ""),
-                "transitions": s.transitions
-            }
-            for s in workflow.states.objectValues()
-        ],
-        "transitions": [
-            {
-                "id": t.id,
-                "title": t.title,
-                "description": getattr(t, "description", ""),
-                "new_state_id": t.new_state_id
-            }
-            for t in workflow.transitions.objectValues()
-        ],
-        "assigned_types": workflow_base._get_assigned_types_for(workflow.id),
-        "context_data": {
-            "assignable_types": workflow_base.get_assignable_types_for(workflow.id),
-            "managed_permissions": workflow_base.managed_permissions,
-            "available_roles": list(workflow.getAvailableRoles()),
-            "groups": workflow_base.getGroups()
+
+def _serialize_transitions(workflow):
+    return [
+        {
+            "id": t.id,
+            "title": t.title,
+            "description": getattr(t, "description", ""),
+            "new_state_id": t.new_state_id
         }
+        for t in workflow.transitions.objectValues()
+    ]
+
+
+def _serialize_context_data(workflow, base):
+    return {
+        "assignable_types": base.get_assignable_types_for(workflow.id),
+        "managed_permissions": managed_permissions(workflow.id),
+        "available_roles": base.available_roles,
+    }
+
+
+# Every field a workflow can be serialized with, computed only when selected.
+WORKFLOW_FIELDS = {
+    "id": lambda workflow, base: workflow.id,
+    "title": lambda workflow, base: workflow.title or workflow.id,
+    "description": lambda workflow, base: getattr(workflow, "description", ""),
+    "initial_state": lambda workflow, base: workflow.initial_state,
+    "states": lambda workflow, base: _serialize_states(workflow),
+    "transitions": lambda workflow, base: _serialize_transitions(workflow),
+    "state_count": lambda workflow, base: len(workflow.states.objectIds()),
+    "transition_count": lambda workflow, base: len(workflow.transitions.objectIds()),
+    "assigned_types": lambda workflow, base: base._get_assigned_types_for(workflow.id),
+    "managed_permissions": lambda workflow, base: managed_permissions(workflow.id),
+    "revision": lambda workflow, base: revisions.workflow_revision(
+        base.portal, workflow.id
+    )[0],
+    "context_data": _serialize_context_data,
+}
+
+DEFAULT_WORKFLOW_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "initial_state",
+    "states",
+    "transitions",
+    "assigned_types",
+    "context_data",
+)
+
+
+def _serialize_workflow(workflow, base, fields=DEFAULT_WORKFLOW_FIELDS):
+    """Serialize a workflow.
+
+    ``base`` is shared by all workflows of a listing: the chain index, type
+    vocabulary and roles it provides are computed once per request.
+    """
+    return {field: WORKFLOW_FIELDS[field](workflow, base) for field in fields}
+
+
+def _serialize_shared_context_data(base):
+    """Context data that is identical for every workflow of a listing."""
+    return {
+        "types": base.friendly_types,
+        "available_roles": base.available_roles,
     }
 
+
+def _requested_fields(request):
+    """Parse the ``fields`` parameter; None means it was not given."""
+    value = request.form.get("fields")
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = [f.strip() for f in value if f.strip()]
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def _requested_expansions(request):
+    value = request.form.get("expand") or ()
+    if isinstance(value, str):
+        value = value.split(",")
+    return {e.strip() for e in value if e.strip()}
+
+
 @implementer(IPublishTraverse)
 @adapter(IWorkflowAware, Interface)
 class GetWorkflows(Service):
@@ -59,6 +137,22 @@ class GetWorkflows(Service):
         return self
 
     def reply(self):
+        """Serialize one or all workflows.
+
+        ``fields`` (comma separated) restricts each workflow to the given
+        keys of ``WORKFLOW_FIELDS``, e.g. ``fields=title,assigned_types,state_count``
+        for a lightweight listing. ``expand=context_data`` adds the context
+        data shared by all workflows (types, roles) once at the top
+        level of the listing.
+        """
+        fields = _requested_fields(self.request)
+        unknown = set(fields or ()) - set(WORKFLOW_FIELDS)
+        if unknown:
+            self.request.response.setStatus(400)
+            return {"error": f"Unknown fields: {', '.join(sorted(unknown))}."}
+        expand = _requested_expansions(self.request)
+        query_string = self.request.get("QUERY_STRING", "")
+
         if self.params:
             workflow_id = self.params[0]
             base = Base(self.context, self.request, workflow_id=workflow_id)
@@ -68,18 +162,43 @@ class GetWorkflows(Service):
                 self.request.response.setStatus(404)
                 return {"error": f"Workflow '{workflow_id}' not found."}
 
-            return _serialize_workflow(workflow, base)
+            validators = workflow_validators(
+                base.portal, workflow, "workflow", query_string
+            )
+            if not_modified(self.request, *validators):
+                return self.reply_no_content(status=304)
+
+            return _serialize_workflow(
+                workflow, base, fields or DEFAULT_WORKFLOW_FIELDS
+            )
 
         else:
             base = Base(self.context, self.request)
             portal_workflow = base.portal_workflow
+
+            validators = listing_validators(
+                base.portal, portal_workflow, "workflows", query_string
+            )
+            if not_modified(self.request, *validators):
+                return self.reply_no_content(status=304)
+
             workflows = []
 
             for workflow_id in portal_workflow.listWorkflows():
                 workflow = portal_workflow.get(workflow_id)
-                workflows.append(_serialize_workflow(workflow, base))
-
-            return {"workflows": workflows}
+                workflows.append(
+                    _serialize_workflow(
+                        workflow, base, fields or DEFAULT_WORKFLOW_FIELDS
+                    )
+                )
+
+            result = {
+                "workflows": workflows,
+                "revision": revisions.global_revision(base.portal)[0],
+            }
+            if "context_data" in expand:
+                result["context_data"] = _serialize_shared_context_data(base)
+            return result
 
 
 @implementer(IExpandableElement)
@@ -104,6 +223,10 @@ class AddWorkflow(Service):
         new_workflow = base.portal_workflow[workflow_id]
         new_workflow.title = workflow_title
         base.portal_workflow._p_changed = True
+        base.bump_revision(
+            (revisions.WORKFLOW, new_workflow.id, revisions.ADDED),
+            workflow_id=new_workflow.id,
+        )
 
         self.request.response.setStatus(201)
         return {
@@ -143,10 +266,12 @@ class DeleteWorkflow(Service):
             self.request.response.setStatus(400)
             return {"error": f"Cannot delete workflow. It is still assigned to: {', '.join(assigned_types)}"}
 
-        for transition in base.available_transitions:
-            base.actions.delete_rule_for(transition)
+        base.actions.delete_rules_for_workflow(base.selected_workflow)
 
         base.portal_workflow.manage_delObjects([workflow_id])
+        rolemaps.clear(base.portal, workflow_id)
+        layouts.delete_layout(workflow_id)
+        base.bump_revision((revisions.WORKFLOW, workflow_id, revisions.DELETED))
         return self.reply_no_content()
 
 
@@ -185,6 +310,7 @@ class UpdateWorkflow(Service):
 
         if changed:
             workflow._p_changed = True
+            base.bump_revision()
 
         return _serialize_workflow(workflow, base)
 
@@ -214,15 +340,192 @@ class UpdateSecuritySettings(Service):
             self.request.response.setStatus(404)
             return {"error": f"Workflow '{workflow_id}' not found."}
 
-        count = base.portal_workflow._recursiveUpdateRoleMappings(
-            base.portal,
-            {base.selected_workflow.id: base.selected_workflow},
-        )
+        body = json_body(self.request) or {}
+        # Content in the states whose role maps changed since the last update.
+        snapshot = rolemaps.stale_states(base.portal, workflow_id)
+        if body.get("background") or "partitions" in body:
+            return self.start_job(base, body, snapshot)
+
+        with instrumentation.phase("rolemaps"):
+            if body.get("incremental"):
+                count = self.update_states(base, list(snapshot))
+            else:
+                count = base.portal_workflow._recursiveUpdateRoleMappings(
+                    base.portal,
+                    {base.selected_workflow.id: base.selected_workflow},
+                )
+        rolemaps.clear(base.portal, workflow_id, snapshot)
         return {
             "status": "success",
+            "states": sorted(snapshot) if body.get("incremental") else None,
             "message": _("msg_updated_objects", default=f"Updated {count} objects."),
         }
 
+    def update_states(self, base, state_ids):
+        """Update the role mappings of the content in ``state_ids``.
+
+        The content is found via the catalog.
+        """
+        workflow = base.selected_workflow
+        types = get_types_for_workflow(
+            base.portal_workflow, base.portal_types, workflow.id
+        )
+        if not types or not state_ids:
+            return 0
+        count = 0
+        for brain in base.portal_catalog.unrestrictedSearchResults(
+            portal_type=types, review_state=state_ids
+        ):
+            try:
+                obj = brain._unrestrictedGetObject()
+            except (AttributeError, KeyError):
+                continue
+            if workflow.id not in base.portal_workflow.getChainFor(obj):
+                continue
+            if workflow.updateRoleMappingsFor(obj):
+                obj.reindexObject(idxs=["allowedRolesAndUsers"])
+                count += 1
+        return count
+
+    def start_job(self, base, body, snapshot):
+        job = jobs.find_unfinished_job(
+            base.portal, "update-security", base.selected_workflow.id
+        )
+        if job is not None:
+            jobs.resume_if_stale(base.portal, job)
+        else:
+            batch_size = body.get("batch_size", base.job_batch_size)
+            if not isinstance(batch_size, int) or batch_size < 1:
+                self.request.response.setStatus(400)
+                return {"error": "'batch_size' must be a positive integer."}
+            partitions = body.get("partitions", 1)
+            if not isinstance(partitions, int) or not (
+                1 <= partitions <= jobs.MAX_PARTITIONS
+            ):
+                self.request.response.setStatus(400)
+                return {
+                    "error": "'partitions' must be an integer "
+                    f"from 1 to {jobs.MAX_PARTITIONS}."
+                }
+            workers = body.get("workers", jobs.DEFAULT_WORKERS)
+            if not isinstance(workers, int) or workers < 1:
+                self.request.response.setStatus(400)
+                return {"error": "'workers' must be a positive integer."}
+            params = {"snapshot": snapshot, "workers": workers}
+            if body.get("incremental"):
+                params["states"] = sorted(snapshot)
+            job = jobs.create_job(
+                base.portal,
+                "update-security",
+                base.selected_workflow.id,
+                params=params,
+                batch_size=batch_size,
+                partitions=partitions,
+            )
+
+        self.request.response.setStatus(202)
+        return {
+            "status": "accepted",
+            "job": jobs.serialize_job(job),
+            "message": _("Role mapping update started"),
+        }
+
+
+@implementer(IPublishTraverse)
+@adapter(IWorkflowAware, Interface)
+class UpdateSecurityStatus(Service):
+    """Progress of background role mapping updates.
+
+    ``/@update-security/{workflow_id}`` reports the most recent job of the
+    workflow, ``/@update-security/{workflow_id}/{job_id}`` a specific one.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+
+        if len(self.params) > 1:
+            job = jobs.get_job(base.portal, self.params[1])
+            if job is not None and job.workflow_id != workflow_id:
+                job = None
+        else:
+            found = jobs.find_jobs(
+                base.portal, kind="update-security", workflow_id=workflow_id
+            )
+            job = found[0] if found else None
+
+        if job is None:
+            self.request.response.setStatus(404)
+            return {
+                "error": "No role mapping update job found "
+                f"for workflow '{workflow_id}'."
+            }
+
+        jobs.resume_if_stale(base.portal, job)
+        return {
+            "job": jobs.serialize_job(job),
+            "stale_states": sorted(rolemaps.stale_states(base.portal, workflow_id)),
+        }
+
+
+@implementer(IPublishTraverse)
+@adapter(IWorkflowAware, Interface)
+class WorkflowJobs(Service):
+    """Background jobs of a workflow, e.g. content remaps of deleted states.
+
+    ``/@workflow-jobs/{workflow_id}`` lists the jobs of the workflow, most
+    recent first (``?kind=remap-state`` filters by kind);
+    ``/@workflow-jobs/{workflow_id}/{job_id}`` reports a single job.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def reply(self):
+        if not self.params:
+            self.request.response.setStatus(400)
+            return {"error": "No workflow ID provided in URL"}
+
+        workflow_id = self.params[0]
+        base = Base(self.context, self.request, workflow_id=workflow_id)
+
+        if len(self.params) > 1:
+            job = jobs.get_job(base.portal, self.params[1])
+            if job is None or job.workflow_id != workflow_id:
+                self.request.response.setStatus(404)
+                return {
+                    "error": f"Job '{self.params[1]}' not found "
+                    f"for workflow '{workflow_id}'."
+                }
+            jobs.resume_if_stale(base.portal, job)
+            return {"job": jobs.serialize_job(job)}
+
+        found = jobs.find_jobs(
+            base.portal,
+            kind=self.request.form.get("kind") or None,
+            workflow_id=workflow_id,
+        )
+        for job in found:
+            jobs.resume_if_stale(base.portal, job)
+        return {"items": [jobs.serialize_job(job) for job in found]}
+
 
 @implementer(IPublishTraverse)
 @adapter(IWorkflowAware, Interface)
@@ -250,12 +553,20 @@ class AssignWorkflow(Service):
         if not base.selected_workflow:
             self.request.response.setStatus(404)
             return {"error": f"Workflow '{workflow_id}' not found."}
+        if "types" in body:
+            return self.assign_many(base, body)
         if not type_id:
             self.request.response.setStatus(400)
             return {"error": "No content type ('type_id') specified."}
 
+        previous_chain = base.portal_workflow.getChainForPortalType(type_id)
         chain = (workflow_id,)
         base.portal_workflow.setChainForPortalTypes((type_id,), chain)
+        # The content keeps its workflow status; only the indexes derived
+        # from the chain are updated.
+        reindex_workflow_state(base.portal_catalog, [type_id])
+        for changed_id in set(previous_chain) | {workflow_id}:
+            base.bump_revision(workflow_id=changed_id)
 
         return {
             "status": "success",
@@ -264,6 +575,241 @@ class AssignWorkflow(Service):
             "message": _("Workflow assigned successfully"),
         }
 
+    def assign_many(self, base, body):
+        """Assign the workflow to several types and migrate their content in a job.
+
+        ``{"types": [...], "state_map": {old_state: new_state}}`` changes the
+        chains at once; existing content is moved to the mapped states by an
+        ``assign-workflow`` job, whose progress ``@workflow-jobs`` reports.
+        """
+        workflow = base.selected_workflow
+        types = body.get("types")
+        state_map = body.get("state_map") or {}
+        if not isinstance(types, list) or not types:
+            self.request.response.setStatus(400)
+            return {"error": "'types' must be a non-empty list of content types."}
+        unknown = sorted(t for t in types if t not in base.portal_types.objectIds())
+        if unknown:
+            self.request.response.setStatus(400)
+            return {"error": f"Unknown content types: {', '.join(unknown)}."}
+        if not isinstance(state_map, dict):
+            self.request.response.setStatus(400)
+            return {
+                "error": "'state_map' must map old state ids to states of the workflow."
+            }
+        invalid = sorted(
+            new
+            for new in set(state_map.values())
+            if new not in workflow.states.objectIds()
+        )
+        if invalid:
+            self.request.response.setStatus(400)
+            return {
+                "error": f"Not states of workflow '{workflow.id}': "
+                f"{', '.join(invalid)}."
+            }
+        batch_size = body.get("batch_size", base.job_batch_size)
+        if not isinstance(batch_size, int) or batch_size < 1:
+            self.request.response.setStatus(400)
+            return {"error": "'batch_size' must be a positive integer."}
+
+        running = jobs.find_unfinished_job(base.portal, "assign-workflow", workflow.id)
+        if running is not None:
+            jobs.resume_if_stale(base.portal, running)
+            self.request.response.setStatus(409)
+            return {
+                "error": f"Content is still being moved to workflow '{workflow.id}'.",
+                "job": jobs.serialize_job(running),
+            }
+
+        previous_chains = {
+            type_id: list(base.portal_workflow.getChainForPortalType(type_id))
+            for type_id in types
+        }
+        base.portal_workflow.setChainForPortalTypes(tuple(types), (workflow.id,))
+        changed = {workflow.id}
+        for chain in previous_chains.values():
+            changed.update(chain)
+        for changed_id in sorted(changed):
+            base.bump_revision(workflow_id=changed_id)
+
+        job = jobs.create_job(
+            base.portal,
+            "assign-workflow",
+            workflow.id,
+            params={
+                "types": list(types),
+                "state_map": dict(state_map),
+                "previous_chains": previous_chains,
+            },
+            batch_size=batch_size,
+        )
+        self.request.response.setStatus(202)
+        return {
+            "status": "accepted",
+            "workflow": workflow.id,
+            "types": list(types),
+            "job": jobs.serialize_job(job),
+            "message": _("Workflow assigned, moving existing content"),
+        }
+
+
+def _check_item(obj, error, **extra):
+    return {"id": obj.id, "title": obj.title, "error": error, **extra}
+
+
+def _state_errors(graph, states, reachable, initial_state_error):
+    errors = []
+    destinations = {t.new_state_id for t in graph.transitions.values()}
+    for state_id, state in states.items():
+        if state_id == graph.initial_state:
+            continue
+        if state_id not in destinations:
+            errors.append(
+                _check_item(state, "State is not reachable by any transition.")
+            )
+        elif not initial_state_error and state_id not in reachable:
+            errors.append(
+                _check_item(state, "State cannot be reached from the initial state.")
+            )
+
+    for state_id, transition_id in graph.unknown_transitions:
+        errors.append(
+            _check_item(
+                states[state_id],
+                f"State offers a non-existent transition: '{transition_id}'.",
+            )
+        )
+    return errors
+
+
+def _transition_errors(graph, states):
+    errors = []
+    transitions = graph.transitions
+    for transition in transitions.values():
+        # An empty destination means "remain in state".
+        if transition.new_state_id and transition.new_state_id not in states:
+            errors.append(
+                _check_item(
+                    transition,
+                    "Transition points to a non-existent state: "
+                    f"'{transition.new_state_id}'.",
+                )
+            )
+        if not graph.sources[transition.id]:
+            errors.append(
+                _check_item(transition, "Transition is not available from any state.")
+            )
+
+    for state_ids, transition_ids in graph.automatic_loops():
+        for transition_id in transition_ids:
+            errors.append(
+                _check_item(
+                    transitions[transition_id],
+                    "Unguarded automatic transition loops forever through states: "
+                    f"{', '.join(state_ids)}.",
+                )
+            )
+    return errors
+
+
+def _graph_warnings(graph, states, components):
+    warnings = []
+    for state_id in graph.dead_ends():
+        warnings.append(
+            _check_item(
+                states[state_id],
+                "Content in this state cannot leave it.",
+                type="dead_end",
+            )
+        )
+
+    for state_ids in graph.traps(components):
+        for state_id in state_ids:
+            warnings.append(
+                _check_item(
+                    states[state_id],
+                    f"Content entering the cycle {', '.join(state_ids)} "
+                    "can never leave it.",
+                    type="trap",
+                )
+            )
+
+    for state_id, transition_ids in graph.duplicate_transitions():
+        for transition_id in transition_ids:
+            others = ", ".join(t for t in transition_ids if t != transition_id)
+            warnings.append(
+                _check_item(
+                    graph.transitions[transition_id],
+                    f"Duplicates {others} from state '{state_id}': "
+                    "same destination, trigger and guard.",
+                    type="duplicate_transition",
+                )
+            )
+    return warnings
+
+
+def _sanity_check(workflow):
+    """Validate the state graph of ``workflow``.
+
+    Errors make the workflow unusable or put content in an inconsistent
+    state; warnings point at shapes that are legal but usually unintended.
+    """
+    graph = WorkflowGraph(workflow)
+    states = {s.id: s for s in workflow.states.objectValues()}
+    reachable = graph.reachable()
+    components = graph.strongly_connected_components()
+    initial_state_error = graph.initial_state not in states
+    return {
+        "errors": {
+            "state_errors": _state_errors(
+                graph, states, reachable, initial_state_error
+            ),
+            "transition_errors": _transition_errors(graph, states),
+            "initial_state_error": initial_state_error,
+        },
+        "warnings": _graph_warnings(graph, states, components),
+        "graph": {
+            "reachable": sorted(reachable),
+            "components": sorted(sorted(c) for c in components if len(c) > 1),
+        },
+    }
+
+
+def _cached_sanity_check_key(method, site_path, workflow_id, version):
+    return (site_path, workflow_id, version)
+
+
+@ram.cache(_cached_sanity_check_key)
+def _cached_sanity_check(site_path, workflow_id, version):
+    with instrumentation.phase("sanity-check"):
+        return _sanity_check(getToolByName(getSite(), "portal_workflow")[workflow_id])
+
+
+def cached_sanity_check(portal, workflow):
+    """``_sanity_check`` of ``workflow``, computed once per definition revision."""
+    site_path = "/".join(portal.getPhysicalPath())
+    return _cached_sanity_check(
+        site_path, workflow.getId(), workflow_version(portal, workflow)
+    )
+
+
+def _check_chains(base):
+    """Chains of portal types (and the default chain) naming missing workflows."""
+    existing = set(base.portal_workflow.objectIds())
+    missing = []
+    for type_id in base.portal_types.objectIds():
+        chain = base.portal_workflow.getChainForPortalType(type_id)
+        unknown = [w for w in chain if w not in existing]
+        if unknown:
+            missing.append({"type": type_id, "workflows": unknown})
+    return {
+        "missing_workflows": missing,
+        "default_chain_missing": [
+            w for w in base.portal_workflow.getDefaultChain() if w not in existing
+        ],
+    }
+
 
 @implementer(IPublishTraverse)
 @adapter(IWorkflowAware, Interface)
@@ -278,8 +824,7 @@ class SanityCheck(Service):
 
     def reply(self):
         if not self.params:
-            self.request.response.setStatus(400)
-            return {"error": "No workflow ID provided in URL"}
+            return self.check_site()
 
         workflow_id = self.params[0]
         base = Base(self.context, self.request, workflow_id=workflow_id)
@@ -289,57 +834,47 @@ class SanityCheck(Service):
             self.request.response.setStatus(404)
             return {"error": f"Workflow '{workflow_id}' not found."}
 
-        states = list(workflow.states.objectValues())
-        transitions = list(workflow.transitions.objectValues())
-        state_ids = [s.id for s in states]
-
-        errors = {
-            "state_errors": [],
-            "transition_errors": [],
-            "initial_state_error": False,
-        }
-
-        if not workflow.initial_state or workflow.initial_state not in state_ids:
-            errors["initial_state_error"] = True
-
-        all_destination_ids = {t.new_state_id for t in transitions}
-        for state in states:
-            if state.id != workflow.initial_state and state.id not in all_destination_ids:
-                errors["state_errors"].append({
-                    "id": state.id,
-                    "title": state.title,
-                    "error": "State is not reachable by any transition."
-                })
-
-        all_used_transition_ids = set()
-        for state in states:
-            for transition_id in getattr(state, 'transitions', ()):
-                all_used_transition_ids.add(transition_id)
-
-        for transition in transitions:
-            if not transition.new_state_id or transition.new_state_id not in state_ids:
-                errors["transition_errors"].append({
-                    "id": transition.id,
-                    "title": transition.title,
-                    "error": f"Transition points to a non-existent state: '{transition.new_state_id}'."
-                })
-
-            if transition.id not in all_used_transition_ids:
-                errors["transition_errors"].append({
-                    "id": transition.id,
-                    "title": transition.title,
-                    "error": "Transition is not available from any state."
-                })
-
-        has_errors = any([
-            errors["state_errors"],
-            errors["transition_errors"],
-            errors["initial_state_error"]
-        ])
+        result = cached_sanity_check(base.portal, workflow)
+        has_errors = any(result["errors"].values())
 
         return {
             "status": "success" if not has_errors else "error",
             "workflow": workflow.id,
-            "errors": errors,
+            "errors": result["errors"],
+            "warnings": result["warnings"],
+            "graph": result["graph"],
             "message": "Workflow validation complete.",
-        }
\ No newline at end of file
+        }
+
+    def check_site(self):
+        """Validate every workflow, the type chains and the manager's content rules."""
+        base = Base(self.context, self.request)
+        workflows = []
+        for workflow_id in base.portal_workflow.listWorkflows():
+            workflow = base.portal_workflow[workflow_id]
+            if getattr(workflow, 'states', None) is None:
+                # Not a DCWorkflow, there is no state graph to check.
+                continue
+            result = cached_sanity_check(base.portal, workflow)
+            workflows.append({
+                "workflow": workflow_id,
+                "status": "error" if any(result["errors"].values()) else "success",
+                "errors": result["errors"],
+                "warnings": result["warnings"],
+            })
+
+        chains = _check_chains(base)
+        orphaned_rules = base.actions.find_orphaned_rules(base.portal)
+        has_errors = (
+            any(w["status"] == "error" for w in workflows)
+            or chains["missing_workflows"]
+            or chains["default_chain_missing"]
+            or orphaned_rules
+        )
+        return {
+            "status": "error" if has_errors else "success",
+            "workflows": workflows,
+            "chains": chains,
+            "orphaned_rules": orphaned_rules,
+            "message": "Site validation complete.",
+        }
@@ -22,6 +22,17 @@ class IControlPanel(Interface):
         readonly=False,
     )
 
+    job_batch_size = schema.Int(
+        title=_("Background job batch size"),
+        description=_(
+            "Number of objects processed and committed per transaction by "
+            "background jobs such as the role mapping rebuild.",
+        ),
+        default=500,
+        min=1,
+        required=True,
+    )
+
 
 class ControlPanel(RegistryEditForm):
     schema = IControlPanel
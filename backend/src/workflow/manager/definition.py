@@ -0,0 +1,494 @@
+"""Portable JSON representation of workflow definitions.
+
+``export_workflow`` yields the JSON document in chunks, one state,
+transition or rule at a time, so exporting a large workflow never holds
+its whole representation in memory. ``import_workflow`` creates a workflow
+from such a document, and ``diff_definitions`` compares two of them.
+"""
+
+from AccessControl import getSecurityManager
+from persistent.mapping import PersistentMapping
+from plone.contentrules.rule.interfaces import IRuleAction
+from Products.CMFCore.utils import getToolByName
+from Products.DCWorkflow.DCWorkflow import DCWorkflowDefinition
+from Products.DCWorkflow.Expression import Expression
+from Products.DCWorkflow.Guard import Guard
+from workflow.manager.actionmanager import ActionManager
+from workflow.manager.layouts import get_layout
+from workflow.manager.layouts import set_layout
+from zope.component import queryUtility
+from zope.schema import getFieldsInOrder
+from zope.schema.interfaces import IList
+from zope.schema.interfaces import ISet
+from zope.schema.interfaces import ITuple
+
+import json
+
+
+FORMAT = "workflow.manager/1"
+
+# Scalar workflow attributes, in the order they are exported.
+WORKFLOW_ATTRIBUTES = ("id", "title", "description", "initial_state", "state_var")
+# Sections of an export listing items with an id.
+ITEM_SECTIONS = ("variables", "scripts", "states", "transitions")
+# The permission needed to create each importable type of script.
+SCRIPT_ADD_PERMISSIONS = {
+    "Script (Python)": "Add Python Scripts",
+    "External Method": "Add External Methods",
+}
+# Workflow-level fields compared by ``diff_definitions``; the id is what
+# two definitions are compared under, not a difference.
+DIFF_WORKFLOW_FIELDS = (
+    "title",
+    "description",
+    "initial_state",
+    "state_var",
+    "permissions",
+    "groups",
+)
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(
+        value, default=_json_default, separators=(",", ":"), sort_keys=True
+    )
+
+
+def _expression_text(expr):
+    return getattr(expr, "text", expr) or ""
+
+
+def serialize_guard(guard):
+    if guard is None:
+        return None
+    data = {
+        "permissions": list(guard.permissions or ()),
+        "roles": list(guard.roles or ()),
+        "groups": list(guard.groups or ()),
+        "expr": _expression_text(guard.expr),
+    }
+    return data if any(data.values()) else None
+
+
+def build_guard(data):
+    """Return a ``Guard`` for serialized guard ``data``, None if it checks nothing."""
+    if not data:
+        return None
+    guard = Guard()
+    changed = guard.changeFromProperties({
+        "guard_permissions": ";".join(data.get("permissions") or ()),
+        "guard_roles": ";".join(data.get("roles") or ()),
+        "guard_groups": ";".join(data.get("groups") or ()),
+        "guard_expr": data.get("expr") or "",
+    })
+    return guard if changed else None
+
+
+def serialize_state(state):
+    # DCWorkflow stores the roles of a permission as a list when the
+    # permission is also acquired and as a tuple when it is not.
+    permission_roles = {
+        permission: {"roles": sorted(roles), "acquired": isinstance(roles, list)}
+        for permission, roles in (state.permission_roles or {}).items()
+    }
+    return {
+        "id": state.id,
+        "title": state.title,
+        "description": state.description,
+        "transitions": list(state.transitions or ()),
+        "permission_roles": permission_roles,
+        "group_roles": {
+            group: sorted(roles) for group, roles in (state.group_roles or {}).items()
+        },
+        "var_values": dict(state.var_values or {}),
+    }
+
+
+def serialize_transition(transition):
+    return {
+        "id": transition.id,
+        "title": transition.title,
+        "description": transition.description,
+        "new_state_id": transition.new_state_id,
+        "trigger_type": transition.trigger_type,
+        "script_name": transition.script_name,
+        "after_script_name": transition.after_script_name,
+        "actbox_name": transition.actbox_name,
+        "actbox_url": transition.actbox_url,
+        "actbox_icon": getattr(transition, "actbox_icon", ""),
+        "actbox_category": transition.actbox_category,
+        "var_exprs": {
+            variable: _expression_text(expr)
+            for variable, expr in (transition.var_exprs or {}).items()
+        },
+        "guard": serialize_guard(transition.guard),
+    }
+
+
+def serialize_variable(variable):
+    return {
+        "id": variable.id,
+        "description": variable.description,
+        "default_value": variable.default_value,
+        "default_expr": _expression_text(variable.default_expr),
+        "for_catalog": bool(variable.for_catalog),
+        "for_status": bool(variable.for_status),
+        "update_always": bool(variable.update_always),
+        "info_guard": serialize_guard(variable.info_guard),
+    }
+
+
+def serialize_script(script):
+    data = {"id": script.getId(), "meta_type": script.meta_type}
+    if script.meta_type == "Script (Python)":
+        data.update(params=script.params(), body=script.body())
+    elif script.meta_type == "External Method":
+        data.update(module=script.module(), function=script.function())
+    return data
+
+
+def serialize_action(action):
+    element = queryUtility(IRuleAction, name=action.element)
+    data = {}
+    if element is not None and element.schema is not None:
+        data = {
+            name: getattr(action, name, None)
+            for name, _f in getFieldsInOrder(element.schema)
+        }
+    return {"type": action.element, "data": data}
+
+
+def serialize_workflow(workflow):
+    """Workflow-level attributes, without states, transitions and rules."""
+    data = {attr: getattr(workflow, attr, None) for attr in WORKFLOW_ATTRIBUTES}
+    data["permissions"] = list(workflow.permissions or ())
+    data["groups"] = list(getattr(workflow, "groups", None) or ())
+    return data
+
+
+def serialize_definition(workflow):
+    """The definition of ``workflow`` as one dict, without rules and layout."""
+    data = serialize_workflow(workflow)
+    data["variables"] = [
+        serialize_variable(v) for v in workflow.variables.objectValues()
+    ]
+    data["states"] = [serialize_state(s) for s in workflow.states.objectValues()]
+    data["transitions"] = [
+        serialize_transition(t) for t in workflow.transitions.objectValues()
+    ]
+    return data
+
+
+def export_workflow(workflow):
+    """Yield the JSON export of ``workflow`` as a sequence of strings."""
+    yield '{"format":' + _dumps(FORMAT)
+    for key, value in serialize_workflow(workflow).items():
+        yield f",{_dumps(key)}:{_dumps(value)}"
+
+    sections = (
+        ("variables", workflow.variables.objectValues(), serialize_variable),
+        ("scripts", workflow.scripts.objectValues(), serialize_script),
+        ("states", workflow.states.objectValues(), serialize_state),
+        ("transitions", workflow.transitions.objectValues(), serialize_transition),
+    )
+    for key, items, serializer in sections:
+        yield f",{_dumps(key)}:["
+        for index, item in enumerate(items):
+            yield ("," if index else "") + _dumps(serializer(item))
+        yield "]"
+
+    yield ',"rules":{'
+    rules = ActionManager().get_rules_for_workflow(workflow)
+    for index, (transition_id, rule) in enumerate(sorted(rules.items())):
+        actions = [serialize_action(action) for action in rule.actions]
+        yield ("," if index else "") + f"{_dumps(transition_id)}:{_dumps(actions)}"
+    yield "}"
+
+    yield f',"layout":{_dumps(get_layout(workflow.getId()))}}}'
+
+
+def _diff_fields(old, new):
+    """``{field: {"old", "new"}}`` of the differing fields of two dicts.
+
+    Mappings such as ``permission_roles`` are compared key by key, so only
+    the permissions (or groups, variables) that changed are reported.
+    """
+    changes = {}
+    for field in old.keys() | new.keys():
+        old_value, new_value = old.get(field), new.get(field)
+        if old_value == new_value:
+            continue
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changes[field] = {
+                key: {"old": old_value.get(key), "new": new_value.get(key)}
+                for key in old_value.keys() | new_value.keys()
+                if old_value.get(key) != new_value.get(key)
+            }
+        else:
+            changes[field] = {"old": old_value, "new": new_value}
+    return changes
+
+
+def _diff_items(old_items, new_items):
+    old_by_id = {item["id"]: item for item in old_items or ()}
+    new_by_id = {item["id"]: item for item in new_items or ()}
+    changed = {}
+    for item_id in old_by_id.keys() & new_by_id.keys():
+        fields = _diff_fields(old_by_id[item_id], new_by_id[item_id])
+        if fields:
+            changed[item_id] = fields
+    return {
+        "added": sorted(new_by_id.keys() - old_by_id.keys()),
+        "removed": sorted(old_by_id.keys() - new_by_id.keys()),
+        "changed": changed,
+    }
+
+
+def diff_definitions(old, new):
+    """Structured difference between two serialized definitions.
+
+    Items are matched by id with set operations, and only matched items are
+    compared field by field, so the cost grows linearly with the size of
+    the workflows.
+    """
+    result = {
+        "workflow": _diff_fields(
+            {field: old.get(field) for field in DIFF_WORKFLOW_FIELDS},
+            {field: new.get(field) for field in DIFF_WORKFLOW_FIELDS},
+        ),
+        "variables": _diff_items(old.get("variables"), new.get("variables")),
+        "states": _diff_items(old.get("states"), new.get("states")),
+        "transitions": _diff_items(old.get("transitions"), new.get("transitions")),
+    }
+    result["identical"] = not result["workflow"] and not any(
+        section["added"] or section["removed"] or section["changed"]
+        for section in (result["variables"], result["states"], result["transitions"])
+    )
+    return result
+
+
+def _script_error(script):
+    """An error message if ``script`` lacks the fields its type requires."""
+    if script.get("meta_type") == "External Method":
+        for field in ("module", "function"):
+            if not isinstance(script.get(field), str) or not script[field]:
+                return (
+                    f"Script '{script['id']}': '{field}' is required "
+                    "for an External Method."
+                )
+    elif script.get("meta_type") == "Script (Python)":
+        for field in ("params", "body"):
+            if not isinstance(script.get(field, ""), str):
+                return f"Script '{script['id']}': '{field}' must be a string."
+    return None
+
+
+def validate(data):
+    """Return an error message if ``data`` is not a workflow export, else None."""
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        return f"Not a workflow export, expected format '{FORMAT}'."
+    if not data.get("id"):
+        return "The export has no workflow id."
+    for section in ITEM_SECTIONS:
+        items = data.get(section, [])
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) and isinstance(item.get("id"), str) and item["id"]
+            for item in items
+        ):
+            return f"'{section}' must be a list of objects with an 'id'."
+    for script in data.get("scripts", ()):
+        error = _script_error(script)
+        if error:
+            return error
+    if not isinstance(data.get("rules") or {}, dict):
+        return "'rules' must map transition ids to lists of actions."
+    state_ids = {s["id"] for s in data.get("states", ())}
+    if data.get("initial_state") and data["initial_state"] not in state_ids:
+        return f"Initial state '{data['initial_state']}' is not defined."
+    return None
+
+
+def _field_value(field, value):
+    if value is None:
+        return value
+    if ISet.providedBy(field):
+        return set(value)
+    if ITuple.providedBy(field):
+        return tuple(value)
+    if IList.providedBy(field):
+        return list(value)
+    return value
+
+
+def _add_script(workflow, data):
+    """Create a script; return a warning if it cannot or may not be created.
+
+    Scripts are executable code: importing them takes the same permission
+    as adding them in the ZMI, which managing workflows does not imply.
+    """
+    meta_type = data.get("meta_type")
+    permission = SCRIPT_ADD_PERMISSIONS.get(meta_type)
+    if permission is not None and not getSecurityManager().checkPermission(
+        permission, workflow.scripts
+    ):
+        return (
+            f"Script '{data['id']}' was skipped: creating it requires "
+            f"the '{permission}' permission."
+        )
+    if meta_type == "Script (Python)":
+        from Products.PythonScripts.PythonScript import PythonScript
+
+        script = PythonScript(data["id"])
+        script.ZPythonScript_edit(data.get("params", ""), data.get("body", ""))
+    elif meta_type == "External Method":
+        from Products.ExternalMethod.ExternalMethod import ExternalMethod
+
+        script = ExternalMethod(data["id"], "", data["module"], data["function"])
+    else:
+        return f"Script '{data['id']}' of type '{meta_type}' cannot be imported."
+    workflow.scripts._setObject(data["id"], script)
+    return None
+
+
+def add_rule_actions(workflow, transition_id, actions):
+    """Create the content rule of a transition with serialized ``actions``.
+
+    Returns warnings about actions not available on this site.
+    """
+    rule = ActionManager().create(workflow.transitions[transition_id])
+    warnings = []
+    for action_data in actions:
+        element = queryUtility(IRuleAction, name=action_data.get("type"))
+        if element is None or element.factory is None:
+            warnings.append(
+                f"Action '{action_data.get('type')}' of transition '{transition_id}' "
+                "is not available on this site."
+            )
+            continue
+        action = element.factory()
+        fields = (
+            dict(getFieldsInOrder(element.schema)) if element.schema is not None else {}
+        )
+        for name, value in (action_data.get("data") or {}).items():
+            if name in fields:
+                setattr(action, name, _field_value(fields[name], value))
+        rule.actions.append(action)
+    return warnings
+
+
+def apply_workflow(workflow, item):
+    """Set the workflow-level attributes of ``workflow`` from serialized data."""
+    workflow.title = item.get("title") or ""
+    workflow.description = item.get("description") or ""
+    workflow.state_var = item.get("state_var") or "review_state"
+    workflow.permissions = tuple(item.get("permissions") or ())
+    workflow.groups = tuple(item.get("groups") or ())
+    if "initial_state" in item:
+        workflow.initial_state = item["initial_state"]
+
+
+def apply_variable(workflow, item):
+    """Create or update a variable of ``workflow`` from serialized data."""
+    if item["id"] not in workflow.variables.objectIds():
+        workflow.variables.addVariable(item["id"])
+    variable = workflow.variables[item["id"]]
+    variable.setProperties(
+        description=item.get("description", ""),
+        default_value=item.get("default_value", ""),
+        default_expr=item.get("default_expr", ""),
+        for_catalog=item.get("for_catalog", False),
+        for_status=item.get("for_status", False),
+        update_always=item.get("update_always", False),
+    )
+    variable.info_guard = build_guard(item.get("info_guard"))
+
+
+def apply_state(workflow, item):
+    """Create or update a state of ``workflow`` from serialized data."""
+    if item["id"] not in workflow.states.objectIds():
+        workflow.states.addState(item["id"])
+    state = workflow.states[item["id"]]
+    state.setProperties(
+        title=item.get("title", ""),
+        transitions=tuple(item.get("transitions", ())),
+        description=item.get("description", ""),
+    )
+    state.permission_roles = PersistentMapping()
+    for permission, info in (item.get("permission_roles") or {}).items():
+        state.setPermission(
+            permission, info.get("acquired", False), info.get("roles", ())
+        )
+    state.group_roles = PersistentMapping({
+        group: tuple(roles) for group, roles in (item.get("group_roles") or {}).items()
+    })
+    state.var_values = PersistentMapping(item.get("var_values") or {})
+
+
+def apply_transition(workflow, item):
+    """Create or update a transition of ``workflow`` from serialized data."""
+    if item["id"] not in workflow.transitions.objectIds():
+        workflow.transitions.addTransition(item["id"])
+    transition = workflow.transitions[item["id"]]
+    transition.setProperties(
+        title=item.get("title", ""),
+        new_state_id=item.get("new_state_id", ""),
+        trigger_type=item.get("trigger_type", 1),
+        script_name=item.get("script_name", ""),
+        after_script_name=item.get("after_script_name", ""),
+        actbox_name=item.get("actbox_name", ""),
+        actbox_url=item.get("actbox_url", ""),
+        actbox_category=item.get("actbox_category", "workflow"),
+        actbox_icon=item.get("actbox_icon", ""),
+        description=item.get("description", ""),
+    )
+    transition.guard = build_guard(item.get("guard"))
+    transition.var_exprs = PersistentMapping({
+        variable: Expression(text)
+        for variable, text in (item.get("var_exprs") or {}).items()
+        if text
+    })
+
+
+def import_workflow(portal, data, workflow_id=None):
+    """Create a workflow from an export; return ``(workflow, warnings)``.
+
+    The caller makes sure no workflow of that id exists and runs this in the
+    transaction it wants the import to be part of.
+    """
+    wtool = getToolByName(portal, "portal_workflow")
+    workflow_id = workflow_id or data["id"]
+    wtool._setObject(workflow_id, DCWorkflowDefinition(workflow_id))
+    workflow = wtool[workflow_id]
+    warnings = []
+
+    apply_workflow(workflow, {k: v for k, v in data.items() if k != "initial_state"})
+    for item in data.get("variables", ()):
+        apply_variable(workflow, item)
+    for item in data.get("scripts", ()):
+        warning = _add_script(workflow, item)
+        if warning:
+            warnings.append(warning)
+    for item in data.get("states", ()):
+        apply_state(workflow, item)
+    for item in data.get("transitions", ()):
+        apply_transition(workflow, item)
+    workflow.initial_state = data.get("initial_state")
+
+    for transition_id, actions in (data.get("rules") or {}).items():
+        if transition_id not in workflow.transitions.objectIds():
+            warnings.append(
+                f"Rule of unknown transition '{transition_id}' was skipped."
+            )
+            continue
+        warnings.extend(add_rule_actions(workflow, transition_id, actions))
+
+    if data.get("layout"):
+        set_layout(workflow_id, data["layout"])
+
+    return workflow, warnings
@@ -0,0 +1,343 @@
+"""Graph analysis of DCWorkflow definitions.
+
+States are nodes, and every transition available from a state adds an edge
+to the transition's destination. A transition without a destination
+("remain in state") is a self loop. The adjacency is built once; all checks
+run in time linear in the number of states and transitions.
+
+``layered_layout``, at the end of the module, places the states of a graph
+for the editor.
+"""
+
+from collections import deque
+from Products.DCWorkflow.Transitions import TRIGGER_AUTOMATIC
+
+
+def guard_signature(guard):
+    """Hashable summary of what a guard checks; ``None`` when it checks nothing."""
+    if guard is None:
+        return None
+    expr = getattr(guard, "expr", None)
+    signature = (
+        tuple(sorted(getattr(guard, "permissions", None) or ())),
+        tuple(sorted(getattr(guard, "roles", None) or ())),
+        tuple(sorted(getattr(guard, "groups", None) or ())),
+        expr.text if expr is not None else "",
+    )
+    return signature if any(signature) else None
+
+
+def _pop_component(stack, on_stack, root):
+    """Pop the strongly connected component of ``root`` off Tarjan's stack."""
+    component = []
+    while True:
+        member = stack.pop()
+        on_stack.discard(member)
+        component.append(member)
+        if member == root:
+            return component
+
+
+class WorkflowGraph:
+    def __init__(self, workflow):
+        self.initial_state = workflow.initial_state
+        self.state_ids = list(workflow.states.objectIds())
+        self.transitions = {t.id: t for t in workflow.transitions.objectValues()}
+        known = set(self.state_ids)
+
+        # state id -> [(transition id, destination state id)]
+        self.edges = {state_id: [] for state_id in self.state_ids}
+        # transition id -> states it is available from
+        self.sources = {transition_id: [] for transition_id in self.transitions}
+        self.unknown_transitions = []
+        for state in workflow.states.objectValues():
+            for transition_id in getattr(state, "transitions", None) or ():
+                transition = self.transitions.get(transition_id)
+                if transition is None:
+                    self.unknown_transitions.append((state.id, transition_id))
+                    continue
+                self.sources[transition_id].append(state.id)
+                destination = transition.new_state_id or state.id
+                if destination in known:
+                    self.edges[state.id].append((transition_id, destination))
+
+    def successors(self, state_id):
+        return [destination for _transition_id, destination in self.edges[state_id]]
+
+    def reachable(self):
+        """States reachable from the initial state, breadth first."""
+        if self.initial_state not in self.edges:
+            return set()
+        seen = {self.initial_state}
+        queue = deque([self.initial_state])
+        while queue:
+            for destination in self.successors(queue.popleft()):
+                if destination not in seen:
+                    seen.add(destination)
+                    queue.append(destination)
+        return seen
+
+    def strongly_connected_components(self, successors=None):
+        """Tarjan's algorithm.
+
+        Iterative, so deep workflows cannot hit the recursion limit.
+        """
+        successors = successors or self.successors
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.state_ids:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors(root)))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors(child))))
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        components.append(_pop_component(stack, on_stack, node))
+        return components
+
+    def _is_cycle(self, component, successors):
+        return len(component) > 1 or component[0] in successors(component[0])
+
+    def dead_ends(self):
+        """States content cannot leave, not even by a transition back to themselves."""
+        return [state_id for state_id in self.state_ids if not self.edges[state_id]]
+
+    def traps(self, components=None):
+        """Cycles that content can enter but never leave.
+
+        A cycle containing the initial state is the normal shape of most
+        workflows and is not reported.
+        """
+        components = components or self.strongly_connected_components()
+        traps = []
+        for component in components:
+            members = set(component)
+            if self.initial_state in members or not self._is_cycle(
+                component, self.successors
+            ):
+                continue
+            if all(d in members for s in component for d in self.successors(s)):
+                traps.append(sorted(component))
+        return traps
+
+    def duplicate_transitions(self):
+        """Groups of transitions between the same states with the same guard."""
+        duplicates = []
+        for state_id in self.state_ids:
+            seen = {}
+            for transition_id, destination in self.edges[state_id]:
+                transition = self.transitions[transition_id]
+                key = (
+                    destination,
+                    transition.trigger_type,
+                    guard_signature(transition.guard),
+                )
+                seen.setdefault(key, []).append(transition_id)
+            duplicates.extend(
+                (state_id, sorted(ids)) for ids in seen.values() if len(ids) > 1
+            )
+        return duplicates
+
+    def automatic_loops(self):
+        """Cycles of unguarded automatic transitions.
+
+        DCWorkflow keeps firing automatic transitions after every state
+        change, so content entering such a cycle never stops transitioning.
+        """
+        unguarded = {
+            state_id: [
+                (transition_id, destination)
+                for transition_id, destination in self.edges[state_id]
+                if self.transitions[transition_id].trigger_type == TRIGGER_AUTOMATIC
+                and guard_signature(self.transitions[transition_id].guard) is None
+            ]
+            for state_id in self.state_ids
+        }
+
+        def successors(state_id):
+            return [destination for _transition_id, destination in unguarded[state_id]]
+
+        loops = []
+        for component in self.strongly_connected_components(successors):
+            if not self._is_cycle(component, successors):
+                continue
+            members = set(component)
+            transition_ids = sorted({
+                transition_id
+                for state_id in component
+                for transition_id, destination in unguarded[state_id]
+                if destination in members
+            })
+            loops.append((sorted(component), transition_ids))
+        return loops
+
+
+# Layered layout of the graph, used for the positions of states without a
+# stored layout.
+
+# Distances between neighbouring states of a layer and between layers, in
+# the pixel units of the editor.
+NODE_SPACING = 250
+LAYER_SPACING = 150
+CROSSING_SWEEPS = 4
+
+
+def _back_edges(graph, order):
+    """The edges a depth-first search from the initial state follows backwards."""
+
+    def children(node):
+        return iter(sorted(set(graph.successors(node)), key=order.get))
+
+    roots = (
+        [graph.initial_state] if graph.initial_state in order else []
+    ) + graph.state_ids
+    visited, on_path, back_edges = set(), set(), set()
+    for root in roots:
+        if root in visited:
+            continue
+        visited.add(root)
+        on_path.add(root)
+        work = [(root, children(root))]
+        while work:
+            node, pending = work[-1]
+            for child in pending:
+                if child in on_path:
+                    back_edges.add((node, child))
+                elif child not in visited:
+                    visited.add(child)
+                    on_path.add(child)
+                    work.append((child, children(child)))
+                    break
+            else:
+                on_path.discard(node)
+                work.pop()
+    return back_edges
+
+
+def _longest_path_layers(graph, dag, order):
+    """``{state_id: layer}`` by longest path, in topological order."""
+    successors = {state_id: [] for state_id in graph.state_ids}
+    indegree = dict.fromkeys(graph.state_ids, 0)
+    for source, destination in sorted(dag, key=lambda e: (order[e[0]], order[e[1]])):
+        successors[source].append(destination)
+        indegree[destination] += 1
+    layer = dict.fromkeys(graph.state_ids, 0)
+    queue = deque(s for s in graph.state_ids if not indegree[s])
+    while queue:
+        node = queue.popleft()
+        for child in successors[node]:
+            layer[child] = max(layer[child], layer[node] + 1)
+            indegree[child] -= 1
+            if not indegree[child]:
+                queue.append(child)
+    return layer
+
+
+def _route_edges(graph, dag, order, layer):
+    """Layers with virtual nodes for edges spanning several of them.
+
+    Returns the layers and the nodes linked to each node from above and
+    from below.
+    """
+    layers = {}
+    for state_id in graph.state_ids:
+        layers.setdefault(layer[state_id], []).append(state_id)
+    up = {state_id: [] for state_id in graph.state_ids}
+    down = {state_id: [] for state_id in graph.state_ids}
+    for source, destination in sorted(dag, key=lambda e: (order[e[0]], order[e[1]])):
+        previous = source
+        for step in range(layer[source] + 1, layer[destination]):
+            virtual = ("virtual", source, destination, step)
+            layers.setdefault(step, []).append(virtual)
+            up[virtual], down[virtual] = [], []
+            down[previous].append(virtual)
+            up[virtual].append(previous)
+            previous = virtual
+        down[previous].append(destination)
+        up[destination].append(previous)
+    return layers, up, down
+
+
+def _by_barycenter(row, fixed_row, neighbours):
+    """``row`` ordered by the mean position of its neighbours in ``fixed_row``."""
+    fixed = {node: position for position, node in enumerate(fixed_row)}
+    current = {node: position for position, node in enumerate(row)}
+
+    def barycenter(node):
+        linked = [fixed[n] for n in neighbours[node] if n in fixed]
+        return (
+            sum(linked) / len(linked) if linked else current[node],
+            current[node],
+        )
+
+    return sorted(row, key=barycenter)
+
+
+def layered_layout(graph):
+    """Sugiyama-style layout: ``{state_id: {"x", "y"}}`` with layers top to bottom.
+
+    Cycles are broken by reversing the back edges of a depth-first search
+    from the initial state, layers are assigned by longest path, long edges
+    are routed through virtual nodes and the order within the layers is
+    improved with barycenter sweeps. Ties are broken by the order of the
+    states, so the result is deterministic.
+    """
+    order = {state_id: index for index, state_id in enumerate(graph.state_ids)}
+    edges = {
+        (source, destination)
+        for source in graph.state_ids
+        for destination in graph.successors(source)
+        if destination != source
+    }
+
+    back_edges = _back_edges(graph, order)
+    dag = {(d, s) if (s, d) in back_edges else (s, d) for s, d in edges}
+    layer = _longest_path_layers(graph, dag, order)
+    layers, up, down = _route_edges(graph, dag, order, layer)
+
+    # Reduce crossings.
+    depth = max(layers) + 1 if layers else 0
+    rows = [layers.get(i, []) for i in range(depth)]
+    for sweep in range(CROSSING_SWEEPS):
+        if sweep % 2 == 0:
+            for i in range(1, depth):
+                rows[i] = _by_barycenter(rows[i], rows[i - 1], up)
+        else:
+            for i in range(depth - 2, -1, -1):
+                rows[i] = _by_barycenter(rows[i], rows[i + 1], down)
+
+    positions = {}
+    widest = max((len(row) for row in rows), default=0)
+    for i, row in enumerate(rows):
+        offset = (widest - len(row)) * NODE_SPACING / 2
+        for position, node in enumerate(row):
+            if node in order:
+                positions[node] = {
+                    "x": offset + position * NODE_SPACING,
+                    "y": i * LAYER_SPACING,
+                }
+    return positions
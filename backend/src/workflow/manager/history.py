@@ -0,0 +1,370 @@
+"""Versioned snapshots of workflow definitions.
+
+Every save through the manager records a version of the workflow that was
+changed. Definitions are split into items (the workflow attributes, each
+variable, state and transition); an item's serialization is stored once,
+under the hash of its content, and shared by every version that contains
+it. A version stores only the items the save changed (its delta), plus,
+every ``KEYFRAME_INTERVAL`` versions, a keyframe mapping all items to their
+hashes, so the definition at any version is rebuilt from at most that many
+deltas. Rolling back only rewrites the items that differ.
+
+A transition's item includes the actions of its content rule, so rolling
+back restores the rule together with the transition.
+"""
+
+from BTrees.IOBTree import IOBTree
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from plone import api
+from Products.CMFCore.utils import getToolByName
+from workflow.manager import definition
+from workflow.manager import revisions
+from workflow.manager.actionmanager import ActionManager
+from workflow.manager.utils import get_types_for_workflow
+from workflow.manager.utils import objects_in_state
+from workflow.manager.utils import set_state
+from zope.annotation.interfaces import IAnnotations
+
+import hashlib
+import json
+import time
+
+
+ANNOTATION_KEY = "workflow.manager.history"
+KEYFRAME_INTERVAL = 50
+# Versions kept per workflow; older ones are dropped a keyframe at a time.
+MAX_VERSIONS = 500
+
+WORKFLOW = revisions.WORKFLOW
+VARIABLE = "variable"
+STATE = revisions.STATE
+TRANSITION = revisions.TRANSITION
+
+
+class WorkflowHistory(Persistent):
+    def __init__(self):
+        # content hash -> JSON of an item
+        self.items = OOBTree()
+        # version -> {"time", "user", "comment", "revision", "keyframe", "delta"}
+        self.versions = IOBTree()
+        # (kind, id) -> content hash of the item at the latest version
+        self.head = OOBTree()
+
+
+def _storage(portal, create=False):
+    annotations = IAnnotations(portal)
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None and create:
+        storage = annotations[ANNOTATION_KEY] = OOBTree()
+    return storage
+
+
+def get_history(portal, workflow_id):
+    storage = _storage(portal)
+    if storage is None:
+        return None
+    return storage.get(workflow_id)
+
+
+def forget(portal, workflow_id):
+    """Drop the history of a deleted workflow."""
+    storage = _storage(portal)
+    if storage is not None and workflow_id in storage:
+        del storage[workflow_id]
+
+
+def _item(workflow, kind, item_id):
+    """Serialize one item of a workflow; None if it does not exist."""
+    if kind == WORKFLOW:
+        data = definition.serialize_workflow(workflow)
+        data["id"] = item_id
+        return data
+    container, serializer = {
+        VARIABLE: (workflow.variables, definition.serialize_variable),
+        STATE: (workflow.states, definition.serialize_state),
+        TRANSITION: (workflow.transitions, definition.serialize_transition),
+    }[kind]
+    obj = container.get(item_id)
+    if obj is None:
+        return None
+    data = serializer(obj)
+    if kind == TRANSITION:
+        data["rule"] = _rule_actions(obj)
+    return data
+
+
+def _rule_actions(transition):
+    """The serialized actions of a transition's content rule; None without a rule."""
+    rule = ActionManager().get_rule(transition)
+    if rule is None:
+        return None
+    return [definition.serialize_action(action) for action in rule.actions]
+
+
+def _restore_rule(workflow, item):
+    """Give a restored transition the content rule it had in ``item``."""
+    if "rule" not in item:
+        # Recorded before rules were part of the history.
+        return
+    transition = workflow.transitions[item["id"]]
+    if _rule_actions(transition) == item["rule"]:
+        return
+    ActionManager().delete_rule_for(transition)
+    if item["rule"] is not None:
+        definition.add_rule_actions(workflow, item["id"], item["rule"])
+
+
+def _all_keys(workflow):
+    keys = [(WORKFLOW, workflow.getId())]
+    keys.extend((VARIABLE, i) for i in workflow.variables.objectIds())
+    keys.extend((STATE, i) for i in workflow.states.objectIds())
+    keys.extend((TRANSITION, i) for i in workflow.transitions.objectIds())
+    return keys
+
+
+def _store(history, data):
+    if data is None:
+        return None
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha1(encoded.encode("utf-8"), usedforsecurity=False).hexdigest()
+    if digest not in history.items:
+        history.items[digest] = encoded
+    return digest
+
+
+def _load(history, digest):
+    return json.loads(history.items[digest])
+
+
+def record(portal, workflow, changes=(), comment="", full=False):
+    """Record a version with the items ``changes`` touched; return its number.
+
+    ``changes`` are the ``(kind, item_id, action)`` tuples a save reports to
+    ``revisions.bump``. With ``full``, for an added (or replaced) workflow
+    and for the first version of a workflow, every item is compared
+    instead. Returns None if nothing changed.
+    """
+    storage = _storage(portal, create=True)
+    workflow_id = workflow.getId()
+    history = storage.get(workflow_id)
+    if history is None:
+        history = storage[workflow_id] = WorkflowHistory()
+        full = True
+    full = full or (WORKFLOW, workflow_id, revisions.ADDED) in changes
+
+    if full:
+        keys = set(_all_keys(workflow)) | set(history.head.keys())
+    else:
+        keys = {
+            (kind, workflow_id if kind == WORKFLOW else item_id)
+            for kind, item_id, _action in changes or ((WORKFLOW, workflow_id, None),)
+            if kind in (WORKFLOW, VARIABLE, STATE, TRANSITION)
+        }
+
+    delta = {}
+    for key in keys:
+        digest = _store(history, _item(workflow, *key))
+        if history.head.get(key) != digest:
+            delta[key] = digest
+    if not delta:
+        return None
+
+    for key, digest in delta.items():
+        if digest is None:
+            history.head.pop(key, None)
+        else:
+            history.head[key] = digest
+
+    version = history.versions.maxKey() + 1 if history.versions else 1
+    keyframe = version == 1 or version % KEYFRAME_INTERVAL == 0
+    user = api.user.get_current()
+    history.versions[version] = {
+        "time": time.time(),
+        "user": user.getId() if user is not None else None,
+        "comment": comment,
+        "revision": revisions.workflow_revision(portal, workflow_id)[0],
+        "delta": delta,
+        "keyframe": dict(history.head.items()) if keyframe else None,
+    }
+    _prune(history)
+    return version
+
+
+def _prune(history):
+    if len(history.versions) <= MAX_VERSIONS:
+        return
+    # The oldest version kept must be a keyframe to rebuild from.
+    limit = history.versions.maxKey() - MAX_VERSIONS
+    keyframes = [
+        v
+        for v in history.versions.keys(max=limit + 1)
+        if history.versions[v]["keyframe"]
+    ]
+    if not keyframes or keyframes[-1] == history.versions.minKey():
+        return
+    for version in list(history.versions.keys(max=keyframes[-1] - 1)):
+        del history.versions[version]
+
+    used = set(history.head.values())
+    for info in history.versions.values():
+        used.update(d for d in info["delta"].values() if d)
+        used.update((info["keyframe"] or {}).values())
+    for digest in [d for d in history.items if d not in used]:
+        del history.items[digest]
+
+
+def items_at(history, version):
+    """``{(kind, id): hash}`` of all items at ``version``."""
+    keyframe = version
+    while history.versions[keyframe]["keyframe"] is None:
+        keyframe = history.versions.maxKey(keyframe - 1)
+    items = dict(history.versions[keyframe]["keyframe"])
+    for info in history.versions.values(min=keyframe + 1, max=version):
+        for key, digest in info["delta"].items():
+            if digest is None:
+                items.pop(key, None)
+            else:
+                items[key] = digest
+    return items
+
+
+def definition_at(history, version):
+    """The definition at ``version``, as ``definition.serialize_definition`` has it."""
+    data = {}
+    sections = {VARIABLE: "variables", STATE: "states", TRANSITION: "transitions"}
+    for section in sections.values():
+        data[section] = []
+    for (kind, _item_id), digest in sorted(items_at(history, version).items()):
+        if kind == WORKFLOW:
+            data.update(_load(history, digest))
+        else:
+            data[sections[kind]].append(_load(history, digest))
+    return data
+
+
+def _content_in_states(portal, workflow, state_ids):
+    """``{state_id: count}`` of the content of ``workflow`` in ``state_ids``."""
+    types = get_types_for_workflow(
+        getToolByName(portal, "portal_workflow"),
+        getToolByName(portal, "portal_types"),
+        workflow.getId(),
+    )
+    if not types:
+        return {}
+    catalog = getToolByName(portal, "portal_catalog")
+    counts = {
+        state_id: len(
+            catalog.unrestrictedSearchResults(portal_type=types, review_state=state_id)
+        )
+        for state_id in state_ids
+    }
+    return {state_id: count for state_id, count in counts.items() if count}
+
+
+def _move_content(portal, workflow, state_id, replacement_id):
+    portal_workflow = getToolByName(portal, "portal_workflow")
+    types = get_types_for_workflow(
+        portal_workflow, getToolByName(portal, "portal_types"), workflow.getId()
+    )
+    catalog = getToolByName(portal, "portal_catalog")
+    # Materialized first: moving reindexes the objects found.
+    objects = objects_in_state(portal_workflow, catalog, workflow, types, state_id)
+    for obj in list(objects):
+        set_state(
+            portal_workflow,
+            workflow,
+            obj,
+            replacement_id,
+            f"State '{state_id}' was removed by a rollback",
+        )
+
+
+def _restore_item(history, workflow, kind, item_id, digest):
+    """Restore one variable, state or transition; return the change action."""
+    container = {
+        VARIABLE: workflow.variables,
+        STATE: workflow.states,
+        TRANSITION: workflow.transitions,
+    }[kind]
+    exists = item_id in container.objectIds()
+    if digest is None:
+        if exists:
+            if kind == TRANSITION:
+                ActionManager().delete_rule_for(container[item_id])
+            container.manage_delObjects([item_id])
+        return revisions.DELETED
+
+    item = _load(history, digest)
+    {
+        VARIABLE: definition.apply_variable,
+        STATE: definition.apply_state,
+        TRANSITION: definition.apply_transition,
+    }[kind](workflow, item)
+    if kind == TRANSITION:
+        _restore_rule(workflow, item)
+    return revisions.MODIFIED if exists else revisions.ADDED
+
+
+def rollback(portal, workflow, version, state_map=None):
+    """Restore ``workflow`` to ``version``; return the changes made.
+
+    Only the items changed by the versions after ``version`` are compared
+    and rewritten. The changes are ``(kind, item_id, action)`` tuples to
+    save like any other edit, which records the rollback as a new version.
+
+    States that did not exist at ``version`` are removed. Content still in
+    one of them is moved to the state ``state_map`` maps it to; a ValueError
+    is raised, before anything is changed, if such a state is not mapped to
+    a state of ``version``.
+    """
+    history = get_history(portal, workflow.getId())
+    target = items_at(history, version)
+    touched = set()
+    for info in history.versions.values(min=version + 1):
+        touched.update(info["delta"])
+    touched = sorted(key for key in touched if target.get(key) != history.head.get(key))
+
+    state_map = state_map or {}
+    target_states = {item_id for kind, item_id in target if kind == STATE}
+    removed_states = [
+        item_id
+        for kind, item_id in touched
+        if kind == STATE
+        and target.get((kind, item_id)) is None
+        and item_id in workflow.states.objectIds()
+    ]
+    unmapped = sorted(
+        state_id
+        for state_id in _content_in_states(portal, workflow, removed_states)
+        if state_map.get(state_id) not in target_states
+    )
+    if unmapped:
+        raise ValueError(
+            f"Content is still in {', '.join(repr(s) for s in unmapped)}; map these "
+            f"states to states of version {version} to roll back."
+        )
+
+    changes = []
+    workflow_item = None
+    for kind, item_id in touched:
+        if kind == WORKFLOW:
+            # Applied last: the initial state may be a restored state.
+            workflow_item = _load(history, target[kind, item_id])
+            changes.append((revisions.WORKFLOW, workflow.getId(), revisions.MODIFIED))
+        elif kind == STATE and item_id in removed_states:
+            # Removed once the content is moved to the restored states.
+            changes.append((kind, item_id, revisions.DELETED))
+        else:
+            digest = target.get((kind, item_id))
+            action = _restore_item(history, workflow, kind, item_id, digest)
+            changes.append((kind, item_id, action))
+
+    for state_id in removed_states:
+        if state_id in state_map:
+            _move_content(portal, workflow, state_id, state_map[state_id])
+        workflow.states.manage_delObjects([state_id])
+
+    if workflow_item is not None:
+        definition.apply_workflow(workflow, workflow_item)
+    return changes
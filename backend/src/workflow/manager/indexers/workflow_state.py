@@ -0,0 +1,93 @@
+"""Catalog indexers of the workflow state of content.
+
+``workflow_id`` lists the workflows governing an object, so the content of
+a workflow can be found without resolving type chains. ``review_state_since``
+is when the object entered its current state, e.g. to find content waiting
+in ``pending`` for a month.
+"""
+
+from Acquisition import aq_base
+from plone.indexer import indexer
+from Products.CMFCore.interfaces import IContentish
+from Products.CMFCore.utils import getToolByName
+from workflow.manager import logger
+
+import transaction
+
+
+# Indexes to update whenever the workflow status of content changes.
+WORKFLOW_INDEXES = ["workflow_id", "review_state_since"]
+# Objects reindexed per transaction by ``backfill``.
+BATCH_SIZE = 1000
+
+
+def entered_state(obj, workflow):
+    """When ``obj`` entered its current state of ``workflow``; None if unknown.
+
+    History entries that left the state unchanged (comments, transitions
+    back to the same state) do not count as entering it.
+    """
+    history = (getattr(aq_base(obj), "workflow_history", None) or {}).get(
+        workflow.getId()
+    ) or ()
+    state_var = workflow.state_var
+    current = entered = None
+    for entry in reversed(history):
+        state = entry.get(state_var)
+        if current is None:
+            current = state
+        elif state != current:
+            break
+        entered = entry.get("time")
+    return entered
+
+
+@indexer(IContentish)
+def workflow_id(obj):
+    chain = getToolByName(obj, "portal_workflow").getChainFor(obj)
+    if not chain:
+        raise AttributeError("workflow_id")
+    return list(chain)
+
+
+@indexer(IContentish)
+def review_state_since(obj):
+    wtool = getToolByName(obj, "portal_workflow")
+    for workflow in wtool.getWorkflowsFor(obj):
+        if getattr(workflow, "state_var", None):
+            entered = entered_state(obj, workflow)
+            if entered is not None:
+                return entered
+    raise AttributeError("review_state_since")
+
+
+def reindex_workflow_state(obj, event):
+    """Keep the indexes current when content changes state."""
+    obj.reindexObject(idxs=WORKFLOW_INDEXES)
+
+
+def backfill(portal):
+    """Index the workflow and the time it entered its state for all content.
+
+    Every batch is committed on its own, so a large site neither holds all
+    changes in one transaction nor conflicts with edits for the whole run.
+    Reindexing is idempotent: if it is interrupted, running it again
+    finishes the job.
+    """
+    catalog = getToolByName(portal, "portal_catalog")
+    brains = catalog.unrestrictedSearchResults(path="/".join(portal.getPhysicalPath()))
+    total = len(brains)
+    indexed = 0
+    for brain in brains:
+        try:
+            obj = brain._unrestrictedGetObject()
+        except (AttributeError, KeyError):
+            logger.warning(f"Skipping stale catalog entry {brain.getPath()}")
+            continue
+        obj.reindexObject(idxs=WORKFLOW_INDEXES)
+        indexed += 1
+        if indexed % BATCH_SIZE == 0:
+            transaction.commit()
+            portal._p_jar.cacheGC()
+            logger.info(f"Indexed workflow state of {indexed}/{total} objects")
+    logger.info(f"Indexed workflow state of {indexed} objects")
@@ -0,0 +1,158 @@
+"""Opt-in timing of the workflow manager services.
+
+Set ``WORKFLOW_MANAGER_INSTRUMENTATION=1`` in the environment of the Zope
+process to enable it. Every service request then records how long it took,
+how long named phases inside it took (chain lookups, the types vocabulary,
+group enumeration, role mapping updates, JSON serialization, ...) and how
+many objects it loaded from the ZODB. The numbers of a request are sent in
+its ``Server-Timing`` header; totals since the process started are served
+by ``@workflow-manager-metrics`` in the Prometheus text format.
+"""
+
+from contextlib import contextmanager
+from zope.annotation.interfaces import IAnnotations
+from zope.globalrequest import getRequest
+
+import os
+import threading
+import time
+
+
+ENVIRONMENT_VARIABLE = "WORKFLOW_MANAGER_INSTRUMENTATION"
+ANNOTATION_KEY = "workflow.manager.instrumentation"
+
+
+def enabled():
+    return os.environ.get(ENVIRONMENT_VARIABLE, "").lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+
+
+def _load_count(connection):
+    if connection is None:
+        return 0
+    # Read without clearing: the counts belong to the connection.
+    return connection.getTransferCounts()[0]
+
+
+class RequestMetrics:
+    def __init__(self, service, connection):
+        self.service = service
+        self.connection = connection
+        self.phases = {}
+        self.start = time.perf_counter()
+        self.loads = _load_count(connection)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, response):
+        duration = time.perf_counter() - self.start
+        loads = _load_count(self.connection) - self.loads
+        timings = [f"total;dur={duration * 1000:.1f}"]
+        timings.extend(
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()
+        )
+        timings.append(f'zodb-loads;desc="{loads}"')
+        response.setHeader("Server-Timing", ", ".join(timings))
+        registry.record(self.service, duration, self.phases, loads)
+
+
+def start(request, service, connection):
+    """Start measuring ``request``; None when instrumentation is disabled."""
+    if not enabled():
+        return None
+    metrics = RequestMetrics(service, connection)
+    IAnnotations(request)[ANNOTATION_KEY] = metrics
+    return metrics
+
+
+@contextmanager
+def phase(name):
+    """Time a phase of the current request, if it is being measured."""
+    request = getRequest()
+    metrics = IAnnotations(request).get(ANNOTATION_KEY) if request is not None else None
+    if metrics is None:
+        yield
+        return
+    with metrics.phase(name):
+        yield
+
+
+class MetricsRegistry:
+    """Totals of all measured requests of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # service -> [count, seconds, zodb loads]
+        self.requests = {}
+        # (service, phase) -> [count, seconds]
+        self.phases = {}
+
+    def record(self, service, duration, phases, loads):
+        with self.lock:
+            totals = self.requests.setdefault(service, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += loads
+            for name, seconds in phases.items():
+                totals = self.phases.setdefault((service, name), [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+
+    def render(self):
+        """The totals in the Prometheus text exposition format."""
+        with self.lock:
+            requests = sorted(self.requests.items())
+            phases = sorted(self.phases.items())
+        lines = [
+            "# HELP workflow_manager_request_duration_seconds "
+            "Time spent in workflow manager services.",
+            "# TYPE workflow_manager_request_duration_seconds summary",
+        ]
+        for service, (count, seconds, _loads) in requests:
+            labels = f'service="{service}"'
+            lines.append(
+                f"workflow_manager_request_duration_seconds_count{{{labels}}} {count}"
+            )
+            lines.append(
+                f"workflow_manager_request_duration_seconds_sum{{{labels}}} "
+                f"{seconds:.6f}"
+            )
+        lines.extend([
+            "# HELP workflow_manager_phase_duration_seconds "
+            "Time spent in phases of workflow manager services.",
+            "# TYPE workflow_manager_phase_duration_seconds summary",
+        ])
+        for (service, name), (count, seconds) in phases:
+            labels = f'service="{service}",phase="{name}"'
+            lines.append(
+                f"workflow_manager_phase_duration_seconds_count{{{labels}}} {count}"
+            )
+            lines.append(
+                f"workflow_manager_phase_duration_seconds_sum{{{labels}}} {seconds:.6f}"
+            )
+        lines.extend([
+            "# HELP workflow_manager_zodb_loads_total "
+            "Objects loaded from the ZODB by workflow manager services.",
+            "# TYPE workflow_manager_zodb_loads_total counter",
+        ])
+        for service, (_count, _seconds, loads) in requests:
+            lines.append(
+                f'workflow_manager_zodb_loads_total{{service="{service}"}} {loads}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
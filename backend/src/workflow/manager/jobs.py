@@ -0,0 +1,743 @@
+"""Background jobs that walk catalog-selected content in committed batches.
+
+A job is a persistent record stored in an annotation on the portal.  The
+worker runs in a thread with its own ZODB connection, processes the objects
+matched by the handler's catalog query in ``UID`` order, commits after every
+batch and checkpoints the last processed ``UID`` as its cursor, so an
+interrupted job picks up where it left off.
+
+A parallel job splits the content into disjoint ``UID`` ranges
+(partitions), each walked the same way by its own worker. The thread that
+runs the job coordinates: it starts workers for the partitions, aggregates
+their progress and finalizes the job once all of them are done. Workers
+commit only to their partition, so they do not conflict with each other,
+and partitions not yet taken can be claimed by other processes (ZEO
+clients) checking on the job.
+"""
+
+from abc import ABC
+from abc import abstractmethod
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from AccessControl.SpecialUsers import system as system_user
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from persistent.mapping import PersistentMapping
+from Products.CMFCore.utils import getToolByName
+from Testing.makerequest import makerequest
+from workflow.manager import history
+from workflow.manager import logger
+from workflow.manager import revisions
+from workflow.manager import rolemaps
+from workflow.manager.utils import get_types_for_workflow
+from workflow.manager.utils import set_state
+from ZODB.POSException import ConflictError
+from zope.annotation.interfaces import IAnnotations
+from zope.component.hooks import setSite
+
+import threading
+import time
+import transaction
+import uuid
+
+
+ANNOTATION_KEY = "workflow.manager.jobs"
+DEFAULT_BATCH_SIZE = 500
+# Seconds without a heartbeat after which a running job is considered
+# orphaned (e.g. its process was restarted) and may be resumed.
+STALE_AFTER = 300
+MAX_CONFLICT_RETRIES = 5
+# UIDs are split on their first two hex digits.
+MAX_PARTITIONS = 256
+# Partitions a single process works on at the same time.
+DEFAULT_WORKERS = 2
+# Seconds between the coordinator's checks of the partitions.
+POLL_INTERVAL = 1
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_handlers = {}
+_active = set()
+_lock = threading.Lock()
+
+
+def register(kind):
+    """Class decorator registering a job handler for ``kind``."""
+
+    def decorator(cls):
+        _handlers[kind] = cls
+        return cls
+
+    return decorator
+
+
+class Progress(Persistent):
+    """Status and progress shared by jobs and their partitions."""
+
+    @property
+    def is_finished(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def is_stale(self):
+        return not self.is_finished and time.time() - self.heartbeat > STALE_AFTER
+
+
+class Job(Progress):
+    """Persistent state and progress of a background job."""
+
+    # index -> Partition of a parallel job
+    partitions = None
+
+    def __init__(self, kind, workflow_id, params=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.workflow_id = workflow_id
+        self.params = PersistentMapping(params or {})
+        self.batch_size = batch_size
+        self.status = QUEUED
+        self.worker = None
+        self.cursor = None
+        self.total = 0
+        self.processed = 0
+        self.changed = 0
+        self.error = None
+        self.created = time.time()
+        self.heartbeat = self.created
+        self.started = None
+        self.finished = None
+        # Rate and ETA are measured over the current run only, so a resumed
+        # job does not report the downtime as slowness.
+        self.run_started = None
+        self.run_processed = 0
+
+
+class Partition(Progress):
+    """The content of a parallel job with a ``UID`` in ``[lower, upper)``."""
+
+    def __init__(self, index, lower, upper):
+        self.index = index
+        self.lower = lower
+        self.upper = upper
+        self.status = QUEUED
+        self.worker = None
+        self.cursor = None
+        self.processed = 0
+        self.changed = 0
+        self.error = None
+        self.heartbeat = time.time()
+        self.started = None
+        self.finished = None
+        self.run_started = None
+        self.run_processed = 0
+
+
+def uid_ranges(count):
+    """Split the ``UID`` space into ``count`` disjoint ``(lower, upper)`` ranges.
+
+    UIDs are random hex strings, so ranges of their first two digits hold
+    about the same amount of content. ``None`` is an open end.
+    """
+    bounds = [f"{i * MAX_PARTITIONS // count:02x}" for i in range(1, count)]
+    return list(zip([None, *bounds], [*bounds, None], strict=True))
+
+
+def serialize_job(job):
+    rate = None
+    eta = None
+    if job.run_started and job.run_processed:
+        elapsed = (job.finished or job.heartbeat) - job.run_started
+        if elapsed > 0:
+            rate = job.run_processed / elapsed
+            eta = max(job.total - job.processed, 0) / rate
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "workflow_id": job.workflow_id,
+        "status": job.status,
+        "batch_size": job.batch_size,
+        "total": job.total,
+        "processed": job.processed,
+        "changed": job.changed,
+        "rate": round(rate, 2) if rate is not None else None,
+        "eta": round(eta, 1) if eta is not None and not job.is_finished else None,
+        "created": job.created,
+        "started": job.started,
+        "finished": job.finished,
+        "error": job.error,
+        "partitions": [
+            {
+                "index": partition.index,
+                "status": partition.status,
+                "processed": partition.processed,
+                "changed": partition.changed,
+                "error": partition.error,
+            }
+            for partition in job.partitions.values()
+        ]
+        if job.partitions
+        else None,
+    }
+
+
+def _storage(portal, create=False):
+    annotations = IAnnotations(portal)
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None and create:
+        storage = annotations[ANNOTATION_KEY] = OOBTree()
+    return storage
+
+
+def get_job(portal, job_id):
+    storage = _storage(portal)
+    if storage is None:
+        return None
+    return storage.get(job_id)
+
+
+def find_jobs(portal, kind=None, workflow_id=None):
+    """Return matching jobs, most recently created first."""
+    storage = _storage(portal)
+    if storage is None:
+        return []
+    jobs = [
+        job
+        for job in storage.values()
+        if (kind is None or job.kind == kind)
+        and (workflow_id is None or job.workflow_id == workflow_id)
+    ]
+    return sorted(jobs, key=lambda j: j.created, reverse=True)
+
+
+def find_unfinished_job(portal, kind, workflow_id):
+    for job in find_jobs(portal, kind=kind, workflow_id=workflow_id):
+        if not job.is_finished:
+            return job
+    return None
+
+
+def create_job(portal, kind, workflow_id, params=None, batch_size=None, partitions=1):
+    """Store a new job and start it once the current transaction commits.
+
+    With more than one partition the content is processed in parallel; the
+    ``workers`` parameter limits the partitions run by one process.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    if not 1 <= partitions <= MAX_PARTITIONS:
+        raise ValueError(f"A job has between 1 and {MAX_PARTITIONS} partitions.")
+    job = Job(
+        kind, workflow_id, params=params, batch_size=batch_size or DEFAULT_BATCH_SIZE
+    )
+    if partitions > 1:
+        job.partitions = PersistentMapping({
+            index: Partition(index, lower, upper)
+            for index, (lower, upper) in enumerate(uid_ranges(partitions))
+        })
+    _storage(portal, create=True)[job.id] = job
+    start_after_commit(portal, job)
+    return job
+
+
+def resume_if_stale(portal, job):
+    """Restart an unfinished job no worker is taking care of anymore.
+
+    While a parallel job runs in another process, this process joins it by
+    taking partitions nobody works on.
+    """
+    if job.id in _active:
+        return False
+    if job.is_stale:
+        logger.info(f"Resuming {job.kind} job {job.id} from cursor {job.cursor!r}")
+        start_after_commit(portal, job)
+        return True
+    if not job.partitions or job.status != RUNNING:
+        return False
+    workers = job.params.get("workers") or DEFAULT_WORKERS
+    running = sum(1 for index in job.partitions if (job.id, index) in _active)
+    joined = False
+    for partition in job.partitions.values():
+        if running >= workers:
+            break
+        if (partition.status == QUEUED or partition.is_stale) and (
+            job.id,
+            partition.index,
+        ) not in _active:
+            start_after_commit(portal, job, partition.index)
+            running += 1
+            joined = True
+    return joined
+
+
+def start_after_commit(portal, job, partition=None):
+    db = portal._p_jar.db()
+    site_path = portal.getPhysicalPath()
+    job_id = job.id
+
+    def hook(success):
+        if success:
+            _spawn(db, site_path, job_id, partition)
+
+    transaction.get().addAfterCommitHook(hook)
+
+
+def _spawn(db, site_path, job_id, partition=None):
+    """Run a job (or one of its partitions) in a new thread.
+
+    Does nothing if it already runs in this process.
+    """
+    key = job_id if partition is None else (job_id, partition)
+    with _lock:
+        if key in _active:
+            return False
+        _active.add(key)
+    name = f"workflow.manager-job-{job_id}"
+    if partition is not None:
+        name = f"{name}-{partition}"
+    thread = threading.Thread(
+        target=_run,
+        args=(db, site_path, job_id, partition),
+        name=name,
+        daemon=True,
+    )
+    thread.start()
+    return True
+
+
+def _run(db, site_path, job_id, partition=None):
+    key = job_id if partition is None else (job_id, partition)
+    connection = db.open()
+    try:
+        app = makerequest(connection.root()["Application"])
+        site = app.unrestrictedTraverse(site_path)
+        setSite(site)
+        newSecurityManager(None, system_user)
+        if partition is None:
+            _work(site, job_id)
+        else:
+            _work_partition(site, job_id, partition)
+    except Exception as e:
+        transaction.abort()
+        logger.exception(f"Job {job_id} failed")
+        _mark_failed(site_path, connection, job_id, e, partition)
+    finally:
+        noSecurityManager()
+        setSite(None)
+        connection.close()
+        with _lock:
+            _active.discard(key)
+
+
+def _record(job, partition=None):
+    """The job itself, or one of its partitions."""
+    return job if partition is None else job.partitions[partition]
+
+
+def _mark_failed(site_path, connection, job_id, error, partition=None):
+    try:
+        site = connection.root()["Application"].unrestrictedTraverse(site_path)
+        job = get_job(site, job_id)
+        if job is not None:
+            record = _record(job, partition)
+            record.status = FAILED
+            record.error = str(error)
+            record.finished = time.time()
+            transaction.commit()
+    except Exception:
+        transaction.abort()
+        logger.exception(f"Could not record failure of job {job_id}")
+
+
+def _claim(site, job_id, partition=None):
+    """Take ownership of the job; a concurrent claim loses with a conflict."""
+    job = get_job(site, job_id)
+    if job is None or job.is_finished:
+        return None
+    record = _record(job, partition)
+    if record.is_finished:
+        return None
+    token = uuid.uuid4().hex
+    now = time.time()
+    record.worker = token
+    record.status = RUNNING
+    record.started = record.started or now
+    record.heartbeat = now
+    record.run_started = now
+    record.run_processed = 0
+    try:
+        transaction.commit()
+    except ConflictError:
+        transaction.abort()
+        logger.info(f"Job {job_id} was claimed by another worker")
+        return None
+    return token
+
+
+def _next_batch(catalog, query, batch_size, cursor, lower=None, upper=None):
+    """The next ``batch_size`` brains after ``cursor``, in ``UID`` order.
+
+    ``lower`` and ``upper`` limit the UIDs to ``[lower, upper)``.
+    """
+    batch_query = dict(query, sort_on="UID", sort_limit=batch_size + 1)
+    start = cursor if cursor is not None else lower
+    if start is not None and upper is not None:
+        batch_query["UID"] = {"query": (start, upper), "range": "min:max"}
+    elif start is not None:
+        batch_query["UID"] = {"query": start, "range": "min"}
+    elif upper is not None:
+        batch_query["UID"] = {"query": upper, "range": "max"}
+    return [
+        b
+        for b in catalog.unrestrictedSearchResults(**batch_query)[: batch_size + 1]
+        if cursor != b.UID and (upper is None or upper > b.UID)
+    ][:batch_size]
+
+
+def _work(site, job_id):
+    token = _claim(site, job_id)
+    if token is None:
+        return
+    job = get_job(site, job_id)
+    handler = _handlers[job.kind](site, job)
+    catalog = getToolByName(site, "portal_catalog")
+
+    query = handler.query()
+    if query is not None:
+        job.total = len(catalog.unrestrictedSearchResults(**query))
+        transaction.commit()
+
+    if job.partitions:
+        if query is not None and not _coordinate(site, job_id, token):
+            return
+        job = get_job(site, job_id)
+        handler.job = job
+    else:
+        while query is not None:
+            brains = _next_batch(catalog, query, job.batch_size, job.cursor)
+            if not brains:
+                break
+            if not _process_batch(site, job_id, token, handler, brains):
+                return
+            job = get_job(site, job_id)
+            handler.job = job
+
+    for attempt in range(MAX_CONFLICT_RETRIES):
+        try:
+            handler.finalize()
+            job.status = DONE
+            job.finished = time.time()
+            transaction.commit()
+            return
+        except ConflictError:
+            transaction.abort()
+            job = get_job(site, job_id)
+            handler.job = job
+            time.sleep(attempt + 1)
+    raise ConflictError(f"Could not finalize job {job_id}")
+
+
+def _coordinate(site, job_id, token):
+    """Run the partitions of a parallel job until all of them are done.
+
+    Returns False if another worker took over the job. Partitions are
+    started here, at most ``workers`` at a time, unless another process
+    took them; their progress is summed up on the job.
+    """
+    db = site._p_jar.db()
+    site_path = site.getPhysicalPath()
+    while True:
+        # See the commits of the partition workers.
+        transaction.begin()
+        job = get_job(site, job_id)
+        if job.worker != token:
+            logger.info(f"Job {job_id} was taken over by another worker")
+            return False
+        partitions = list(job.partitions.values())
+        failed = [p for p in partitions if p.status == FAILED]
+        if failed:
+            raise RuntimeError(f"Partition {failed[0].index} failed: {failed[0].error}")
+
+        workers = job.params.get("workers") or DEFAULT_WORKERS
+        running = sum(1 for p in partitions if (job_id, p.index) in _active)
+        for partition in partitions:
+            if running >= workers:
+                break
+            if (partition.status == QUEUED or partition.is_stale) and _spawn(
+                db, site_path, job_id, partition.index
+            ):
+                running += 1
+
+        job.processed = sum(p.processed for p in partitions)
+        job.run_processed = sum(p.run_processed for p in partitions)
+        job.changed = sum(p.changed for p in partitions)
+        job.heartbeat = time.time()
+        try:
+            transaction.commit()
+        except ConflictError:
+            transaction.abort()
+            continue
+        if all(p.status == DONE for p in partitions):
+            return True
+        time.sleep(POLL_INTERVAL)
+
+
+def _work_partition(site, job_id, index):
+    token = _claim(site, job_id, index)
+    if token is None:
+        return
+    job = get_job(site, job_id)
+    handler = _handlers[job.kind](site, job)
+    catalog = getToolByName(site, "portal_catalog")
+    query = handler.query()
+
+    partition = job.partitions[index]
+    while query is not None:
+        brains = _next_batch(
+            catalog,
+            query,
+            job.batch_size,
+            partition.cursor,
+            partition.lower,
+            partition.upper,
+        )
+        if not brains:
+            break
+        if not _process_batch(site, job_id, token, handler, brains, index):
+            return
+        job = get_job(site, job_id)
+        partition = job.partitions[index]
+
+    for attempt in range(MAX_CONFLICT_RETRIES):
+        try:
+            partition.status = DONE
+            partition.finished = time.time()
+            transaction.commit()
+            return
+        except ConflictError:
+            transaction.abort()
+            partition = get_job(site, job_id).partitions[index]
+            time.sleep(attempt + 1)
+    raise ConflictError(f"Could not finish partition {index} of job {job_id}")
+
+
+def _process_batch(site, job_id, token, handler, brains, partition=None):
+    for attempt in range(MAX_CONFLICT_RETRIES):
+        job = get_job(site, job_id)
+        record = _record(job, partition)
+        if record.worker != token:
+            logger.info(f"Job {job_id} was taken over by another worker")
+            return False
+        handler.job = job
+        try:
+            changed = 0
+            for brain in brains:
+                try:
+                    obj = brain._unrestrictedGetObject()
+                except (AttributeError, KeyError):
+                    logger.warning(f"Skipping stale catalog entry {brain.getPath()}")
+                    continue
+                if handler.process(obj):
+                    changed += 1
+            record.cursor = brains[-1].UID
+            record.processed += len(brains)
+            record.run_processed += len(brains)
+            record.changed += changed
+            record.heartbeat = time.time()
+            transaction.commit()
+            return True
+        except ConflictError:
+            transaction.abort()
+            logger.info(
+                f"Conflict in job {job_id}, retrying batch (attempt {attempt + 1})"
+            )
+            time.sleep(attempt + 1)
+    raise ConflictError(f"Batch of job {job_id} kept conflicting")
+
+
+class BaseJobHandler(ABC):
+    """Handlers select the content to walk and process one object at a time."""
+
+    def __init__(self, portal, job):
+        self.portal = portal
+        self.job = job
+
+    @property
+    def portal_workflow(self):
+        return getToolByName(self.portal, "portal_workflow")
+
+    @property
+    def portal_types(self):
+        return getToolByName(self.portal, "portal_types")
+
+    @property
+    def workflow(self):
+        return self.portal_workflow.get(self.job.workflow_id)
+
+    @abstractmethod
+    def query(self):
+        """Catalog query for the objects to process, or None if there are none."""
+
+    @abstractmethod
+    def process(self, obj):
+        """Process one object; return True if it was changed."""
+
+    def finalize(self):  # noqa: B027
+        """Called once, in the last transaction, after all batches are done.
+
+        Does nothing by default.
+        """
+
+
+@register("update-security")
+class UpdateSecurityHandler(BaseJobHandler):
+    """Rebuild role mappings for content governed by the job's workflow.
+
+    With a ``states`` parameter only content in those states is updated.
+    """
+
+    def query(self):
+        types = get_types_for_workflow(
+            self.portal_workflow, self.portal_types, self.job.workflow_id
+        )
+        if not types or self.workflow is None:
+            return None
+        query = {"portal_type": types}
+        states = self.job.params.get("states")
+        if states is not None:
+            if not states:
+                return None
+            query["review_state"] = list(states)
+        return query
+
+    def process(self, obj):
+        if self.job.workflow_id not in self.portal_workflow.getChainFor(obj):
+            return False
+        changed = self.workflow.updateRoleMappingsFor(obj)
+        if changed:
+            obj.reindexObject(idxs=["allowedRolesAndUsers"])
+        return changed
+
+    def finalize(self):
+        rolemaps.clear(
+            self.portal, self.job.workflow_id, self.job.params.get("snapshot") or {}
+        )
+
+
+@register("remap-state")
+class RemapStateHandler(BaseJobHandler):
+    """Move content out of a state that is being deleted, then delete it.
+
+    Only objects whose ``review_state`` is the deleted state are touched.
+    The state itself is removed from the workflow in ``finalize``, once no
+    content refers to it anymore.
+    """
+
+    @property
+    def state_id(self):
+        return self.job.params["state_id"]
+
+    @property
+    def replacement_id(self):
+        return self.job.params["replacement_id"]
+
+    def query(self):
+        types = get_types_for_workflow(
+            self.portal_workflow, self.portal_types, self.job.workflow_id
+        )
+        if not types or self.workflow is None:
+            return None
+        return {"portal_type": types, "review_state": self.state_id}
+
+    def process(self, obj):
+        workflow = self.workflow
+        status = self.portal_workflow.getStatusOf(workflow.id, obj)
+        if not status or status.get(workflow.state_var) != self.state_id:
+            return False
+        set_state(
+            self.portal_workflow,
+            workflow,
+            obj,
+            self.replacement_id,
+            f"State '{self.state_id}' was deleted",
+        )
+        return True
+
+    def finalize(self):
+        workflow = self.workflow
+        if workflow is None or self.state_id not in workflow.states.objectIds():
+            return
+        workflow.states.deleteStates([self.state_id])
+        rolemaps.discard(self.portal, workflow.id, self.state_id)
+        change = (revisions.STATE, self.state_id, revisions.DELETED)
+        revisions.bump(self.portal, workflow.id, change)
+        history.record(self.portal, workflow, (change,))
+
+
+@register("assign-workflow")
+def mapped_state(workflow, state_map, old_state):
+    """The state of ``workflow`` content in ``old_state`` is moved to.
+
+    Mapped states first, then a state of the same id, else the initial state.
+    """
+    if old_state in state_map:
+        return state_map[old_state]
+    if old_state in workflow.states.objectIds():
+        return old_state
+    return workflow.initial_state
+
+
+class AssignWorkflowHandler(BaseJobHandler):
+    """Move existing content of newly assigned types into the job's workflow.
+
+    The chains are changed before the job starts, so new content already
+    uses the workflow. Each object's state in its previous workflow is
+    mapped through the ``state_map`` parameter; unmapped states keep their
+    id if the workflow has such a state and start in the initial state
+    otherwise. Only the workflow status, the role mappings and the security
+    and workflow state indexes are updated.
+    """
+
+    def query(self):
+        if self.workflow is None or not self.job.params.get("types"):
+            return None
+        return {"portal_type": list(self.job.params["types"])}
+
+    def new_state(self, old_state):
+        return mapped_state(
+            self.workflow, self.job.params.get("state_map") or {}, old_state
+        )
+
+    def process(self, obj):
+        workflow = self.workflow
+        previous_chain = (self.job.params.get("previous_chains") or {}).get(
+            obj.portal_type
+        ) or ()
+        previous_ids = [
+            w
+            for w in previous_chain
+            if w != workflow.id and self.portal_workflow.get(w) is not None
+        ]
+        previous_id = old_state = None
+        for candidate in previous_ids:
+            status = self.portal_workflow.getStatusOf(candidate, obj)
+            if status:
+                previous_id = candidate
+                old_state = status.get(self.portal_workflow[candidate].state_var)
+                break
+        if previous_id is None and (
+            previous_ids or self.portal_workflow.getStatusOf(workflow.id, obj)
+        ):
+            # Created after the chain changed.
+            return False
+
+        if previous_id:
+            comment = f"Workflow changed from '{previous_id}'"
+        else:
+            comment = "Workflow assigned"
+        set_state(
+            self.portal_workflow, workflow, obj, self.new_state(old_state), comment
+        )
+        return True
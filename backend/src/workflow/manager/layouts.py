@@ -0,0 +1,142 @@
+"""Stored graph layouts (node positions etc.) of the workflow editor.
+
+Layouts are kept in an annotation on the portal, one entry per workflow.
+A layout's top-level keys are stored separately, and mappings among them
+(such as the nodes) one entry per key, so moving a node only rewrites that
+node and never touches the layouts of other workflows.
+
+Each layout also keeps the time it was last saved. Layouts are not part of
+the definition revisions, so saving one leaves the caches keyed on the
+definition alone.
+"""
+
+from BTrees.OOBTree import OOBTree
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+
+import json
+import time
+
+
+ANNOTATION_KEY = "workflow.manager.layouts"
+# Where layouts were kept before, as JSON strings keyed by workflow id.
+REGISTRY_KEY = "workflow.manager.layouts"
+# Where the time of the last save is kept in a layout.
+MODIFIED_KEY = "@modified"
+
+
+def _storage(create=False):
+    annotations = IAnnotations(api.portal.get())
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None and create:
+        storage = annotations[ANNOTATION_KEY] = OOBTree()
+    return storage
+
+
+def _store(value):
+    if isinstance(value, dict):
+        tree = OOBTree()
+        tree.update(value)
+        return tree
+    return value
+
+
+def _load(value):
+    if isinstance(value, OOBTree):
+        return dict(value.items())
+    return value
+
+
+def _merge(target, patch):
+    """JSON merge patch (RFC 7396) of plain data."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _merge(result.get(key), value)
+    return result
+
+
+def get_layout(workflow_id):
+    """Return the stored layout of a workflow, ``{}`` if there is none."""
+    storage = _storage()
+    if storage is None or workflow_id not in storage:
+        return {}
+    return {
+        key: _load(value)
+        for key, value in storage[workflow_id].items()
+        if key != MODIFIED_KEY
+    }
+
+
+def layout_modified(workflow_id):
+    """When the layout of a workflow was last saved, None if it never was."""
+    storage = _storage()
+    if storage is None or workflow_id not in storage:
+        return None
+    return storage[workflow_id].get(MODIFIED_KEY)
+
+
+def set_layout(workflow_id, layout):
+    """Replace the layout of a workflow."""
+    storage = _storage(create=True)
+    tree = OOBTree()
+    for key, value in (layout or {}).items():
+        tree[key] = _store(value)
+    tree[MODIFIED_KEY] = time.time()
+    storage[workflow_id] = tree
+
+
+def patch_layout(workflow_id, patch):
+    """Apply a JSON merge patch to the layout of a workflow.
+
+    ``{"nodes": {"review": {"x": 10, "y": 20}, "old": null}}`` moves one node
+    and drops another; everything not mentioned is left alone.
+    """
+    storage = _storage(create=True)
+    tree = storage.get(workflow_id)
+    if tree is None:
+        tree = storage[workflow_id] = OOBTree()
+    for key, value in patch.items():
+        current = tree.get(key)
+        if value is None:
+            tree.pop(key, None)
+        elif isinstance(current, OOBTree) and isinstance(value, dict):
+            for item_key, item_value in value.items():
+                if item_value is None:
+                    current.pop(item_key, None)
+                else:
+                    current[item_key] = _merge(current.get(item_key), item_value)
+        else:
+            tree[key] = _store(_merge(_load(current), value))
+    tree[MODIFIED_KEY] = time.time()
+
+
+def delete_layout(workflow_id):
+    storage = _storage()
+    if storage is not None and workflow_id in storage:
+        del storage[workflow_id]
+
+
+def migrate_from_registry():
+    """Move the layouts kept in the registry record into the annotation.
+
+    Returns the number of migrated layouts.
+    """
+    layouts = api.portal.get_registry_record(REGISTRY_KEY, default=None)
+    if not isinstance(layouts, dict):
+        return 0
+    migrated = 0
+    for workflow_id, value in layouts.items():
+        try:
+            layout = json.loads(value) if isinstance(value, str) else value
+        except json.JSONDecodeError:
+            continue
+        if isinstance(layout, dict):
+            set_layout(workflow_id, layout)
+            migrated += 1
+    api.portal.set_registry_record(REGISTRY_KEY, {})
+    return migrated
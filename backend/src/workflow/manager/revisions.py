@@ -0,0 +1,150 @@
+"""Definition revisions of the workflows edited through the manager.
+
+Every mutating service bumps the revision of the workflow it changed and
+records what changed. The revision numbers are drawn from one site-wide
+counter, so they increase monotonically both per workflow and globally,
+and the recorded changes form a feed clients can replay from any revision
+still retained.
+
+Saves of different workflows must not conflict with each other, so nothing
+they write is shared: the counter is a conflict-resolving
+``BTrees.Length.Length``, and the per-workflow revisions and the change
+log are BTrees keyed by workflow. Two saves committed concurrently may draw
+the same revision; their changes are then logged under the same revision
+number, and the feed returns all of them again to clients that have seen
+that revision (see ``changes_since``). Concurrent saves of the same
+workflow still conflict.
+"""
+
+from BTrees.Length import Length
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from zope.annotation.interfaces import IAnnotations
+
+import time
+
+
+ANNOTATION_KEY = "workflow.manager.revisions"
+# Number of revisions kept in the change feed. Clients asking for changes
+# since an older revision are told to reload everything.
+MAX_CHANGES = 10000
+# The feed is pruned in steps of this fraction of MAX_CHANGES, so the
+# oldest entries are not removed (and conflicted on) by every save.
+PRUNE_FRACTION = 10
+
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+WORKFLOW = "workflow"
+STATE = "state"
+TRANSITION = "transition"
+
+
+class RevisionStorage(Persistent):
+    def __init__(self):
+        self.counter = Length()
+        # workflow id -> (revision, modified)
+        self.workflows = OOBTree()
+        # (revision, workflow id) -> (workflow id, changes, modified)
+        self.changes = OOBTree()
+
+
+def _storage(portal, create=False):
+    annotations = IAnnotations(portal)
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None and create:
+        storage = annotations[ANNOTATION_KEY] = RevisionStorage()
+    return storage
+
+
+def _prune(storage, revision):
+    oldest = storage.changes.minKey()[0]
+    if revision - oldest < MAX_CHANGES + MAX_CHANGES // PRUNE_FRACTION:
+        return
+    newest_pruned = (revision - MAX_CHANGES + 1,)
+    for key in list(storage.changes.keys(max=newest_pruned, excludemax=True)):
+        del storage.changes[key]
+
+
+def bump(portal, workflow_id, *changes):
+    """Record a change of the workflow definition; return the new revision.
+
+    ``changes`` are ``(kind, item_id, action)`` tuples describing what was
+    changed; without any, the workflow itself is recorded as modified.
+    """
+    storage = _storage(portal, create=True)
+    now = time.time()
+    storage.counter.change(1)
+    revision = storage.counter()
+    storage.workflows[workflow_id] = (revision, now)
+    storage.changes[revision, workflow_id] = (
+        workflow_id,
+        tuple(changes) or ((WORKFLOW, workflow_id, MODIFIED),),
+        now,
+    )
+    _prune(storage, revision)
+    return revision
+
+
+def workflow_revision(portal, workflow_id):
+    """Return ``(revision, modified)`` of a workflow, ``(0, None)`` if never changed."""
+    storage = _storage(portal)
+    if storage is None:
+        return 0, None
+    return storage.workflows.get(workflow_id, (0, None))
+
+
+def global_revision(portal):
+    """Return ``(revision, modified)`` of the most recent change of any workflow."""
+    storage = _storage(portal)
+    if storage is None or not storage.changes:
+        return 0, None
+    return storage.counter(), storage.changes[storage.changes.maxKey()][2]
+
+
+def _shared(storage, revision):
+    """Whether more than one workflow's changes are logged under ``revision``."""
+    if storage is None or revision < 1:
+        return False
+    keys = storage.changes.keys((revision,), (revision + 1,), excludemax=True)
+    return len(list(keys)) > 1
+
+
+def changes_since(portal, since):
+    """Return the changes recorded after revision ``since``.
+
+    The result maps workflow ids to ``{"revision": ..., "items": {(kind,
+    item_id): action}}``, collapsing repeated changes of the same item into
+    its net effect, or None if the feed no longer reaches back to ``since``.
+
+    If several workflows were changed under revision ``since`` (by saves
+    committed concurrently), a client may have seen only some of them, so
+    all of them are returned again.
+    """
+    storage = _storage(portal)
+    current = storage.counter() if storage is not None else 0
+    if since > current:
+        return None
+    if since == current:
+        return {}
+    if since < storage.changes.minKey()[0] - 1:
+        return None
+
+    start = (since,) if _shared(storage, since) else (since + 1,)
+    result = {}
+    for (revision, _id), entry in storage.changes.items(start):
+        workflow_id, changes, _modified = entry
+        synced = result.setdefault(workflow_id, {"revision": revision, "items": {}})
+        synced["revision"] = revision
+        items = synced["items"]
+        for kind, item_id, action in changes:
+            previous = items.get((kind, item_id))
+            if previous == ADDED and action == MODIFIED:
+                continue
+            if previous == ADDED and action == DELETED:
+                # Created and removed again within the window: nothing to sync.
+                del items[(kind, item_id)]
+                continue
+            items[(kind, item_id)] = action
+    return result
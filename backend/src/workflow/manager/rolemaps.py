@@ -0,0 +1,74 @@
+"""States whose role mappings changed since content was last updated.
+
+Editing the permission or group role maps of a state makes the role
+mappings of the content in that state stale. The manager records those
+states per workflow, so a role mapping update can be limited to the content
+in them. Each mark carries a token: an update clears only the marks it
+started from, so an edit made while it was running is not lost.
+"""
+
+from BTrees.OOBTree import OOBTree
+from zope.annotation.interfaces import IAnnotations
+
+import uuid
+
+
+ANNOTATION_KEY = "workflow.manager.rolemaps"
+
+
+def _storage(portal, create=False):
+    annotations = IAnnotations(portal)
+    storage = annotations.get(ANNOTATION_KEY)
+    if storage is None and create:
+        storage = annotations[ANNOTATION_KEY] = OOBTree()
+    return storage
+
+
+def mark_stale(portal, workflow_id, *state_ids):
+    storage = _storage(portal, create=True)
+    states = storage.get(workflow_id)
+    if states is None:
+        states = storage[workflow_id] = OOBTree()
+    for state_id in state_ids:
+        states[state_id] = uuid.uuid4().hex
+
+
+def discard(portal, workflow_id, *state_ids):
+    """Drop the marks of states that no longer exist."""
+    storage = _storage(portal)
+    if storage is None or workflow_id not in storage:
+        return
+    states = storage[workflow_id]
+    for state_id in state_ids:
+        if state_id in states:
+            del states[state_id]
+    if not states:
+        del storage[workflow_id]
+
+
+def stale_states(portal, workflow_id):
+    """Return ``{state_id: token}`` of the stale states of a workflow."""
+    storage = _storage(portal)
+    if storage is None or workflow_id not in storage:
+        return {}
+    return dict(storage[workflow_id].items())
+
+
+def clear(portal, workflow_id, snapshot=None):
+    """Forget the marks in ``snapshot`` (as returned by ``stale_states``).
+
+    Without a snapshot all marks of the workflow are dropped, e.g. when the
+    workflow is deleted.
+    """
+    storage = _storage(portal)
+    if storage is None or workflow_id not in storage:
+        return
+    states = storage[workflow_id]
+    if snapshot is None:
+        del storage[workflow_id]
+        return
+    for state_id, token in snapshot.items():
+        if states.get(state_id) == token:
+            del states[state_id]
+    if not states:
+        del storage[workflow_id]
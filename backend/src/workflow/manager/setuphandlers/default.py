@@ -0,0 +1,8 @@
+from plone import api
+from Products.GenericSetup.tool import SetupTool
+from workflow.manager.indexers import workflow_state
+
+
+def index_existing_content(portal_setup: SetupTool):
+    """Fill the workflow state indexes the profile adds for existing content."""
+    workflow_state.backfill(api.portal.get())
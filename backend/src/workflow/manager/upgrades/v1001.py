@@ -0,0 +1,16 @@
+from plone.registry.interfaces import IRegistry
+from Products.GenericSetup.tool import SetupTool
+from workflow.manager import logger
+from workflow.manager.controlpanel.control_panel.controlpanel import IControlPanel
+from zope.component import getUtility
+
+
+def register_control_panel(setup_tool: SetupTool):
+    """Add the records of the control panel that are new, e.g. the batch size.
+
+    Only the control panel schema is registered, the other registry records
+    of the profile are left alone.
+    """
+    registry = getUtility(IRegistry)
+    registry.registerInterface(IControlPanel, prefix="workflow.manager.control_panel")
+    logger.info("Registered the workflow manager control panel records")
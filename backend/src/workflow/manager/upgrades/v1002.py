@@ -0,0 +1,10 @@
+from plone import api
+from Products.GenericSetup.tool import SetupTool
+from workflow.manager import logger
+from workflow.manager.actionmanager import ActionManager
+
+
+def migrate_rule_names(setup_tool: SetupTool):
+    """Rename transition rules stored under the old, workflow-less name."""
+    renamed = ActionManager().migrate_rule_names(api.portal.get())
+    logger.info(f"Renamed {renamed} transition content rules")
@@ -0,0 +1,9 @@
+from Products.GenericSetup.tool import SetupTool
+from workflow.manager import logger
+from workflow.manager.layouts import migrate_from_registry
+
+
+def migrate_layouts(setup_tool: SetupTool):
+    """Move the layouts kept in the registry into per-workflow storage."""
+    migrated = migrate_from_registry()
+    logger.info(f"Migrated {migrated} workflow layouts")
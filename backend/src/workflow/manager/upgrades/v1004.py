@@ -0,0 +1,8 @@
+from plone import api
+from Products.GenericSetup.tool import SetupTool
+from workflow.manager.indexers import workflow_state
+
+
+def backfill_workflow_indexes(setup_tool: SetupTool):
+    """Index the workflow and the time it entered its state for existing content."""
+    workflow_state.backfill(api.portal.get())
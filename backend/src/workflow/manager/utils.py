@@ -1,4 +1,7 @@
+from DateTime import DateTime
 from Products.DCWorkflow.Guard import Guard
+from workflow.manager.indexers.workflow_state import WORKFLOW_INDEXES
+
 
 def clone_transition(transition, clone):
     transition.description = clone.description
@@ -35,4 +38,69 @@ def generateRuleName(transition):
 
 
 def generateRuleNameOld(transition):
-    return "--workflowmanager--%s" % (transition.id)
\ No newline at end of file
+    return "--workflowmanager--%s" % (transition.id)
+
+
+def get_types_for_workflow(portal_workflow, portal_types, workflow_id):
+    """Return the ids of the portal types whose chain includes the workflow.
+
+    Unlike ``listChainOverrides`` this also honours types that fall back to
+    the default chain.
+    """
+    return [
+        type_id
+        for type_id in portal_types.objectIds()
+        if workflow_id in portal_workflow.getChainForPortalType(type_id)
+    ]
+
+
+def set_state(portal_workflow, workflow, obj, state_id, comment):
+    """Put ``obj`` into ``state_id`` of ``workflow`` without a transition.
+
+    The role mappings and the security and workflow state indexes of the
+    object are updated.
+    """
+    portal_workflow.setStatusOf(
+        workflow.id,
+        obj,
+        {
+            "action": None,
+            "actor": None,
+            "comments": comment,
+            workflow.state_var: state_id,
+            "time": DateTime(),
+        },
+    )
+    workflow.updateRoleMappingsFor(obj)
+    obj.reindexObject(idxs=["allowedRolesAndUsers", "review_state", *WORKFLOW_INDEXES])
+
+
+def reindex_workflow_state(catalog, types):
+    """Reindex the workflow state of the content of ``types``.
+
+    For content whose chain changed without a change of its status; the
+    objects are not otherwise touched.
+    """
+    for brain in catalog.unrestrictedSearchResults(portal_type=types):
+        try:
+            obj = brain._unrestrictedGetObject()
+        except (AttributeError, KeyError):
+            continue
+        obj.reindexObject(idxs=["review_state", *WORKFLOW_INDEXES])
+
+
+def objects_in_state(portal_workflow, catalog, workflow, types, state_id):
+    """The content of ``types`` that ``workflow`` has in ``state_id``.
+
+    Found through the ``review_state`` index, then checked against the
+    workflow status of each object.
+    """
+    brains = catalog.unrestrictedSearchResults(portal_type=types, review_state=state_id)
+    for brain in brains:
+        try:
+            obj = brain._unrestrictedGetObject()
+        except (AttributeError, KeyError):
+            continue
+        status = portal_workflow.getStatusOf(workflow.id, obj)
+        if status and status.get(workflow.state_var) == state_id:
+            yield obj
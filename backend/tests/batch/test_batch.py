@@ -0,0 +1,72 @@
+from workflow.manager import history
+from workflow.manager import revisions
+from workflow.manager.api.services.workflow import batch
+
+import json
+import pytest
+
+
+class NoContent:
+    def __init__(self, context, request):
+        self.request = request
+
+    def reply(self):
+        self.request.response.setStatus(204)
+
+
+class TestWorkflowBatch:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "batch_workflow")
+        self.workflow = wtool["batch_workflow"]
+
+    def run(self, *operations):
+        self.request["BODY"] = json.dumps({"operations": list(operations)})
+        service = batch.WorkflowBatch(self.portal, self.request)
+        service.params = ["batch_workflow"]
+        return service.reply()
+
+    def test_batch_is_recorded_once(self):
+        before = revisions.global_revision(self.portal)[0]
+        result = self.run(
+            {"type": "state", "op": "add", "body": {"title": "Review"}},
+            {
+                "type": "state",
+                "op": "update",
+                "id": "review",
+                "body": {"title": "Checks"},
+            },
+            {
+                "type": "state",
+                "op": "update",
+                "id": "pending",
+                "body": {"title": "Waiting"},
+            },
+        )
+        assert result["status"] == "success"
+        assert revisions.global_revision(self.portal)[0] == before + 1
+        changes = revisions.changes_since(self.portal, before)["batch_workflow"]
+        assert changes["items"] == {
+            (revisions.STATE, "review"): revisions.ADDED,
+            (revisions.STATE, "pending"): revisions.MODIFIED,
+        }
+        versions = history.get_history(self.portal, "batch_workflow").versions
+        assert len(versions) == 1
+
+    def test_failed_batch_records_nothing(self):
+        before = revisions.global_revision(self.portal)[0]
+        result = self.run(
+            {"type": "state", "op": "add", "body": {"title": "Review"}},
+            {"type": "state", "op": "update", "id": "missing", "body": {}},
+        )
+        assert result["failed"] == 1
+        assert revisions.global_revision(self.portal)[0] == before
+        assert "review" not in self.workflow.states.objectIds()
+
+    def test_no_content_results(self, monkeypatch):
+        monkeypatch.setitem(batch.OPERATIONS, ("workflow", "touch"), (NoContent, False))
+        result = self.run({"type": "workflow", "op": "touch"})
+        assert result["results"] == [{"index": 0, "status": 204, "result": None}]
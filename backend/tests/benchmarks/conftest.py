@@ -0,0 +1,218 @@
+"""Synthetic sites and measurements for the REST service benchmarks.
+
+Every benchmark measures the wall time, the ZODB object loads and the
+memory allocated by a service call, and compares them with the numbers
+stored in ``baseline.json``. A measurement exceeding its baseline by more
+than the threshold fails the benchmark. Set ``BENCHMARK_UPDATE=1`` to write
+the current numbers as the new baseline, and ``BENCHMARK_THRESHOLD`` (a
+factor, default 1.5) to change the threshold.
+"""
+
+from pathlib import Path
+from plone import api
+from plone.dexterity.fti import DexterityFTI
+from plone.memoize import ram
+from Products.DCWorkflow.DCWorkflow import DCWorkflowDefinition
+
+import json
+import os
+import pytest
+import statistics
+import time
+import tracemalloc
+import transaction
+
+
+BASELINE = Path(__file__).parent / "baseline.json"
+THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", "1.5"))
+UPDATE = os.environ.get("BENCHMARK_UPDATE") == "1"
+ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", "5"))
+
+# Wall time is noisy; differences below this many milliseconds are ignored.
+LATENCY_SLACK_MS = 5
+
+# name -> (workflows, states, transitions, groups, content items)
+SIZES = {
+    "small": (5, 5, 8, 100, 50),
+    "large": (50, 20, 40, 2_000, 1_000),
+}
+
+
+class Site:
+    """A portal populated with synthetic workflows, types, groups and content."""
+
+    def __init__(self, portal, name, workflows, states, transitions, groups, content):
+        self.portal = portal
+        self.name = name
+        self.size = (workflows, states, transitions, groups, content)
+        self.workflow_ids = [f"bench_workflow_{i}" for i in range(workflows)]
+        wtool = portal.portal_workflow
+        for workflow_id in self.workflow_ids:
+            wtool._setObject(workflow_id, DCWorkflowDefinition(workflow_id))
+            build_workflow(wtool[workflow_id], states, transitions)
+
+        # One type per workflow, the content spread over them.
+        for i, workflow_id in enumerate(self.workflow_ids):
+            fti = DexterityFTI(f"bench_type_{i}")
+            fti.klass = "plone.dexterity.content.Item"
+            fti.global_allow = True
+            portal.portal_types._setObject(fti.id, fti)
+            wtool.setChainForPortalTypes((fti.id,), (workflow_id,))
+
+        source_groups = portal.acl_users.source_groups
+        for i in range(groups):
+            source_groups.addGroup(f"bench_group_{i}", title=f"Benchmark group {i}")
+
+        with api.env.adopt_roles(["Manager"]):
+            folder = api.content.create(container=portal, type="Folder", id="bench")
+            for i in range(content):
+                api.content.create(
+                    container=folder,
+                    type=f"bench_type_{i % workflows}",
+                    id=f"item_{i}",
+                    title=f"Item {i}",
+                )
+
+    @property
+    def workflow_id(self):
+        """The workflow the per-workflow services are called for."""
+        return self.workflow_ids[0]
+
+
+def build_workflow(workflow, states, transitions):
+    """A workflow with ``states`` states in a ring and ``transitions`` transitions.
+
+    Transition ``i`` leads to state ``i % states`` and is available from the
+    state before it, so every state is reachable and the sanity check runs
+    over the whole graph. The role maps of every state manage View.
+    """
+    state_ids = [f"state_{i}" for i in range(states)]
+    for state_id in state_ids:
+        workflow.states.addState(state_id)
+    workflow.permissions = ("View",)
+    for i in range(transitions):
+        transition_id = f"transition_{i}"
+        workflow.transitions.addTransition(transition_id)
+        workflow.transitions[transition_id].setProperties(
+            title=f"Transition {i}",
+            new_state_id=state_ids[i % states],
+        )
+    for i, state_id in enumerate(state_ids):
+        state = workflow.states[state_id]
+        state.title = f"State {i}"
+        state.transitions = tuple(
+            f"transition_{t}" for t in range(transitions) if (t - 1) % states == i
+        )
+        state.permission_roles = {
+            "View": ("Manager", "Reader") if i % 2 else ("Anonymous",)
+        }
+    workflow.initial_state = state_ids[0]
+
+
+@pytest.fixture(params=sorted(SIZES), scope="function")
+def synthetic_site(request, portal):
+    site = Site(portal, request.param, *SIZES[request.param])
+    # Write the site to the (test) storage so the measured calls load
+    # objects the way a request on a real site does.
+    transaction.savepoint(optimistic=True)
+    return site
+
+
+def _load_baseline():
+    if BASELINE.exists():
+        return json.loads(BASELINE.read_text())
+    return {}
+
+
+_results = {}
+
+
+class Benchmark:
+    def __init__(self, portal, http_request, name):
+        self.portal = portal
+        self.http_request = http_request
+        self.name = name
+
+    def __call__(self, service_factory, *params, body=None, before=None):
+        """Call a service ``ROUNDS`` times on fresh requests and check the numbers.
+
+        Every round starts with minimized ZODB caches and empty RAM caches,
+        so the numbers are those of a first request after a change.
+        ``before`` is called (unmeasured) at the start of every round.
+        """
+        connection = self.portal._p_jar
+        timings = []
+        loads = []
+        allocations = []
+        result = None
+        for _round in range(ROUNDS):
+            if before is not None:
+                before()
+            request = self.http_request.clone()
+            if body is not None:
+                request["BODY"] = json.dumps(body).encode("utf-8")
+            service = service_factory(self.portal, request)
+            for param in params:
+                service.publishTraverse(request, param)
+            ram.global_cache.invalidateAll()
+            transaction.savepoint(optimistic=True)
+            connection.cacheMinimize()
+            connection.getTransferCounts(clear=True)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = service.reply()
+            elapsed = time.perf_counter() - start
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            timings.append(elapsed * 1000)
+            loads.append(connection.getTransferCounts()[0])
+            allocations.append(peak / 1024)
+
+        measured = {
+            "latency_ms": round(statistics.median(timings), 2),
+            "zodb_loads": max(loads),
+            "peak_kib": round(max(allocations), 1),
+        }
+        _results[self.name] = measured
+        self.check(measured)
+        return result
+
+    def check(self, measured):
+        if UPDATE:
+            return
+        expected = _load_baseline().get(self.name)
+        if expected is None:
+            return
+        regressions = []
+        for key, value in measured.items():
+            limit = expected[key] * THRESHOLD
+            if key == "latency_ms":
+                limit += LATENCY_SLACK_MS
+            if value > limit:
+                regressions.append(f"{key} {value} > {expected[key]} x {THRESHOLD}")
+        assert not regressions, f"{self.name}: " + ", ".join(regressions)
+
+
+@pytest.fixture
+def measure(request, synthetic_site, http_request):
+    """Measure a service call; named after the test and the site size."""
+    name = f"{request.node.originalname}[{synthetic_site.name}]"
+    return Benchmark(synthetic_site.portal, http_request, name)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("workflow manager benchmarks")
+    for name, measured in sorted(_results.items()):
+        terminalreporter.write_line(
+            f"{name:<40} {measured['latency_ms']:>10.2f} ms "
+            f"{measured['zodb_loads']:>7} loads {measured['peak_kib']:>10.1f} KiB"
+        )
+    if UPDATE:
+        baseline = _load_baseline()
+        baseline.update(_results)
+        BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        terminalreporter.write_line(f"Baseline written to {BASELINE}")
@@ -0,0 +1,59 @@
+from workflow.manager import rolemaps
+from workflow.manager.api.services.workflow.state import ListStates
+from workflow.manager.api.services.workflow.transition import ListTransitions
+from workflow.manager.api.services.workflow.workflow import GetWorkflows
+from workflow.manager.api.services.workflow.workflow import SanityCheck
+from workflow.manager.api.services.workflow.workflow import UpdateSecuritySettings
+
+import pytest
+
+
+@pytest.mark.benchmark
+class TestServices:
+    @pytest.fixture(autouse=True)
+    def _setup(self, synthetic_site, measure):
+        self.site = synthetic_site
+        self.measure = measure
+
+    def test_workflows(self):
+        result = self.measure(GetWorkflows)
+        assert len(result["workflows"]) >= len(self.site.workflow_ids)
+
+    def test_states(self):
+        result = self.measure(ListStates, self.site.workflow_id)
+        assert len(result["states"]) == self.site.size[1]
+
+    def test_transitions(self):
+        result = self.measure(ListTransitions, self.site.workflow_id)
+        assert len(result["transitions"]) == self.site.size[2]
+
+    def test_sanity_check(self):
+        result = self.measure(SanityCheck, self.site.workflow_id)
+        assert result["workflow"] == self.site.workflow_id
+
+    def test_sanity_check_site(self):
+        self.measure(SanityCheck)
+
+    def test_update_security(self):
+        result = self.measure(UpdateSecuritySettings, self.site.workflow_id, body={})
+        assert result["status"] == "success"
+
+    def test_update_security_incremental(self):
+        workflow_id = self.site.workflow_id
+
+        def mark_stale():
+            # One state out of two, as after editing some role maps.
+            rolemaps.mark_stale(
+                self.site.portal,
+                workflow_id,
+                *[f"state_{i}" for i in range(0, self.site.size[1], 2)],
+            )
+
+        result = self.measure(
+            UpdateSecuritySettings,
+            workflow_id,
+            body={"incremental": True},
+            before=mark_stale,
+        )
+        assert result["status"] == "success"
+        assert result["states"]
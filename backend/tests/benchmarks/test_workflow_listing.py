@@ -0,0 +1,105 @@
+from plone.dexterity.fti import DexterityFTI
+from workflow.manager.api.services.workflow.workflow import GetWorkflows
+from zope.component import getUtility
+from zope.schema.interfaces import IVocabularyFactory
+
+import pytest
+
+
+WORKFLOWS = 50
+TYPES = 200
+GROUPS = 10_000
+
+# The fields the frontend requests for its workflow listing.
+LISTING_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "initial_state",
+    "assigned_types",
+    "states",
+    "transitions",
+)
+
+
+class CallCounter:
+    def __init__(self, monkeypatch, owner, name):
+        self.calls = 0
+        original = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            self.calls += 1
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(owner, name, wrapper)
+
+
+@pytest.fixture
+def populated(portal):
+    wtool = portal.portal_workflow
+    source = wtool["simple_publication_workflow"]
+    workflow_ids = []
+    for i in range(WORKFLOWS):
+        workflow_id = f"bench_workflow_{i}"
+        wtool.manage_clone(source, workflow_id)
+        workflow_ids.append(workflow_id)
+
+    for i in range(TYPES):
+        fti = DexterityFTI(f"bench_type_{i}")
+        fti.title = f"Benchmark type {i}"
+        portal.portal_types._setObject(fti.id, fti)
+        wtool.setChainForPortalTypes((fti.id,), (workflow_ids[i % WORKFLOWS],))
+
+    source_groups = portal.acl_users.source_groups
+    for i in range(GROUPS):
+        source_groups.addGroup(f"bench_group_{i}", title=f"Benchmark group {i}")
+    return portal
+
+
+@pytest.mark.benchmark
+class TestWorkflowListingScaling:
+    @pytest.fixture(autouse=True)
+    def _setup(self, populated, http_request, monkeypatch):
+        self.portal = populated
+        self.request = http_request
+        wtool = type(populated.portal_workflow)
+        self.chain_overrides = CallCounter(monkeypatch, wtool, "listChainOverrides")
+        self.group_enumerations = CallCounter(
+            monkeypatch, type(populated.acl_users.source_groups), "getGroups"
+        )
+        vocab = getUtility(
+            IVocabularyFactory, name="plone.app.vocabularies.ReallyUserFriendlyTypes"
+        )
+        self.type_vocabularies = CallCounter(monkeypatch, type(vocab), "__call__")
+
+    def test_shared_lookups_run_once_per_request(self):
+        result = GetWorkflows(self.portal, self.request).reply()
+
+        assert len(result["workflows"]) >= WORKFLOWS
+        assert self.chain_overrides.calls == 1
+        assert self.type_vocabularies.calls == 1
+        # Groups are served by @workflow-groups, not embedded in the listing.
+        assert self.group_enumerations.calls == 0
+
+    def test_fields_projection(self):
+        self.request.form["fields"] = ",".join(LISTING_FIELDS)
+        result = GetWorkflows(self.portal, self.request).reply()
+
+        assert len(result["workflows"]) >= WORKFLOWS
+        assert all(set(w) == set(LISTING_FIELDS) for w in result["workflows"])
+        assert "context_data" not in result
+        assert self.chain_overrides.calls == 1
+        # The type vocabulary is only needed for context_data.
+        assert self.type_vocabularies.calls == 0
+        assert self.group_enumerations.calls == 0
+
+    def test_assigned_types_index(self):
+        result = GetWorkflows(self.portal, self.request).reply()
+        by_id = {w["id"]: w for w in result["workflows"]}
+        assert len(by_id["bench_workflow_0"]["assigned_types"]) == TYPES // WORKFLOWS
+        assignable = {
+            t["id"]
+            for t in by_id["bench_workflow_0"]["context_data"]["assignable_types"]
+        }
+        assert "bench_type_0" not in assignable
+        assert "bench_type_1" in assignable
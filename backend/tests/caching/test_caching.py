@@ -0,0 +1,52 @@
+from workflow.manager.api.services.workflow import caching
+
+import pytest
+import transaction
+
+
+class TestDefinitionSerial:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional):
+        self.portal = functional["portal"]
+        self.workflow = self.portal.portal_workflow["simple_publication_workflow"]
+        transaction.commit()
+
+    def test_state_edits_change_the_serial(self):
+        before = caching.definition_serial(self.workflow)
+        assert caching.definition_serial(self.workflow) == before
+        # Edited directly, as the ZMI or a GenericSetup import would.
+        self.workflow.states["pending"].title = "Waiting"
+        transaction.commit()
+        assert caching.definition_serial(self.workflow) != before
+
+    def test_guard_edits_change_the_serial(self):
+        before = caching.definition_serial(self.workflow)
+        self.workflow.transitions["publish"].guard.roles = ("Manager",)
+        transaction.commit()
+        assert caching.definition_serial(self.workflow) != before
+
+    def test_listing_etag_covers_all_workflows(self):
+        etag, _modified = caching.listing_validators(
+            self.portal, self.portal.portal_workflow
+        )
+        self.workflow.transitions["publish"].title = "Go live"
+        transaction.commit()
+        assert (
+            caching.listing_validators(self.portal, self.portal.portal_workflow)[0]
+            != etag
+        )
+
+    def test_listing_has_no_last_modified(self):
+        _etag, modified = caching.listing_validators(
+            self.portal, self.portal.portal_workflow
+        )
+        assert modified is None
+
+    def test_listing_etag_covers_chains(self):
+        portal_workflow = self.portal.portal_workflow
+        etag, _modified = caching.listing_validators(self.portal, portal_workflow)
+        portal_workflow.setChainForPortalTypes(
+            ("Document",), ("simple_publication_workflow",)
+        )
+        transaction.commit()
+        assert caching.listing_validators(self.portal, portal_workflow)[0] != etag
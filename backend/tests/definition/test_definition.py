@@ -0,0 +1,130 @@
+from plone import api
+from workflow.manager import definition
+
+import json
+import pytest
+
+
+def export(workflow):
+    return json.loads("".join(definition.export_workflow(workflow)))
+
+
+class TestDefinition:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        self.wtool = portal.portal_workflow
+
+    def test_export_is_valid(self):
+        data = export(self.wtool["simple_publication_workflow"])
+        assert definition.validate(data) is None
+        assert data["id"] == "simple_publication_workflow"
+        assert {s["id"] for s in data["states"]} == {"private", "pending", "published"}
+        publish = next(t for t in data["transitions"] if t["id"] == "publish")
+        assert publish["new_state_id"] == "published"
+        assert publish["guard"]["permissions"] == ["Review portal content"]
+
+    def test_round_trip(self):
+        data = export(self.wtool["simple_publication_workflow"])
+        workflow, warnings = definition.import_workflow(
+            self.portal, data, "imported_workflow"
+        )
+        assert warnings == []
+        copy = export(workflow)
+        for key in (
+            "states",
+            "transitions",
+            "variables",
+            "permissions",
+            "initial_state",
+        ):
+            assert copy[key] == data[key]
+
+    def test_validate(self):
+        assert definition.validate({"id": "x"}) is not None
+        assert (
+            definition.validate({
+                "format": definition.FORMAT,
+                "id": "x",
+                "initial_state": "missing",
+                "states": [],
+            })
+            == "Initial state 'missing' is not defined."
+        )
+        assert (
+            definition.validate({
+                "format": definition.FORMAT,
+                "id": "x",
+                "states": ["private"],
+            })
+            == "'states' must be a list of objects with an 'id'."
+        )
+        assert (
+            definition.validate({
+                "format": definition.FORMAT,
+                "id": "x",
+                "transitions": {"publish": {}},
+            })
+            == "'transitions' must be a list of objects with an 'id'."
+        )
+        assert (
+            definition.validate({
+                "format": definition.FORMAT,
+                "id": "x",
+                "scripts": [
+                    {"id": "notify", "meta_type": "External Method", "module": "m"}
+                ],
+            })
+            == "Script 'notify': 'function' is required for an External Method."
+        )
+
+    def test_scripts_need_their_add_permission(self):
+        data = export(self.wtool["simple_publication_workflow"])
+        data["scripts"] = [
+            {
+                "id": "notify",
+                "meta_type": "Script (Python)",
+                "params": "",
+                "body": "return 1",
+            },
+        ]
+        with api.env.adopt_roles(["Site Administrator"]):
+            workflow, warnings = definition.import_workflow(
+                self.portal, data, "scripted_workflow"
+            )
+        assert "notify" not in workflow.scripts.objectIds()
+        assert warnings == [
+            "Script 'notify' was skipped: creating it requires "
+            "the 'Add Python Scripts' permission."
+        ]
+
+        with api.env.adopt_roles(["Manager"]):
+            workflow, warnings = definition.import_workflow(
+                self.portal, data, "scripted_workflow_2"
+            )
+        assert "notify" in workflow.scripts.objectIds()
+        assert warnings == []
+
+    def test_diff(self):
+        old = definition.serialize_definition(self.wtool["simple_publication_workflow"])
+        assert definition.diff_definitions(old, old)["identical"]
+
+        new = export(self.wtool["simple_publication_workflow"])
+        new["initial_state"] = "pending"
+        new["states"] = [s for s in new["states"] if s["id"] != "pending"]
+        published = next(s for s in new["states"] if s["id"] == "published")
+        published["permission_roles"]["View"] = {
+            "roles": ["Manager"],
+            "acquired": False,
+        }
+        result = definition.diff_definitions(old, new)
+
+        assert not result["identical"]
+        assert result["workflow"] == {
+            "initial_state": {"old": "private", "new": "pending"}
+        }
+        assert result["states"]["removed"] == ["pending"]
+        assert list(result["states"]["changed"]["published"]["permission_roles"]) == [
+            "View"
+        ]
+        assert result["transitions"] == {"added": [], "removed": [], "changed": {}}
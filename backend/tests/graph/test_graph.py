@@ -0,0 +1,113 @@
+from Products.DCWorkflow.DCWorkflow import DCWorkflowDefinition
+from Products.DCWorkflow.Transitions import TRIGGER_AUTOMATIC
+from Products.DCWorkflow.Transitions import TRIGGER_USER_ACTION
+from workflow.manager.graph import layered_layout
+from workflow.manager.graph import LAYER_SPACING
+from workflow.manager.graph import WorkflowGraph
+
+import pytest
+
+
+def build_workflow(portal, states, transitions, initial_state):
+    """``transitions`` maps ids to ``(sources, destination, trigger)``."""
+    wtool = portal.portal_workflow
+    wtool._setObject("graph_workflow", DCWorkflowDefinition("graph_workflow"))
+    workflow = wtool["graph_workflow"]
+    for state_id in states:
+        workflow.states.addState(state_id)
+    for transition_id, (_sources, destination, trigger) in transitions.items():
+        workflow.transitions.addTransition(transition_id)
+        workflow.transitions[transition_id].setProperties(
+            title=transition_id, new_state_id=destination, trigger_type=trigger
+        )
+    for state_id in states:
+        workflow.states[state_id].transitions = tuple(
+            t for t, (sources, _d, _t) in transitions.items() if state_id in sources
+        )
+    workflow.initial_state = initial_state
+    return workflow
+
+
+class TestWorkflowGraph:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+
+    def test_reachability_and_components(self):
+        workflow = build_workflow(
+            self.portal,
+            ["draft", "review", "published", "orphan", "archived"],
+            {
+                "submit": (["draft"], "review", TRIGGER_USER_ACTION),
+                "reject": (["review"], "draft", TRIGGER_USER_ACTION),
+                "publish": (["review"], "published", TRIGGER_USER_ACTION),
+                # Only available from a state nobody can reach.
+                "archive": (["orphan"], "archived", TRIGGER_USER_ACTION),
+            },
+            "draft",
+        )
+        graph = WorkflowGraph(workflow)
+        assert graph.reachable() == {"draft", "review", "published"}
+        components = graph.strongly_connected_components()
+        assert sorted(sorted(c) for c in components if len(c) > 1) == [
+            ["draft", "review"]
+        ]
+        assert set(graph.dead_ends()) == {"published", "archived"}
+
+    def test_traps_and_duplicates(self):
+        workflow = build_workflow(
+            self.portal,
+            ["draft", "published", "hidden"],
+            {
+                "publish": (["draft"], "published", TRIGGER_USER_ACTION),
+                "publish_now": (["draft"], "published", TRIGGER_USER_ACTION),
+                "hide": (["published"], "hidden", TRIGGER_USER_ACTION),
+                "show": (["hidden"], "published", TRIGGER_USER_ACTION),
+            },
+            "draft",
+        )
+        graph = WorkflowGraph(workflow)
+        assert graph.traps() == [["hidden", "published"]]
+        assert graph.duplicate_transitions() == [("draft", ["publish", "publish_now"])]
+
+    def test_unguarded_automatic_loop(self):
+        workflow = build_workflow(
+            self.portal,
+            ["a", "b"],
+            {
+                "forth": (["a"], "b", TRIGGER_AUTOMATIC),
+                "back": (["b"], "a", TRIGGER_AUTOMATIC),
+                "stay": (["b"], "", TRIGGER_USER_ACTION),
+            },
+            "a",
+        )
+        graph = WorkflowGraph(workflow)
+        assert graph.automatic_loops() == [(["a", "b"], ["back", "forth"])]
+        # "Remain in state" is a self loop, not a dangling edge.
+        assert ("stay", "b") in graph.edges["b"]
+
+    def test_layered_layout(self):
+        workflow = build_workflow(
+            self.portal,
+            ["draft", "review", "published", "archived"],
+            {
+                "submit": (["draft"], "review", TRIGGER_USER_ACTION),
+                "reject": (["review", "published"], "draft", TRIGGER_USER_ACTION),
+                "publish": (["review"], "published", TRIGGER_USER_ACTION),
+                "archive": (["published"], "archived", TRIGGER_USER_ACTION),
+                "touch": (["archived"], "", TRIGGER_USER_ACTION),
+            },
+            "draft",
+        )
+        positions = layered_layout(WorkflowGraph(workflow))
+        assert set(positions) == {"draft", "review", "published", "archived"}
+        # Back edges are reversed, so states follow the main path downwards.
+        assert [
+            positions[s]["y"] for s in ("draft", "review", "published", "archived")
+        ] == [
+            0,
+            LAYER_SPACING,
+            2 * LAYER_SPACING,
+            3 * LAYER_SPACING,
+        ]
+        assert layered_layout(WorkflowGraph(workflow)) == positions
@@ -0,0 +1,104 @@
+from plone import api
+from workflow.manager import definition
+from workflow.manager import history
+from workflow.manager import revisions
+from workflow.manager.actionmanager import ActionManager
+from workflow.manager.utils import set_state
+
+import pytest
+
+
+class TestHistory:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "history_workflow")
+        self.workflow = wtool["history_workflow"]
+
+    def save(self, *changes):
+        revisions.bump(self.portal, self.workflow.id, *changes)
+        return history.record(self.portal, self.workflow, changes)
+
+    def test_first_version_is_a_keyframe(self):
+        assert self.save() == 1
+        workflow_history = history.get_history(self.portal, self.workflow.id)
+        keyframe = workflow_history.versions[1]["keyframe"]
+        assert (history.STATE, "published") in keyframe
+        assert (history.TRANSITION, "publish") in keyframe
+
+    def test_versions_store_deltas_and_share_items(self):
+        self.save()
+        workflow_history = history.get_history(self.portal, self.workflow.id)
+        items = len(workflow_history.items)
+
+        self.workflow.states["pending"].title = "Waiting for review"
+        assert self.save((revisions.STATE, "pending", revisions.MODIFIED)) == 2
+        assert list(workflow_history.versions[2]["delta"]) == [
+            (history.STATE, "pending")
+        ]
+        assert len(workflow_history.items) == items + 1
+
+        # Saving an unchanged item records nothing.
+        assert self.save((revisions.STATE, "pending", revisions.MODIFIED)) is None
+
+    def test_rollback(self):
+        self.save()
+        self.workflow.states["pending"].title = "Waiting for review"
+        self.save((revisions.STATE, "pending", revisions.MODIFIED))
+        self.workflow.states.deleteStates(["private"])
+        self.save((revisions.STATE, "private", revisions.DELETED))
+
+        changes = history.rollback(self.portal, self.workflow, 1)
+        assert sorted(changes) == [
+            (revisions.STATE, "pending", revisions.MODIFIED),
+            (revisions.STATE, "private", revisions.ADDED),
+        ]
+        assert self.workflow.states["pending"].title == "Pending review"
+        assert "private" in self.workflow.states.objectIds()
+
+        version = history.record(self.portal, self.workflow, changes)
+        workflow_history = history.get_history(self.portal, self.workflow.id)
+        assert history.items_at(workflow_history, version) == history.items_at(
+            workflow_history, 1
+        )
+
+    def test_rollback_refuses_to_strand_content(self):
+        self.save()
+        self.workflow.states.addState("archived")
+        self.save((revisions.STATE, "archived", revisions.ADDED))
+        self.portal.portal_workflow.setChainForPortalTypes(
+            ["Document"], "history_workflow"
+        )
+        with api.env.adopt_roles(["Manager"]):
+            document = api.content.create(
+                container=self.portal, type="Document", id="document"
+            )
+        set_state(self.portal.portal_workflow, self.workflow, document, "archived", "")
+
+        with pytest.raises(ValueError):
+            history.rollback(self.portal, self.workflow, 1)
+        assert "archived" in self.workflow.states.objectIds()
+
+        changes = history.rollback(
+            self.portal, self.workflow, 1, {"archived": "private"}
+        )
+        assert changes == [(revisions.STATE, "archived", revisions.DELETED)]
+        assert "archived" not in self.workflow.states.objectIds()
+        assert api.content.get_state(document) == "private"
+
+    def test_rollback_restores_transition_rules(self):
+        definition.add_rule_actions(
+            self.workflow,
+            "publish",
+            [{"type": "plone.actions.Logger", "data": {"message": "Published"}}],
+        )
+        self.save()
+        ActionManager().delete_rule_for(self.workflow.transitions["publish"])
+        self.workflow.transitions.deleteTransitions(["publish"])
+        self.save((revisions.TRANSITION, "publish", revisions.DELETED))
+
+        history.rollback(self.portal, self.workflow, 1)
+        rule = ActionManager().get_rule(self.workflow.transitions["publish"])
+        assert rule is not None
+        assert [action.message for action in rule.actions] == ["Published"]
@@ -0,0 +1,44 @@
+from plone import api
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.impact import WorkflowImpact
+
+import pytest
+
+
+class TestAssignImpact:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        portal.portal_workflow.setChainForPortalTypes(
+            ("Document",), ("simple_publication_workflow",)
+        )
+        with api.env.adopt_roles(["Manager"]):
+            for doc_id, transition in (
+                ("private", None),
+                ("pending", "submit"),
+                ("published", "publish"),
+            ):
+                document = api.content.create(
+                    container=portal, type="Document", id=doc_id
+                )
+                if transition:
+                    api.content.transition(obj=document, transition=transition)
+        self.base = Base(portal, http_request, workflow_id="intranet_workflow")
+        self.service = WorkflowImpact(portal, http_request)
+
+    def test_states_of_the_same_id_are_kept(self):
+        impact = self.service.assign_impact(self.base, "Document")
+        assert impact["objects"] == 3
+        assert impact["kept"] == 2
+        assert impact["mapped"] == 0
+        assert impact["remap"] == 1
+        assert impact["new_states"] == {"private": 1, "pending": 1, "internal": 1}
+
+    def test_mapped_states(self):
+        impact = self.service.assign_impact(
+            self.base, "Document", {"published": "internally_published"}
+        )
+        assert impact["kept"] == 2
+        assert impact["mapped"] == 1
+        assert impact["remap"] == 0
+        assert impact["new_states"]["internally_published"] == 1
@@ -0,0 +1,45 @@
+from plone import api
+from workflow.manager.api.services.workflow.base import Base
+from workflow.manager.api.services.workflow.impact import permission_diff
+
+import pytest
+
+
+WORKFLOW_ID = "simple_publication_workflow"
+
+
+class TestPermissionDiff:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        portal.portal_workflow.setChainForPortalTypes(("Document",), (WORKFLOW_ID,))
+        with api.env.adopt_roles(["Manager"]):
+            self.document = api.content.create(
+                container=portal, type="Document", id="doc"
+            )
+        self.base = Base(portal, http_request, workflow_id=WORKFLOW_ID)
+        self.state = self.base.selected_workflow.states["private"]
+
+    def test_view_grant_changes_security(self):
+        roles = dict(self.state.permission_roles)
+        roles["View"] = (*roles["View"], "Anonymous")
+        diff = permission_diff(self.base, self.state, {"permission_roles": roles})
+
+        assert diff["permissions"]["added"] == [("View", "Anonymous")]
+        assert diff["permissions"]["removed"] == []
+        assert diff["objects"] == 1
+        assert diff["security_reindex"] == 1
+        assert diff["sample"][0]["UID"] == api.content.get_uuid(self.document)
+        assert diff["sample"][0]["added"] == ["Anonymous"]
+        # Nothing was changed.
+        assert "Anonymous" not in self.state.permission_roles["View"]
+
+    def test_other_permissions_leave_security_alone(self):
+        roles = dict(self.state.permission_roles)
+        roles["Modify portal content"] = ("Manager",)
+        diff = permission_diff(self.base, self.state, {"permission_roles": roles})
+
+        assert diff["permissions"]["removed"]
+        assert diff["objects"] == 1
+        assert diff["security_reindex"] == 0
+        assert diff["sample"] == []
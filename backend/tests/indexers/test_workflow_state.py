@@ -0,0 +1,57 @@
+from plone import api
+from workflow.manager.indexers.workflow_state import backfill
+from workflow.manager.indexers.workflow_state import entered_state
+
+import pytest
+
+
+WORKFLOW_ID = "simple_publication_workflow"
+
+
+class TestWorkflowStateIndexes:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        self.catalog = portal.portal_catalog
+        portal.portal_workflow.setChainForPortalTypes(("Document",), (WORKFLOW_ID,))
+        with api.env.adopt_roles(["Manager"]):
+            self.document = api.content.create(
+                container=portal, type="Document", id="doc"
+            )
+        self.workflow = portal.portal_workflow[WORKFLOW_ID]
+
+    def test_workflow_id(self):
+        brains = self.catalog.unrestrictedSearchResults(workflow_id=WORKFLOW_ID)
+        assert [b.getObject() for b in brains] == [self.document]
+
+    def test_backfill(self):
+        path = "/".join(self.document.getPhysicalPath())
+        self.catalog._catalog.getIndex("workflow_id").unindex_object(
+            self.catalog.getrid(path)
+        )
+        assert not self.catalog.unrestrictedSearchResults(workflow_id=WORKFLOW_ID)
+
+        backfill(self.portal)
+        brains = self.catalog.unrestrictedSearchResults(workflow_id=WORKFLOW_ID)
+        assert [b.getObject() for b in brains] == [self.document]
+
+    def test_review_state_since_follows_transitions(self):
+        history = self.document.workflow_history[WORKFLOW_ID]
+        assert entered_state(self.document, self.workflow) == history[-1]["time"]
+
+        with api.env.adopt_roles(["Manager"]):
+            api.content.transition(obj=self.document, transition="publish")
+        published = self.document.workflow_history[WORKFLOW_ID][-1]["time"]
+        brain = self.catalog.unrestrictedSearchResults(
+            UID=api.content.get_uuid(self.document)
+        )[0]
+        assert brain.review_state_since == published
+
+    def test_same_state_entries_do_not_count(self):
+        history = self.document.workflow_history[WORKFLOW_ID]
+        entered = history[-1]["time"]
+        self.document.workflow_history[WORKFLOW_ID] = (
+            *history,
+            {"action": None, "review_state": "private", "time": entered + 1},
+        )
+        assert entered_state(self.document, self.workflow) == entered
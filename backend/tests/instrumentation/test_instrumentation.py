@@ -0,0 +1,35 @@
+from workflow.manager import instrumentation
+from workflow.manager.api.services.workflow.workflow import GetWorkflows
+
+import pytest
+
+
+class TestInstrumentation:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request, monkeypatch):
+        self.portal = portal
+        self.request = http_request
+        self.monkeypatch = monkeypatch
+        instrumentation.registry.clear()
+
+    def test_disabled_by_default(self):
+        self.monkeypatch.delenv(instrumentation.ENVIRONMENT_VARIABLE, raising=False)
+        GetWorkflows(self.portal, self.request).render()
+        assert self.request.response.getHeader("Server-Timing") is None
+        assert instrumentation.registry.requests == {}
+
+    def test_server_timing_and_metrics(self):
+        self.monkeypatch.setenv(instrumentation.ENVIRONMENT_VARIABLE, "1")
+        GetWorkflows(self.portal, self.request).render()
+
+        timing = self.request.response.getHeader("Server-Timing")
+        names = [entry.split(";")[0] for entry in timing.split(", ")]
+        assert names[0] == "total"
+        assert {"reply", "serialize", "chains", "types", "zodb-loads"} <= set(names)
+
+        metrics = instrumentation.registry.render()
+        assert (
+            'workflow_manager_request_duration_seconds_count{service="GetWorkflows"} 1'
+            in metrics
+        )
+        assert 'phase="chains"' in metrics
@@ -0,0 +1,79 @@
+from plone import api
+from workflow.manager import jobs
+from workflow.manager.api.services.workflow.workflow import AssignWorkflow
+
+import json
+import pytest
+
+
+class TestAssignWorkflowHandler:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        wtool = portal.portal_workflow
+        wtool.setChainForPortalTypes(("Document",), ("simple_publication_workflow",))
+        with api.env.adopt_roles(["Manager"]):
+            self.published = api.content.create(
+                container=portal, type="Document", id="published"
+            )
+            api.content.transition(obj=self.published, transition="publish")
+            self.private = api.content.create(
+                container=portal, type="Document", id="private"
+            )
+        wtool.setChainForPortalTypes(("Document",), ("intranet_workflow",))
+        job = jobs.create_job(
+            portal,
+            "assign-workflow",
+            "intranet_workflow",
+            params={
+                "types": ["Document"],
+                "state_map": {"published": "internally_published"},
+                "previous_chains": {"Document": ["simple_publication_workflow"]},
+            },
+        )
+        self.handler = jobs._handlers["assign-workflow"](portal, job)
+
+    def state_of(self, obj):
+        status = self.portal.portal_workflow.getStatusOf("intranet_workflow", obj)
+        return status and status["review_state"]
+
+    def test_states_are_mapped(self):
+        assert self.handler.query() == {"portal_type": ["Document"]}
+        assert self.handler.process(self.published)
+        assert self.state_of(self.published) == "internally_published"
+
+    def test_unmapped_states_keep_their_id(self):
+        assert self.handler.process(self.private)
+        assert self.state_of(self.private) == "private"
+
+    def test_content_created_after_the_change_is_left_alone(self):
+        with api.env.adopt_roles(["Manager"]):
+            new = api.content.create(container=self.portal, type="Document", id="new")
+        before = self.state_of(new)
+        assert not self.handler.process(new)
+        assert self.state_of(new) == before
+
+
+class TestAssignWorkflowToOneType:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+        with api.env.adopt_roles(["Manager"]):
+            self.document = api.content.create(
+                container=portal, type="Document", id="document"
+            )
+
+    def test_assignment_is_synchronous_and_reindexes(self):
+        self.request["BODY"] = json.dumps({"type_id": "Document"})
+        service = AssignWorkflow(self.portal, self.request)
+        service.params = ["intranet_workflow"]
+        result = service.reply()
+        assert self.request.response.getStatus() == 200
+        assert result["status"] == "success"
+        assert result["type"] == "Document"
+        assert not jobs.find_jobs(self.portal, kind="assign-workflow")
+        chain = self.portal.portal_workflow.getChainForPortalType("Document")
+        assert chain == ("intranet_workflow",)
+        brains = self.portal.portal_catalog(workflow_id="intranet_workflow")
+        assert [b.getId for b in brains] == ["document"]
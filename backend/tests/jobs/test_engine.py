@@ -0,0 +1,132 @@
+from plone import api
+from workflow.manager import jobs
+
+import pytest
+import time
+
+
+class CountingHandler(jobs.BaseJobHandler):
+    """Records every processed object on the job."""
+
+    def query(self):
+        return {
+            "portal_type": "Document",
+            "path": "/".join(self.portal["jobs"].getPhysicalPath()),
+        }
+
+    def process(self, obj):
+        self.job.params["seen"] = [*self.job.params.get("seen", []), obj.getId()]
+        return True
+
+    def finalize(self):
+        self.job.params["finalized"] = True
+
+
+class TestJobEngine:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional, monkeypatch):
+        self.portal = functional["portal"]
+        self.monkeypatch = monkeypatch
+        monkeypatch.setitem(jobs._handlers, "counting", CountingHandler)
+        with api.env.adopt_roles(["Manager"]):
+            folder = api.content.create(container=self.portal, type="Folder", id="jobs")
+            for i in range(5):
+                api.content.create(container=folder, type="Document", id=f"doc_{i}")
+
+    def create_job(self, **kwargs):
+        # Run the job here instead of in a thread started after the commit.
+        self.monkeypatch.setattr(jobs, "start_after_commit", lambda *args: None)
+        return jobs.create_job(
+            self.portal, "counting", "simple_publication_workflow", **kwargs
+        )
+
+    def test_handlers_must_implement_query_and_process(self):
+        with pytest.raises(TypeError):
+            jobs.BaseJobHandler(self.portal, None)
+
+    def test_work_processes_all_batches(self):
+        job = self.create_job(batch_size=2)
+        jobs._work(self.portal, job.id)
+        job = jobs.get_job(self.portal, job.id)
+        assert job.status == jobs.DONE
+        assert job.total == job.processed == job.changed == 5
+        assert sorted(job.params["seen"]) == [f"doc_{i}" for i in range(5)]
+        assert job.params["finalized"]
+
+    def test_finished_jobs_cannot_be_claimed(self):
+        job = self.create_job()
+        jobs._work(self.portal, job.id)
+        assert jobs._claim(self.portal, job.id) is None
+
+    def test_a_newer_claim_takes_over(self):
+        job = self.create_job(batch_size=2)
+        first = jobs._claim(self.portal, job.id)
+        second = jobs._claim(self.portal, job.id)
+        assert first != second
+        handler = CountingHandler(self.portal, job)
+        brains = jobs._next_batch(
+            self.portal.portal_catalog, handler.query(), job.batch_size, None
+        )
+        assert not jobs._process_batch(self.portal, job.id, first, handler, brains)
+        assert jobs._process_batch(self.portal, job.id, second, handler, brains)
+        assert jobs.get_job(self.portal, job.id).processed == 2
+
+    def test_resume_from_cursor_after_a_crash(self):
+        job = self.create_job(batch_size=2)
+        process_batch = jobs._process_batch
+
+        def crash_after_first_batch(*args, **kwargs):
+            process_batch(*args, **kwargs)
+            raise RuntimeError("Process killed")
+
+        self.monkeypatch.setattr(jobs, "_process_batch", crash_after_first_batch)
+        with pytest.raises(RuntimeError):
+            jobs._work(self.portal, job.id)
+        job = jobs.get_job(self.portal, job.id)
+        assert job.status == jobs.RUNNING
+        assert job.processed == 2
+        assert job.cursor is not None
+
+        self.monkeypatch.setattr(jobs, "_process_batch", process_batch)
+        jobs._work(self.portal, job.id)
+        job = jobs.get_job(self.portal, job.id)
+        assert job.status == jobs.DONE
+        # Nothing was processed twice.
+        assert sorted(job.params["seen"]) == [f"doc_{i}" for i in range(5)]
+        assert job.processed == 5
+
+    def test_resume_if_stale(self):
+        started = []
+        self.monkeypatch.setattr(
+            jobs,
+            "start_after_commit",
+            lambda portal, job, *args: started.append(job.id),
+        )
+        job = jobs.create_job(self.portal, "counting", "simple_publication_workflow")
+        started.clear()
+        assert not jobs.resume_if_stale(self.portal, job)
+
+        job.status = jobs.RUNNING
+        job.heartbeat = time.time() - jobs.STALE_AFTER - 1
+        assert jobs.resume_if_stale(self.portal, job)
+        assert started == [job.id]
+
+        job.status = jobs.DONE
+        assert not jobs.resume_if_stale(self.portal, job)
+
+    def test_partitions_are_merged(self):
+        job = self.create_job(batch_size=1, partitions=3)
+
+        def spawn(db, site_path, job_id, partition=None):
+            jobs._work_partition(self.portal, job_id, partition)
+            return True
+
+        self.monkeypatch.setattr(jobs, "_spawn", spawn)
+        jobs._work(self.portal, job.id)
+        job = jobs.get_job(self.portal, job.id)
+        assert job.status == jobs.DONE
+        assert all(p.status == jobs.DONE for p in job.partitions.values())
+        assert sum(p.processed for p in job.partitions.values()) == 5
+        assert job.total == job.processed == job.changed == 5
+        assert sorted(job.params["seen"]) == [f"doc_{i}" for i in range(5)]
+        assert job.params["finalized"]
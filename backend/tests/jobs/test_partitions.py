@@ -0,0 +1,47 @@
+from workflow.manager import jobs
+
+import pytest
+
+
+class TestPartitions:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+
+    def test_uid_ranges_cover_the_uid_space(self):
+        assert jobs.uid_ranges(1) == [(None, None)]
+        assert jobs.uid_ranges(4) == [
+            (None, "40"),
+            ("40", "80"),
+            ("80", "c0"),
+            ("c0", None),
+        ]
+        ranges = jobs.uid_ranges(jobs.MAX_PARTITIONS)
+        assert len(ranges) == jobs.MAX_PARTITIONS
+        assert ranges[1] == ("01", "02")
+
+    def test_parallel_job(self):
+        job = jobs.create_job(
+            self.portal, "update-security", "simple_publication_workflow", partitions=3
+        )
+        assert [(p.lower, p.upper) for p in job.partitions.values()] == jobs.uid_ranges(
+            3
+        )
+        serialized = jobs.serialize_job(job)
+        assert [p["status"] for p in serialized["partitions"]] == [jobs.QUEUED] * 3
+
+    def test_serial_job_has_no_partitions(self):
+        job = jobs.create_job(
+            self.portal, "update-security", "simple_publication_workflow"
+        )
+        assert job.partitions is None
+        assert jobs.serialize_job(job)["partitions"] is None
+
+    def test_partition_count_is_limited(self):
+        with pytest.raises(ValueError):
+            jobs.create_job(
+                self.portal,
+                "update-security",
+                "simple_publication_workflow",
+                partitions=jobs.MAX_PARTITIONS + 1,
+            )
@@ -0,0 +1,71 @@
+from plone import api
+from workflow.manager import jobs
+from workflow.manager.api.services.workflow.state import DeleteState
+
+import json
+import pytest
+
+
+class TestDeleteStateInBackground:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "remap_workflow")
+        self.workflow = wtool["remap_workflow"]
+
+    def delete(self, **body):
+        self.request["BODY"] = json.dumps(body)
+        self.request.response.setStatus(200)
+        service = DeleteState(self.portal, self.request)
+        service.params = ["remap_workflow", "pending"]
+        result = service.reply()
+        return self.request.response.getStatus(), result
+
+    def test_retry_while_the_job_runs(self):
+        status, result = self.delete(replacement_state_id="private", background=True)
+        assert status == 202
+        job_id = result["job"]["id"]
+        assert self.workflow.transitions["submit"].new_state_id == "private"
+
+        # The transitions no longer lead to the state; it must not be
+        # deleted before its content is moved out.
+        status, result = self.delete()
+        assert status == 409
+        assert result["job"]["id"] == job_id
+        assert "pending" in self.workflow.states.objectIds()
+
+        status, result = self.delete(replacement_state_id="private", background=True)
+        assert status == 202
+        assert result["job"]["id"] == job_id
+        assert len(jobs.find_jobs(self.portal, kind="remap-state")) == 1
+
+
+class TestDeleteState:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "remap_workflow")
+        wtool.setChainForPortalTypes(("Document",), ("remap_workflow",))
+        with api.env.adopt_roles(["Manager"]):
+            self.document = api.content.create(
+                container=portal, type="Document", id="doc"
+            )
+            api.content.transition(obj=self.document, transition="submit")
+
+    def test_remapped_content_is_reindexed(self):
+        self.request["BODY"] = json.dumps({"replacement_state_id": "private"})
+        service = DeleteState(self.portal, self.request)
+        service.params = ["remap_workflow", "pending"]
+        service.reply()
+        assert self.request.response.getStatus() == 200
+
+        entered = self.document.workflow_history["remap_workflow"][-1]["time"]
+        brain = self.portal.portal_catalog.unrestrictedSearchResults(
+            UID=api.content.get_uuid(self.document)
+        )[0]
+        assert brain.review_state == "private"
+        assert brain.review_state_since == entered
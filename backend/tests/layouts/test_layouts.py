@@ -0,0 +1,92 @@
+from workflow.manager import layouts
+from workflow.manager import revisions
+from workflow.manager.api.services.workflow.layout import WorkflowLayout
+
+import json
+
+import pytest
+
+
+class TestLayouts:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+
+    def test_missing_layout(self):
+        assert layouts.get_layout("missing") == {}
+
+    def test_set_and_patch(self):
+        layouts.set_layout(
+            "wf",
+            {
+                "nodes": {"draft": {"x": 0, "y": 0}, "review": {"x": 100, "y": 0}},
+                "zoom": 1,
+            },
+        )
+        layouts.set_layout("other", {"zoom": 2})
+
+        layouts.patch_layout(
+            "wf", {"nodes": {"review": {"y": 50}, "draft": None}, "zoom": 1.5}
+        )
+
+        assert layouts.get_layout("wf") == {
+            "nodes": {"review": {"x": 100, "y": 50}},
+            "zoom": 1.5,
+        }
+        assert layouts.get_layout("other") == {"zoom": 2}
+
+    def test_delete(self):
+        layouts.set_layout("wf", {"zoom": 1})
+        layouts.delete_layout("wf")
+        assert layouts.get_layout("wf") == {}
+
+    def test_saves_are_stamped(self):
+        assert layouts.layout_modified("wf") is None
+        layouts.set_layout("wf", {"zoom": 1})
+        saved = layouts.layout_modified("wf")
+        assert saved
+        layouts.patch_layout("wf", {"zoom": 2})
+        assert layouts.layout_modified("wf") >= saved
+        assert layouts.get_layout("wf") == {"zoom": 2}
+
+    def test_saves_leave_the_definition_revision_alone(self):
+        workflow_id = "simple_publication_workflow"
+        revision = revisions.workflow_revision(self.portal, workflow_id)
+        layouts.set_layout(workflow_id, {"zoom": 1})
+        layouts.patch_layout(workflow_id, {"zoom": 2})
+        assert revisions.workflow_revision(self.portal, workflow_id) == revision
+
+
+class TestLayoutService:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+
+    def call(self, method, body):
+        self.request["BODY"] = json.dumps(body)
+        self.request.response.setStatus(200)
+        service = WorkflowLayout(self.portal, self.request)
+        service.params = ["simple_publication_workflow"]
+        result = getattr(service, method)()
+        return self.request.response.getStatus(), result
+
+    @pytest.mark.parametrize("body", [["nodes"], "layout", {"nodes": [1, 2]}])
+    def test_post_rejects_what_is_not_a_layout(self, body):
+        status, _result = self.call("post", body)
+        assert status == 400
+        assert layouts.get_layout("simple_publication_workflow") == {}
+
+    def test_post(self):
+        status, _result = self.call("post", {"nodes": {"private": {"x": 1, "y": 2}}})
+        assert status == 200
+        assert layouts.get_layout("simple_publication_workflow") == {
+            "nodes": {"private": {"x": 1, "y": 2}}
+        }
+
+    def test_patch_may_remove_nodes(self):
+        self.call("post", {"nodes": {"private": {"x": 1, "y": 2}}})
+        status, _result = self.call("patch", {"nodes": {"private": None}})
+        assert status == 204
+        status, _result = self.call("patch", {"nodes": {"private": 3}})
+        assert status == 400
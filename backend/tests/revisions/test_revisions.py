@@ -0,0 +1,59 @@
+from workflow.manager import revisions
+
+import pytest
+import transaction
+
+
+class TestRevisions:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+
+    def test_unknown_workflow_has_no_revision(self):
+        assert revisions.workflow_revision(self.portal, "missing") == (0, None)
+        assert revisions.global_revision(self.portal)[0] == 0
+
+    def test_revisions_are_monotonic(self):
+        first = revisions.bump(self.portal, "one_workflow")
+        second = revisions.bump(self.portal, "other_workflow")
+        assert second == first + 1
+        assert revisions.workflow_revision(self.portal, "one_workflow")[0] == first
+        assert revisions.global_revision(self.portal)[0] == second
+
+    def test_changes_since(self):
+        start = revisions.global_revision(self.portal)[0]
+        revisions.bump(self.portal, "wf", ("state", "draft", revisions.ADDED))
+        revisions.bump(self.portal, "wf", ("state", "draft", revisions.MODIFIED))
+        revisions.bump(self.portal, "wf", ("transition", "go", revisions.ADDED))
+        revisions.bump(self.portal, "wf", ("transition", "go", revisions.DELETED))
+        changes = revisions.changes_since(self.portal, start)
+        assert changes["wf"]["revision"] == start + 4
+        assert changes["wf"]["items"] == {("state", "draft"): revisions.ADDED}
+        assert revisions.changes_since(self.portal, start + 4) == {}
+
+    def test_changes_since_future_revision_resets(self):
+        assert revisions.changes_since(self.portal, 1000) is None
+
+    def test_pruned_feed_resets(self, monkeypatch):
+        monkeypatch.setattr(revisions, "MAX_CHANGES", 2)
+        for _ in range(5):
+            revisions.bump(self.portal, "wf")
+        assert revisions.changes_since(self.portal, 0) is None
+        assert revisions.changes_since(self.portal, 3) is not None
+
+    def test_changes_under_a_shared_revision_are_sent_again(self):
+        revision = revisions.bump(self.portal, "wf")
+        # A save of another workflow committed concurrently drew the same revision.
+        storage = revisions._storage(self.portal)
+        storage.changes[revision, "other"] = ("other", (), 0)
+        storage.counter.change(1)
+        assert sorted(revisions.changes_since(self.portal, revision)) == ["other", "wf"]
+        assert revisions.changes_since(self.portal, revision + 1) == {}
+
+    def test_saves_do_not_write_a_shared_object(self):
+        revisions.bump(self.portal, "wf")
+        storage = revisions._storage(self.portal)
+        transaction.savepoint(optimistic=True)
+        assert not storage._p_changed
+        revisions.bump(self.portal, "other")
+        assert not storage._p_changed
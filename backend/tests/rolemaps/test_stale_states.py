@@ -0,0 +1,41 @@
+from workflow.manager import rolemaps
+from workflow.manager.api.services.workflow.state import EditState
+
+import json
+import pytest
+
+
+class TestStaleStates:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, http_request):
+        self.portal = portal
+        self.request = http_request
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "stale_workflow")
+        self.state = wtool["stale_workflow"].states["private"]
+
+    def edit(self, **body):
+        self.request["BODY"] = json.dumps(body)
+        service = EditState(self.portal, self.request)
+        service.params = ["stale_workflow", "private"]
+        return service.reply()
+
+    def stale(self):
+        return set(rolemaps.stale_states(self.portal, "stale_workflow"))
+
+    def test_unchanged_role_maps_are_not_stale(self):
+        permission_roles = {
+            permission: list(reversed(roles))
+            for permission, roles in self.state.permission_roles.items()
+        }
+        # Stored as lists, the permissions are now also acquired.
+        self.edit(permission_roles=permission_roles)
+        assert self.stale() == {"private"}
+        rolemaps.clear(self.portal, "stale_workflow")
+
+        self.edit(title="Draft", permission_roles=permission_roles, group_roles={})
+        assert self.stale() == set()
+
+    def test_changed_role_maps_are_stale(self):
+        self.edit(group_roles={"Reviewers": ["Reader"]})
+        assert self.stale() == {"private"}
@@ -0,0 +1,74 @@
+from workflow.manager.api.services.workflow.simulate import NOT_OFFERED
+from workflow.manager.api.services.workflow.simulate import PERMISSION
+from workflow.manager.api.services.workflow.simulate import Simulator
+
+import pytest
+
+
+class TestSimulator:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        self.workflow = portal.portal_workflow["simple_publication_workflow"]
+
+    def matrix(self, roles, groups=()):
+        return Simulator(self.portal, self.workflow, roles, groups).matrix()
+
+    def test_reviewer_can_publish(self):
+        matrix = self.matrix(["Authenticated", "Reviewer"])
+        assert matrix["pending"]["publish"] == {"available": True, "failed": []}
+
+    def test_contributor_cannot_publish(self):
+        matrix = self.matrix(["Authenticated", "Contributor"])
+        assert matrix["pending"]["publish"] == {
+            "available": False,
+            "failed": [PERMISSION],
+        }
+
+    def test_transitions_not_offered_by_a_state(self):
+        matrix = self.matrix(["Manager"])
+        assert matrix["private"]["retract"] == {
+            "available": False,
+            "failed": [NOT_OFFERED],
+        }
+        assert set(matrix) == set(self.workflow.states.objectIds())
+        assert all(
+            set(row) == set(self.workflow.transitions.objectIds())
+            for row in matrix.values()
+        )
+
+
+class TestSimulatorPseudoRoles:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        wtool = portal.portal_workflow
+        wtool.manage_clone(wtool["simple_publication_workflow"], "pseudo_role_workflow")
+        self.workflow = wtool["pseudo_role_workflow"]
+        published = self.workflow.states["published"]
+        published.permission_roles = {
+            **published.permission_roles,
+            "View": ("Anonymous",),
+            "Access contents information": ("Authenticated",),
+        }
+        self.workflow.transitions["retract"].guard.permissions = ("View",)
+        self.workflow.transitions["reject"].guard.permissions = (
+            "Access contents information",
+        )
+
+    def matrix(self, roles):
+        return Simulator(self.portal, self.workflow, roles, ()).matrix()
+
+    @pytest.mark.parametrize("role", ["Reader", "Editor"])
+    def test_permissions_of_anonymous_and_authenticated(self, role):
+        matrix = self.matrix(["Authenticated", role])
+        assert matrix["published"]["retract"] == {"available": True, "failed": []}
+        assert matrix["published"]["reject"] == {"available": True, "failed": []}
+
+    def test_anonymous_is_not_authenticated(self):
+        matrix = self.matrix(["Anonymous"])
+        assert matrix["published"]["retract"] == {"available": True, "failed": []}
+        assert matrix["published"]["reject"] == {
+            "available": False,
+            "failed": [PERMISSION],
+        }
@@ -83,7 +83,11 @@ export function updateState(
 export function deleteState(
   workflowId: string,
   stateId: string,
-  data: { replacement_state_id?: string } = {},
+  data: {
+    replacement_state_id?: string;
+    background?: boolean;
+    batch_size?: number;
+  } = {},
 ) {
   return {
     type: DELETE_STATE,
@@ -10,14 +10,28 @@ import {
   SELECT_WORKFLOW_ITEM,
   CLEAR_WORKFLOW_SELECTION,
   CLEAR_VALIDATION,
+  GET_WORKFLOW_GROUPS,
+  GET_WORKFLOW_LAYOUT,
 } from '../constants';
 
+// The listing does not need the per-workflow context data (assignable
+// types, permissions, roles, groups); it is loaded with the single workflow.
+const WORKFLOW_LISTING_FIELDS = [
+  'id',
+  'title',
+  'description',
+  'initial_state',
+  'assigned_types',
+  'states',
+  'transitions',
+];
+
 export function getWorkflows() {
   return {
     type: GET_WORKFLOWS,
     request: {
       op: 'get',
-      path: '/@workflows',
+      path: `/@workflows?fields=${WORKFLOW_LISTING_FIELDS.join(',')}`,
     },
   };
 }
@@ -75,13 +89,21 @@ export function updateWorkflow(
   };
 }
 
-export function updateWorkflowSecurity(workflowId: string) {
+export function updateWorkflowSecurity(
+  workflowId: string,
+  options: {
+    incremental?: boolean;
+    background?: boolean;
+    partitions?: number;
+    workers?: number;
+  } = {},
+) {
   return {
     type: UPDATE_WORKFLOW_SECURITY,
     request: {
       op: 'post',
       path: `/@workflows/${workflowId}/@update-security`,
-      data: {},
+      data: options,
     },
   };
 }
@@ -99,6 +121,26 @@ export function assignWorkflow(workflowId: string, contentType: string) {
   };
 }
 
+// Assigns several types at once; their content is moved to the mapped
+// states by a background job (see `/@workflow-jobs`).
+export function assignWorkflowToTypes(
+  workflowId: string,
+  types: string[],
+  stateMap: Record<string, string> = {},
+) {
+  return {
+    type: ASSIGN_WORKFLOW,
+    request: {
+      op: 'post',
+      path: `/@workflow-assign/${workflowId}`,
+      data: {
+        types,
+        state_map: stateMap,
+      },
+    },
+  };
+}
+
 export function validateWorkflow(workflowId: string) {
   return {
     type: VALIDATE_WORKFLOW,
@@ -109,6 +151,27 @@ export function validateWorkflow(workflowId: string) {
   };
 }
 
+export function getWorkflowGroups(query: string = '', size: number = 50) {
+  return {
+    type: GET_WORKFLOW_GROUPS,
+    request: {
+      op: 'get',
+      path: `/@workflow-groups?q=${encodeURIComponent(query)}&b_size=${size}`,
+    },
+  };
+}
+
+// Stored node positions; states without one are placed by the server.
+export function getWorkflowLayout(workflowId: string) {
+  return {
+    type: GET_WORKFLOW_LAYOUT,
+    request: {
+      op: 'get',
+      path: `/@workflow-layout/${workflowId}`,
+    },
+  };
+}
+
 export function clearValidation() {
   return {
     type: CLEAR_VALIDATION,
@@ -1,6 +1,6 @@
 import { useCallback, useState, useEffect } from 'react';
-import { useDispatch } from 'react-redux';
-import { selectWorkflowItem } from '../../actions';
+import { useDispatch, useSelector } from 'react-redux';
+import { getWorkflowLayout, selectWorkflowItem } from '../../actions';
 import {
   ReactFlow,
   ReactFlowProvider,
@@ -22,6 +22,7 @@ import {
 import CustomEdge from './Edges/CustomEdge';
 import CustomNode from './Nodes/CustomNode';
 import type { Workflow, EdgeData, NodeData } from '../../types/graph';
+import type { GlobalRootState } from '../../types';
 import '@xyflow/react/dist/style.css';
 import CreateTransition from '../Transitions/CreateTransition';
 import { setSidebarTab } from '@plone/volto/actions/sidebar/sidebar';
@@ -47,6 +48,15 @@ const WorkflowGraphInner: React.FC<WorkflowGraphProps> = ({ workflow }) => {
     source: string;
     target: string;
   } | null>(null);
+  const layout = useSelector((state: GlobalRootState) => state.workflow.layout);
+  const positions =
+    layout.workflowId === workflow?.id ? layout.nodes : undefined;
+
+  useEffect(() => {
+    if (workflow?.id) {
+      dispatch(getWorkflowLayout(workflow.id));
+    }
+  }, [dispatch, workflow?.id, workflow?.states, workflow?.transitions]);
 
   useEffect(() => {
     if (!workflow) return;
@@ -64,7 +74,8 @@ const WorkflowGraphInner: React.FC<WorkflowGraphProps> = ({ workflow }) => {
           isInitial: state.id === workflow.initial_state,
           isFinal: !state.transitions?.length,
         },
-        position: {
+        // Fall back to a circle until the layout is loaded.
+        position: positions?.[state.id] || {
           x: 400 + Math.cos(angle) * radius,
           y: 300 + Math.sin(angle) * radius,
         },
@@ -99,7 +110,7 @@ const WorkflowGraphInner: React.FC<WorkflowGraphProps> = ({ workflow }) => {
 
     setNodes(newNodes);
     setEdges(newEdges);
-  }, [workflow, setNodes, setEdges]);
+  }, [workflow, positions, setNodes, setEdges]);
 
   const onConnect = useCallback((connection: Connection) => {
     setNewTransitionInfo({
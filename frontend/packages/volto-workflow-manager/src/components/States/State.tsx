@@ -14,6 +14,7 @@ import {
 } from '@adobe/react-spectrum';
 import { listStates, deleteState } from '../../actions/state';
 import { listTransitions } from '../../actions/transition';
+import { getWorkflowGroups } from '../../actions/workflow';
 import PropertiesTab from './Tabs/PropertiesTab';
 import TransitionsTab from './Tabs/TransitionsTab';
 import PermissionRolesTab from './Tabs/PermissionRolesTab';
@@ -73,6 +74,13 @@ const State: React.FC<StateProps> = ({
   const selectedItem = useSelector(
     (state: GlobalRootState) => state.workflow.selectedItem,
   );
+  const groups = useSelector(
+    (state: GlobalRootState) => state.workflow.groups.items,
+  );
+
+  useEffect(() => {
+    dispatch(getWorkflowGroups());
+  }, [dispatch]);
 
   useEffect(() => {
     if (workflowId) {
@@ -231,7 +239,10 @@ const State: React.FC<StateProps> = ({
                 <GroupRolesTab
                   key={`group-roles-${selectedStateId}`}
                   data={localStateData?.groupRoles}
-                  groups={workflow?.context_data?.groups || []}
+                  groups={groups}
+                  onSearchGroups={(query) =>
+                    dispatch(getWorkflowGroups(query))
+                  }
                   availableRoles={workflow?.context_data?.available_roles || []}
                   onChange={(groupRoles) => handleStateChange({ groupRoles })}
                   isDisabled={areTabsDisabled}
@@ -9,6 +9,7 @@ import {
   Row,
   Cell,
   Checkbox,
+  SearchField,
 } from '@adobe/react-spectrum';
 import type { GroupRolesTabProps } from '../../../types/state';
 import { cloneDeep } from 'lodash';
@@ -16,6 +17,7 @@ import { cloneDeep } from 'lodash';
 const GroupRolesTab: React.FC<GroupRolesTabProps> = ({
   data,
   groups,
+  onSearchGroups,
   availableRoles,
   onChange,
   isDisabled,
@@ -29,8 +31,13 @@ const GroupRolesTab: React.FC<GroupRolesTabProps> = ({
     name: roleName,
   }));
 
+  // Groups that already have roles stay visible whatever the search shows.
+  const shownGroupIds = new Set(groups.map((g) => g.id));
   const tableColumns = [
     { key: 'role', name: 'Role' },
+    ...Object.keys(data || {})
+      .filter((groupId) => !shownGroupIds.has(groupId))
+      .map((groupId) => ({ key: groupId, name: groupId })),
     ...groups.map((g) => ({ key: g.id, name: g.title })),
   ];
 
@@ -57,6 +64,13 @@ const GroupRolesTab: React.FC<GroupRolesTabProps> = ({
         Select the local roles that are assigned to each group in this state.
       </Text>
 
+      <SearchField
+        label="Search groups"
+        onSubmit={onSearchGroups}
+        onClear={() => onSearchGroups('')}
+        marginTop="size-200"
+      />
+
       <TableView
         aria-label="Group Roles Matrix"
         density="compact"
@@ -6,6 +6,7 @@ import {
   Flex,
   ListView,
   Item,
+  SearchField,
 } from '@adobe/react-spectrum';
 import type { GuardsTabProps } from '../../../types/transition';
 
@@ -13,11 +14,20 @@ const GuardsTab: React.FC<GuardsTabProps> = ({
   data,
   availableRoles,
   availableGroups,
+  onSearchGroups,
   availablePermissions,
   onChange,
   isDisabled,
 }) => {
   const roleItems = availableRoles.map((role) => ({ id: role, name: role }));
+  // Selected groups stay visible whatever the search shows.
+  const shownGroupIds = new Set(availableGroups.map((g) => g.id));
+  const groupItems = [
+    ...(data.groups || [])
+      .filter((groupId) => !shownGroupIds.has(groupId))
+      .map((groupId) => ({ id: groupId, title: groupId })),
+    ...availableGroups,
+  ];
 
   const handleSelectionChange = (
     keys: 'all' | Set<React.Key>,
@@ -55,10 +65,16 @@ const GuardsTab: React.FC<GuardsTabProps> = ({
 
         <View flex={1} minWidth="200px">
           <Heading level={4}>Groups</Heading>
+          <SearchField
+            aria-label="Search groups"
+            onSubmit={onSearchGroups}
+            onClear={() => onSearchGroups('')}
+            width="100%"
+          />
           <ListView
             aria-label="Guard Groups"
             selectionMode="multiple"
-            items={availableGroups}
+            items={groupItems}
             selectedKeys={new Set(data.groups)}
             onSelectionChange={(keys) => handleSelectionChange(keys, 'groups')}
             height="size-2000"
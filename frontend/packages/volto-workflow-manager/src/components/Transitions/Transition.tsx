@@ -14,6 +14,7 @@ import {
 } from '@adobe/react-spectrum';
 import { listTransitions, deleteTransition } from '../../actions/transition';
 import { listStates } from '../../actions/state';
+import { getWorkflowGroups } from '../../actions/workflow';
 import PropertiesTab from './Tabs/PropertiesTab';
 import GuardsTab from './Tabs/GuardsTab';
 import SourceStatesTab from './Tabs/SourceStatesTab';
@@ -46,6 +47,13 @@ const Transition: React.FC<TransitionProps> = ({
   const selectedItem = useSelector(
     (state: GlobalRootState) => state.workflow.selectedItem,
   );
+  const groups = useSelector(
+    (state: GlobalRootState) => state.workflow.groups.items,
+  );
+
+  useEffect(() => {
+    dispatch(getWorkflowGroups());
+  }, [dispatch]);
 
   useEffect(() => {
     if (workflowId) {
@@ -247,7 +255,10 @@ const Transition: React.FC<TransitionProps> = ({
                   key={`guards-${selectedTransitionId}`}
                   data={localTransitionData?.guards}
                   availableRoles={workflow?.context_data?.available_roles || []}
-                  availableGroups={workflow?.context_data?.groups || []}
+                  availableGroups={groups}
+                  onSearchGroups={(query) =>
+                    dispatch(getWorkflowGroups(query))
+                  }
                   availablePermissions={
                     workflow?.context_data?.managed_permissions || []
                   }
@@ -134,6 +134,7 @@ const ActionsToolbar = ({ workflowId }: { workflowId: string }) => {
 
         <WorkflowValidation
           validationErrors={validation.errors}
+          validationWarnings={validation.warnings}
           workflowId={workflowId}
         />
       </Flex>
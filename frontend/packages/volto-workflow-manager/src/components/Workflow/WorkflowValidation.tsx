@@ -9,15 +9,20 @@ import {
   Text,
   Divider,
 } from '@adobe/react-spectrum';
-import type { ValidationErrors } from '../../types/workflow';
+import type {
+  ValidationErrors,
+  ValidationWarning,
+} from '../../types/workflow';
 
 interface WorkflowValidationProps {
   validationErrors: ValidationErrors | null;
+  validationWarnings?: ValidationWarning[];
   workflowId: string;
 }
 
 const WorkflowValidation: React.FC<WorkflowValidationProps> = ({
   validationErrors,
+  validationWarnings = [],
   workflowId,
 }) => {
   if (!validationErrors) {
@@ -29,6 +34,26 @@ const WorkflowValidation: React.FC<WorkflowValidationProps> = ({
     validationErrors.transition_errors.length > 0 ||
     validationErrors.initial_state_error;
 
+  const warningList = (close: () => void) => (
+    <>
+      <Heading level={3}>Warnings</Heading>
+      {validationWarnings.map((warning, index) => (
+        <Text key={`warning-${index}`}>
+          <b>
+            <Link
+              to={`/controlpanel/workflowmanager/${workflowId}/settings`}
+              onClick={close}
+            >
+              {warning.title || warning.id}
+            </Link>
+          </b>
+          : {warning.error}
+          <br />
+        </Text>
+      ))}
+    </>
+  );
+
   return (
     <DialogTrigger>
       <ActionButton
@@ -100,7 +125,19 @@ const WorkflowValidation: React.FC<WorkflowValidationProps> = ({
                   ))}
                 </>
               )}
+              {validationWarnings.length > 0 && (
+                <>
+                  <Divider
+                    size="S"
+                    marginTop="size-100"
+                    marginBottom="size-100"
+                  />
+                  {warningList(close)}
+                </>
+              )}
             </Content>
+          ) : validationWarnings.length > 0 ? (
+            <Content>{warningList(close)}</Content>
           ) : (
             <Text>No validation errors found.</Text>
           )}
@@ -10,6 +10,8 @@ export const CLEAR_VALIDATION = 'CLEAR_VALIDATION' as const;
 export const SELECT_WORKFLOW_ITEM = 'SELECT_WORKFLOW_ITEM' as const;
 export const CLEAR_WORKFLOW_SELECTION = 'CLEAR_WORKFLOW_SELECTION' as const;
 export const CLEAR_LAST_CREATED_WORKFLOW = 'CLEAR_LAST_CREATED_WORKFLOW';
+export const GET_WORKFLOW_GROUPS = 'GET_WORKFLOW_GROUPS' as const;
+export const GET_WORKFLOW_LAYOUT = 'GET_WORKFLOW_LAYOUT' as const;
 
 export const LIST_STATES = 'LIST_STATES';
 export const ADD_STATE = 'ADD_STATE';
@@ -12,6 +12,8 @@ import {
   CLEAR_LAST_CREATED_WORKFLOW,
   SELECT_WORKFLOW_ITEM,
   CLEAR_WORKFLOW_SELECTION,
+  GET_WORKFLOW_GROUPS,
+  GET_WORKFLOW_LAYOUT,
 } from '../constants';
 import type { WorkflowReduxState } from '../types/workflow';
 
@@ -31,6 +33,7 @@ const initialState: WorkflowReduxState = {
   validation: {
     error: null,
     errors: null,
+    warnings: [],
     loading: false,
   },
   operation: {
@@ -38,6 +41,19 @@ const initialState: WorkflowReduxState = {
     loading: false,
     result: null,
   },
+  groups: {
+    error: null,
+    items: [],
+    total: 0,
+    loading: false,
+  },
+  layout: {
+    workflowId: null,
+    nodes: {},
+    generated: false,
+    loading: false,
+    error: null,
+  },
   lastCreatedWorkflowId: null,
   selectedItem: null,
 };
@@ -80,6 +96,57 @@ export default function workflow(
         },
       };
 
+    case `${GET_WORKFLOW_GROUPS}_PENDING`:
+      return {
+        ...state,
+        groups: { ...state.groups, error: null, loading: true },
+      };
+    case `${GET_WORKFLOW_GROUPS}_SUCCESS`:
+      return {
+        ...state,
+        groups: {
+          error: null,
+          items: action.result?.items || [],
+          total: action.result?.items_total || 0,
+          loading: false,
+        },
+      };
+    case `${GET_WORKFLOW_GROUPS}_FAIL`:
+      return {
+        ...state,
+        groups: {
+          ...state.groups,
+          error: action.error || 'Failed to load groups',
+          loading: false,
+        },
+      };
+
+    case `${GET_WORKFLOW_LAYOUT}_PENDING`:
+      return {
+        ...state,
+        layout: { ...state.layout, error: null, loading: true },
+      };
+    case `${GET_WORKFLOW_LAYOUT}_SUCCESS`:
+      return {
+        ...state,
+        layout: {
+          workflowId: action.result?.workflow_id || null,
+          nodes: action.result?.layout?.nodes || {},
+          generated: !!action.result?.generated,
+          loading: false,
+          error: null,
+        },
+      };
+    case `${GET_WORKFLOW_LAYOUT}_FAIL`:
+      return {
+        ...state,
+        layout: {
+          ...state.layout,
+          error: action.error || 'Failed to load layout',
+          loading: false,
+        },
+      };
+
     case `${ADD_WORKFLOW}_PENDING`:
       return {
         ...state,
@@ -314,6 +381,7 @@ export default function workflow(
           ...state.validation,
           loading: false,
           errors: action.result.errors,
+          warnings: action.result.warnings || [],
           error: null,
         },
       };
@@ -324,6 +392,7 @@ export default function workflow(
           ...state.validation,
           loading: false,
           errors: null,
+          warnings: [],
           error: action.error || 'Failed to validate workflow',
         },
       };
@@ -12,6 +12,7 @@ export interface GroupInfo {
 export interface GroupRolesTabProps {
   data: GroupRolesData;
   groups: GroupInfo[];
+  onSearchGroups: (query: string) => void;
   availableRoles: string[];
   onChange: (newData: GroupRolesData) => void;
   isDisabled: boolean;
@@ -20,6 +20,7 @@ export interface GuardsTabProps {
   data: GuardsData;
   availableRoles: string[];
   availableGroups: GroupInfo[];
+  onSearchGroups: (query: string) => void;
   availablePermissions: PermissionInfo[];
   onChange: (newData: GuardsData) => void;
   isDisabled: boolean;
@@ -99,7 +100,6 @@ export interface GetTransitionResponse {
   guard_options: {
     permissions: string[];
     roles: string[];
-    groups: { id: string; title: string }[];
   };
 }
 
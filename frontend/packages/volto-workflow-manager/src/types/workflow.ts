@@ -46,7 +46,6 @@ export interface AssignWorkflowProps {
 export interface ContextData {
   assignable_types: AssignableType[];
   available_roles: string[];
-  groups: GroupInfo[];
   managed_permissions: PermissionInfo[];
 }
 
@@ -88,12 +87,21 @@ export interface ValidationError {
   error: string;
 }
 
+export interface ValidationWarning extends ValidationError {
+  type: 'dead_end' | 'trap' | 'duplicate_transition';
+}
+
 export interface ValidationErrors {
   state_errors: ValidationError[];
   transition_errors: ValidationError[];
   initial_state_error: boolean;
 }
 
+export interface NodePosition {
+  x: number;
+  y: number;
+}
+
 export interface WorkflowReduxState {
   workflow: {
     currentWorkflow: Workflow;
@@ -110,6 +118,7 @@ export interface WorkflowReduxState {
   validation: {
     error: string | null;
     errors: ValidationErrors | null;
+    warnings: ValidationWarning[];
     loading: boolean;
   };
   operation: {
@@ -117,6 +126,19 @@ export interface WorkflowReduxState {
     loading: boolean;
     result: any;
   };
+  groups: {
+    error: string | null;
+    items: GroupInfo[];
+    total: number;
+    loading: boolean;
+  };
+  layout: {
+    workflowId: string | null;
+    nodes: Record<string, NodePosition>;
+    generated: boolean;
+    loading: boolean;
+    error: string | null;
+  };
   lastCreatedWorkflowId: string | null;
   selectedItem: { kind: 'state' | 'transition'; id: string } | null;
 }